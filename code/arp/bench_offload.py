@@ -0,0 +1,79 @@
+"""Load test: /token and /protected latency with and without crypto offloading.
+
+Starts server.py twice, once with CRYPTO_OFFLOAD=0 (signing and
+verification inline on the event loop) and once with the shared crypto
+executor, drives both with load_client.py's simulated users and compares
+the percentiles. Run from the directory holding config.yaml; the server
+must not already be running on the configured port.
+
+Usage: python bench_offload.py [--users 200] [--duration 20] [--interval 0.5]
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+import load_client
+from load_client import SERVER_NAME, SERVER_PORT, percentile
+
+ARP_DIR = Path(__file__).resolve().parent
+
+
+def start_server(offload: bool) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "CRYPTO_OFFLOAD": "1" if offload else "0",
+        "PYTHONPATH": os.pathsep.join([str(ARP_DIR), str(ARP_DIR.parent)]),
+    }
+    server = subprocess.Popen(
+        [sys.executable, str(ARP_DIR / "server.py")], env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://{SERVER_NAME}:{SERVER_PORT}/docs")
+            return server
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--interval", type=float, default=0.5)
+    parser.add_argument("--connections", type=int, default=100)
+    args = parser.parse_args()
+
+    results = {}
+    for offload in (False, True):
+        server = start_server(offload)
+        try:
+            stats = asyncio.run(load_client.run(args.users, args.duration, args.interval, 0.2, args.connections))
+            results[offload] = (stats, httpx.get(f"http://{SERVER_NAME}:{SERVER_PORT}/crypto/stats").json())
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"\n{'endpoint':>12} {'offload':>8} {'requests':>9} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for endpoint in ("/token", "/protected"):
+        for offload, (stats, _) in results.items():
+            latencies = sorted(stats.latencies[endpoint])
+            print(f"{endpoint:>12} {'on' if offload else 'off':>8} {len(latencies):>9} "
+                  f"{percentile(latencies, 0.50) * 1000:>8.2f} {percentile(latencies, 0.99) * 1000:>8.2f} "
+                  f"{latencies[-1] * 1000 if latencies else float('nan'):>8.2f}")
+    for pool, pool_stats in results[True][1].items():
+        if isinstance(pool_stats, dict):
+            print(f"{pool}: {pool_stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Benchmark JWT issuing and verification, python-jose vs. tokens.py.
+
+Usage: python bench_tokens.py [--seconds 1.0]
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from jose import jwt
+
+from tokens import TokenSigner, VerifiedTokenCache
+
+SECRET_KEY = "benchmark-secret-key"
+STATIC_CLAIMS = {"flag": "Y3J5cHRve2JlbmNobWFya30=", "hint": "encoded != encrypted"}
+
+
+def jose_issue(algorithm: str) -> str:
+    """The original create_access_token from server.py."""
+    to_encode = {"sub": "student"}
+    to_encode.update({"exp": datetime.utcnow() + timedelta(minutes=30), **STATIC_CLAIMS})
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=algorithm)
+
+
+def rate(func, seconds: float) -> float:
+    """Calls per second of `func` over roughly `seconds` seconds."""
+    calls = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            func()
+        calls += 100
+    return calls / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    print(f"{'algorithm':>9} {'operation':>8} {'before/s':>12} {'after/s':>12} {'speedup':>8}")
+    for algorithm in ("HS256", "HS512"):
+        signer = TokenSigner(SECRET_KEY, algorithm, STATIC_CLAIMS, expire_minutes=30)
+        cache = VerifiedTokenCache(SECRET_KEY, algorithm)
+        token = signer.sign({"sub": "student"})
+        assert jwt.decode(token, SECRET_KEY, algorithms=[algorithm])["flag"] == STATIC_CLAIMS["flag"]
+
+        before = rate(lambda: jose_issue(algorithm), args.seconds)
+        after = rate(lambda: signer.sign({"sub": "student"}), args.seconds)
+        print(f"{algorithm:>9} {'issue':>8} {before:>12,.0f} {after:>12,.0f} {after / before:>7.1f}x")
+
+        before = rate(lambda: jwt.decode(token, SECRET_KEY, algorithms=[algorithm]), args.seconds)
+        after = rate(lambda: cache.decode(token), args.seconds)
+        print(f"{algorithm:>9} {'verify':>8} {before:>12,.0f} {after:>12,.0f} {after / before:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,18 @@
 import logging
-import os
 import time
 
 import requests
 import schedule
-from glom import glom
-from yaml import SafeLoader, load
+
+from common.config import get_setting, load_config
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def get_setting(settings, path, env_var):
-    """Get setting from environment variable or fall back to config file."""
-    return os.environ.get(env_var, glom(settings, path))
-
-
-# Load YAML configuration
-with open("config.yaml") as f:
-    settings = load(f, Loader=SafeLoader)
+# Load configuration (see common/config.py)
+settings = load_config()
 
 # Get settings with environment variable override
 SERVER_NAME = get_setting(settings, "lab.arpspoofing.server.name", "SERVER_NAME")
@@ -27,10 +20,13 @@ SERVER_PORT = get_setting(settings, "lab.arpspoofing.server.port", "SERVER_PORT"
 USERNAME = get_setting(settings, "lab.arpspoofing.auth.username", "USERNAME")
 PASSWORD = get_setting(settings, "lab.arpspoofing.auth.password", "PASSWORD")
 
+# Reuse keep-alive connections across polling cycles
+http = requests.Session()
+
 
 def authenticate():
     try:
-        response = requests.post(
+        response = http.post(
             f"http://{SERVER_NAME}:{SERVER_PORT}/token",
             data={"username": USERNAME, "password": PASSWORD},
         )
@@ -39,7 +35,7 @@ def authenticate():
             logger.info(f"Successfully authenticated! Token: {token}")
 
             # Try accessing protected route
-            protected_response = requests.get(
+            protected_response = http.get(
                 f"http://{SERVER_NAME}:{SERVER_PORT}/protected",
                 headers={"Authorization": f"Bearer {token}"},
             )
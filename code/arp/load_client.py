@@ -0,0 +1,114 @@
+import argparse
+import asyncio
+import logging
+import random
+import time
+from collections import defaultdict
+
+import httpx
+
+from common.config import get_setting, load_config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+# httpx logs every request at INFO level
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+# Load configuration (see common/config.py)
+settings = load_config()
+
+SERVER_NAME = get_setting(settings, "lab.arpspoofing.server.name", "SERVER_NAME")
+SERVER_PORT = get_setting(settings, "lab.arpspoofing.server.port", "SERVER_PORT")
+USERNAME = get_setting(settings, "lab.arpspoofing.auth.username", "USERNAME")
+PASSWORD = get_setting(settings, "lab.arpspoofing.auth.password", "PASSWORD")
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return float("nan")
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, endpoint: str, started: float, ok: bool) -> None:
+        self.latencies[endpoint].append(time.perf_counter() - started)
+        if not ok:
+            self.errors[endpoint] += 1
+
+    def report(self, elapsed: float) -> None:
+        logger.info(f"{'endpoint':>12} {'requests':>9} {'errors':>7} {'req/s':>9} "
+                    f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        for endpoint, latencies in sorted(self.latencies.items()):
+            latencies.sort()
+            logger.info(
+                f"{endpoint:>12} {len(latencies):>9} {self.errors[endpoint]:>7} "
+                f"{len(latencies) / elapsed:>9.1f} "
+                f"{percentile(latencies, 0.50) * 1000:>8.2f} "
+                f"{percentile(latencies, 0.95) * 1000:>8.2f} "
+                f"{percentile(latencies, 0.99) * 1000:>8.2f}"
+            )
+
+
+async def simulate_user(client: httpx.AsyncClient, stats: Stats, deadline: float,
+                        interval: float, jitter: float) -> None:
+    """Run the /token -> /protected flow every `interval` (+/- jitter) seconds."""
+    # Spread the first requests of all users over one interval
+    await asyncio.sleep(random.uniform(0, interval))
+
+    while time.perf_counter() < deadline:
+        cycle_started = time.perf_counter()
+        try:
+            started = time.perf_counter()
+            response = await client.post("/token", data={"username": USERNAME, "password": PASSWORD})
+            stats.record("/token", started, response.status_code == 200)
+
+            if response.status_code == 200:
+                token = response.json()["access_token"]
+                started = time.perf_counter()
+                response = await client.get("/protected", headers={"Authorization": f"Bearer {token}"})
+                stats.record("/protected", started, response.status_code == 200)
+        except httpx.HTTPError as e:
+            stats.record("error", cycle_started, False)
+            logger.debug(f"Request failed: {e}")
+
+        delay = interval * (1 + random.uniform(-jitter, jitter)) - (time.perf_counter() - cycle_started)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def run(users: int, duration: float, interval: float, jitter: float, connections: int) -> Stats:
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    stats = Stats()
+
+    async with httpx.AsyncClient(base_url=f"http://{SERVER_NAME}:{SERVER_PORT}", limits=limits) as client:
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(
+            simulate_user(client, stats, deadline, interval, jitter) for _ in range(users)
+        ))
+        stats.report(time.perf_counter() - started)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate many concurrent users of the authentication service")
+    parser.add_argument("--users", type=int, default=100, help="number of simulated users")
+    parser.add_argument("--duration", type=float, default=30, help="test length in seconds")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between a user's login cycles")
+    parser.add_argument("--jitter", type=float, default=0.2, help="relative jitter applied to the interval")
+    parser.add_argument("--connections", type=int, default=50, help="size of the keep-alive connection pool")
+    args = parser.parse_args()
+
+    logger.info(f"Simulating {args.users} users for {args.duration}s against {SERVER_NAME}:{SERVER_PORT}")
+    asyncio.run(run(args.users, args.duration, args.interval, args.jitter, args.connections))
+
+
+if __name__ == "__main__":
+    main()
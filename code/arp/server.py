@@ -1,26 +1,16 @@
 import base64
-import os
-from datetime import datetime, timedelta
 from typing import Literal
 
 from fastapi import Depends, FastAPI, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from glom import glom
-from jose import JWTError, jwt
+from jose import JWTError
 from pydantic import BaseModel
 from pydantic_settings import BaseSettings
-from yaml import load
-from yaml.loader import SafeLoader
 
-
-def get_setting(settings, path, env_var):
-    """Get setting from environment variable or fall back to config file."""
-    return os.environ.get(env_var, glom(settings, path))
-
-
-# Load YAML configuration
-with open("config.yaml") as f:
-    settings = load(f, Loader=SafeLoader)
+from common.config import ConfigWatcher, get_setting, load_config
+from common.crypto_executor import get_executor
+from common.metrics import install_metrics, span, timed
+from tokens import TokenSigner, VerifiedTokenCache
 
 
 def encode_flag(flag: str) -> str:
@@ -29,57 +19,97 @@ def encode_flag(flag: str) -> str:
 
 
 class JWTSettings(BaseSettings):
-    secret_key: str = get_setting(settings, "lab.arpspoofing.jwt.secret_key", "JWT_SECRET_KEY")
-    algorithm: Literal["HS256", "HS512"] = get_setting(
-        settings, "lab.arpspoofing.jwt.algorithm", "JWT_ALGORITHM"
-    )
-    access_token_expire_minutes: int = get_setting(
-        settings, "lab.arpspoofing.jwt.access_token_expire_minutes", "JWT_EXPIRE_MINUTES"
-    )
-    flag: str = get_setting(settings, "lab.arpspoofing.flag", "JWT_FLAG")
+    secret_key: str
+    algorithm: Literal["HS256", "HS512"]
+    access_token_expire_minutes: int
+    flag: str
 
 
 class AuthSettings(BaseSettings):
-    username: str = get_setting(settings, "lab.arpspoofing.auth.username", "AUTH_USERNAME")
-    password: str = get_setting(settings, "lab.arpspoofing.auth.password", "AUTH_PASSWORD")
+    username: str
+    password: str
 
 
 class ServerSettings(BaseSettings):
-    name: str = get_setting(settings, "lab.arpspoofing.server.name", "SERVER_NAME")
-    port: int = get_setting(settings, "lab.arpspoofing.server.port", "SERVER_PORT")
+    name: str
+    port: int
+
 
+def load_settings(settings: dict) -> None:
+    """Build the settings objects and everything derived from them.
 
-# Initialize settings
-jwt_settings = JWTSettings()
-auth_settings = AuthSettings()
-server_settings = ServerSettings()
+    Called at import and again by the config watcher, so credentials, JWT
+    secret and flag can change without restarting the workers.
+    """
+    global jwt_settings, auth_settings, encoded_flag, token_signer, token_cache
 
-encoded_flag = encode_flag(jwt_settings.flag)
+    jwt_settings = JWTSettings(
+        secret_key=get_setting(settings, "lab.arpspoofing.jwt.secret_key", "JWT_SECRET_KEY"),
+        algorithm=get_setting(settings, "lab.arpspoofing.jwt.algorithm", "JWT_ALGORITHM"),
+        access_token_expire_minutes=get_setting(
+            settings, "lab.arpspoofing.jwt.access_token_expire_minutes", "JWT_EXPIRE_MINUTES"
+        ),
+        flag=get_setting(settings, "lab.arpspoofing.flag", "JWT_FLAG"),
+    )
+    auth_settings = AuthSettings(
+        username=get_setting(settings, "lab.arpspoofing.auth.username", "AUTH_USERNAME"),
+        password=get_setting(settings, "lab.arpspoofing.auth.password", "AUTH_PASSWORD"),
+    )
+
+    encoded_flag = encode_flag(jwt_settings.flag)
+
+    # The flag/hint claims are the same in every token, so they are encoded once
+    token_signer = TokenSigner(
+        jwt_settings.secret_key,
+        jwt_settings.algorithm,
+        static_claims={
+            "flag": encoded_flag,  # Using base64 encoded flag
+            "hint": "encoded != encrypted",
+        },
+        expire_minutes=jwt_settings.access_token_expire_minutes,
+    )
+    token_cache = VerifiedTokenCache(jwt_settings.secret_key, jwt_settings.algorithm)
+
+
+# Load configuration (see common/config.py)
+settings = load_config()
+load_settings(settings)
+# The listening address cannot change without a restart
+server_settings = ServerSettings(
+    name=get_setting(settings, "lab.arpspoofing.server.name", "SERVER_NAME"),
+    port=get_setting(settings, "lab.arpspoofing.server.port", "SERVER_PORT"),
+)
+# Polls config.yaml every CONFIG_RELOAD_SECONDS (0 = never)
+config_watcher = ConfigWatcher(load_settings)
+# Token signing and verification run here instead of on the event loop
+crypto = get_executor()
 
 app = FastAPI(title="Authentication Service")
+install_metrics(app, "arp")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
+@app.on_event("startup")
+def start_background_work():
+    config_watcher.start()
+
+
+@app.on_event("shutdown")
+def stop_background_work():
+    # The executor is shared with every lab in the process (see the gateway);
+    # only whoever owns the process shuts it down
+    config_watcher.stop()
+
+
 class Token(BaseModel):
     access_token: str
     token_type: str
 
 
+@timed("create_access_token")
 def create_access_token(data: dict):
-    to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(
-        minutes=jwt_settings.access_token_expire_minutes
-    )
-    to_encode.update(
-        {
-            "exp": expire,
-            "flag": encoded_flag,  # Using base64 encoded flag
-            "hint": "encoded != encrypted",
-        }
-    )
-    return jwt.encode(
-        to_encode, jwt_settings.secret_key, algorithm=jwt_settings.algorithm
-    )
+    # Adds "exp" plus the static flag/hint claims and signs with HMAC
+    return token_signer.sign(data)
 
 
 @app.post("/token")
@@ -88,7 +118,8 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
         form_data.username == auth_settings.username
         and form_data.password == auth_settings.password
     ):
-        access_token = create_access_token(data={"sub": form_data.username})
+        # HMAC releases the GIL, so signing runs in the thread pool, not a process
+        access_token = await crypto.run_thread(create_access_token, data={"sub": form_data.username})
         return Token(access_token=access_token, token_type="bearer")
     raise HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -100,7 +131,10 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
 @app.get("/protected")
 async def protected_route(token: str = Depends(oauth2_scheme)):
     try:
-        jwt.decode(token, jwt_settings.secret_key, algorithms=[jwt_settings.algorithm])
+        # Hits and misses alike go to the thread pool: a thread hop needs no
+        # pickling, unlike a process hop
+        with span("jwt.decode"):
+            await crypto.run_thread(token_cache.decode, token)
         return {"message": "You have access to protected resource"}
     except JWTError:
         raise HTTPException(
@@ -108,7 +142,15 @@ async def protected_route(token: str = Depends(oauth2_scheme)):
         )
 
 
+@app.get("/crypto/stats")
+def crypto_stats():
+    return {**crypto.stats(), "token_cache": token_cache.stats()}
+
+
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=server_settings.port)
\ No newline at end of file
+    try:
+        uvicorn.run(app, host="0.0.0.0", port=server_settings.port)
+    finally:
+        crypto.shutdown()
\ No newline at end of file
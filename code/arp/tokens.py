@@ -0,0 +1,107 @@
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from jose import jwt
+
+DIGESTS = {
+    "HS256": hashlib.sha256,
+    "HS384": hashlib.sha384,
+    "HS512": hashlib.sha512,
+}
+
+# Maximum number of verified tokens remembered by VerifiedTokenCache
+MAX_CACHED_TOKENS = 10_000
+
+
+def b64url(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+class TokenSigner:
+    """Issue HMAC-signed JWTs from a pre-encoded header and claims template.
+
+    The header and the static claims are serialized once; issuing a token
+    only serializes the per-user claims and runs one HMAC, starting from a
+    copy of an HMAC object that already holds the keyed state.
+    """
+
+    def __init__(self, secret_key: str, algorithm: str, static_claims: dict, expire_minutes: int):
+        if algorithm not in DIGESTS:
+            raise ValueError(f"Unsupported algorithm: {algorithm}")
+        self.expire_seconds = expire_minutes * 60
+
+        header = json.dumps({"alg": algorithm, "typ": "JWT"}, separators=(",", ":"), sort_keys=True)
+        self._header = b64url(header.encode()) + b"."
+        # Static claims are appended to the per-user ones as a JSON object tail
+        static = json.dumps(static_claims, separators=(",", ":"))
+        self._static_tail = ("," + static[1:]) if static_claims else "}"
+        self._hmac = hmac.new(secret_key.encode(), digestmod=DIGESTS[algorithm])
+
+    def sign(self, claims: dict) -> str:
+        claims = {**claims, "exp": int(time.time()) + self.expire_seconds}
+        payload = json.dumps(claims, separators=(",", ":"))[:-1] + self._static_tail
+        signing_input = self._header + b64url(payload.encode())
+
+        mac = self._hmac.copy()
+        mac.update(signing_input)
+        return (signing_input + b"." + b64url(mac.digest())).decode("ascii")
+
+
+class VerifiedTokenCache:
+    """Remember tokens that passed full verification until they expire.
+
+    Tokens are keyed by their SHA-256 digest, so the cache never holds the
+    tokens themselves. Misses go through `jwt.decode`.
+    """
+
+    def __init__(self, secret_key: str, algorithm: str, max_entries: int = MAX_CACHED_TOKENS):
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def decode(self, token: str) -> dict:
+        """Return the token's claims, raising JWTError if it is invalid or expired."""
+        key, claims = self._lookup(token)
+        if claims is None:
+            claims = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+            self._remember(key, claims)
+        return claims
+
+    def _lookup(self, token: str) -> tuple:
+        key = hashlib.sha256(token.encode()).digest()
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, claims = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return key, claims
+                del self._entries[key]
+            self.misses += 1
+        return key, None
+
+    def _remember(self, key: bytes, claims: dict) -> None:
+        expires_at = claims.get("exp")
+        if not isinstance(expires_at, (int, float)):
+            # Without an expiry there is no safe TTL; verify every time
+            return
+
+        with self._lock:
+            self._entries[key] = (expires_at, claims)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
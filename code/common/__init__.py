@@ -0,0 +1 @@
+"""Helpers shared by the lab servers (put `code/` on PYTHONPATH to import)."""
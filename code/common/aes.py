@@ -0,0 +1,118 @@
+"""AES encryption with key schedules built once per key instead of per call.
+
+`cryptography` runs the key schedule whenever an encryptor is created, which
+costs more than encrypting a few blocks. Here every thread keeps, per key,
+an ECB and a CBC encryptor that are never finalized, plus reusable padding
+and output buffers filled with `update_into`.
+
+ECB needs no state between calls. A long-lived CBC context chains each
+message onto the last ciphertext block, which would make the next IV
+predictable; instead every message is preceded by a random block, and that
+block's ciphertext (unpredictable without the key) is the message's IV.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+BLOCK_SIZE = 16
+
+# Keys with cached contexts, per thread (least recently used are dropped)
+MAX_KEYS = 256
+
+# Larger messages are encrypted without the thread's buffers, so they do not
+# stay allocated after one big request
+MAX_BUFFERED = 64 * 1024
+
+_local = threading.local()
+
+_PADDING = [bytes([n]) * n for n in range(BLOCK_SIZE + 1)]
+
+
+def pkcs7_pad_into(buffer: bytearray, data: bytes) -> int:
+    """PKCS7-pad data into the start of buffer; returns the padded length."""
+    length = len(data)
+    pad_length = BLOCK_SIZE - length % BLOCK_SIZE
+    buffer[:length] = data
+    buffer[length:length + pad_length] = _PADDING[pad_length]
+    return length + pad_length
+
+
+def pkcs7_pad(data: bytes) -> bytes:
+    """PKCS7-pad data to the AES block size (same output as padding.PKCS7(128))."""
+    return data + _PADDING[BLOCK_SIZE - len(data) % BLOCK_SIZE]
+
+
+class _Contexts:
+    __slots__ = ("ecb", "cbc")
+
+    def __init__(self, key: bytes):
+        self.ecb = Cipher(algorithms.AES(key), modes.ECB()).encryptor()
+        self.cbc = Cipher(algorithms.AES(key), modes.CBC(os.urandom(BLOCK_SIZE))).encryptor()
+
+
+def _contexts(key: bytes) -> _Contexts:
+    cache = getattr(_local, "contexts", None)
+    if cache is None:
+        cache = _local.contexts = OrderedDict()
+    contexts = cache.get(key)
+    if contexts is None:
+        contexts = cache[key] = _Contexts(key)
+        if len(cache) > MAX_KEYS:
+            cache.popitem(last=False)
+    else:
+        cache.move_to_end(key)
+    return contexts
+
+
+def _buffers(size: int) -> tuple[bytearray, bytearray]:
+    """This thread's input and output buffers, grown to hold size bytes."""
+    buffers = getattr(_local, "buffers", None)
+    if buffers is None or len(buffers[0]) < size:
+        capacity = max(size, 4 * 1024)
+        # update_into wants room for one block more than the input
+        buffers = _local.buffers = (bytearray(capacity), bytearray(capacity + BLOCK_SIZE))
+    return buffers
+
+
+def _encrypt(context, data: bytes, prefix: bytes, pad: bool) -> bytes:
+    """context.update(prefix || data [|| padding]) through the reusable buffers."""
+    if pad:
+        size = len(prefix) + len(data) + BLOCK_SIZE - len(data) % BLOCK_SIZE
+    else:
+        if len(data) % BLOCK_SIZE:
+            raise ValueError("Data must be a multiple of the block size when pad=False")
+        size = len(prefix) + len(data)
+    if size > MAX_BUFFERED:
+        return context.update(prefix + (pkcs7_pad(data) if pad else data))
+
+    source, output = _buffers(size)
+    source[:len(prefix)] = prefix
+    if pad:
+        pkcs7_pad_into(memoryview(source)[len(prefix):], data)
+    else:
+        source[len(prefix):size] = data
+    written = context.update_into(memoryview(source)[:size], output)
+    return bytes(output[:written])
+
+
+def ecb_encrypt(key: bytes, data: bytes, pad: bool = True) -> bytes:
+    """AES-ECB of data, PKCS7-padded unless pad=False (then block-aligned)."""
+    return _encrypt(_contexts(key).ecb, data, b"", pad)
+
+
+def cbc_encrypt(key: bytes, data: bytes, pad: bool = True) -> tuple[bytes, bytes]:
+    """AES-CBC of data under a fresh unpredictable IV; returns (iv, ciphertext)."""
+    out = _encrypt(_contexts(key).cbc, data, os.urandom(BLOCK_SIZE), pad)
+    return out[:BLOCK_SIZE], out[BLOCK_SIZE:]
+
+
+def ctr_encrypt(key: bytes, data: bytes) -> tuple[bytes, bytes]:
+    """AES-CTR of data under a fresh random nonce; returns (nonce, ciphertext).
+
+    A CTR context cannot be moved to a new nonce, so this one is built per call.
+    """
+    nonce = os.urandom(BLOCK_SIZE)
+    encryptor = Cipher(algorithms.AES(key), modes.CTR(nonce)).encryptor()
+    return nonce, encryptor.update(data) + encryptor.finalize()
@@ -0,0 +1,69 @@
+"""Benchmark: per-call AES setup vs. the reusable contexts of aes.py.
+
+"per call" is what the servers did before: a new padder and encryptor (and
+for CBC a new Cipher) for every message. Messages are random, 16 bytes to
+4 KiB, under one fixed key.
+
+Usage: python bench_aes.py [--seconds 1.0] [--sizes 16 64 256 1024 4096]
+"""
+import argparse
+import os
+import time
+
+from cryptography.hazmat.primitives import padding
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+from common import aes
+
+KEY = os.urandom(32)
+ECB_CIPHER = Cipher(algorithms.AES(KEY), modes.ECB())
+
+
+def ecb_per_call(data: bytes) -> bytes:
+    padder = padding.PKCS7(128).padder()
+    padded = padder.update(data) + padder.finalize()
+    encryptor = ECB_CIPHER.encryptor()
+    return encryptor.update(padded) + encryptor.finalize()
+
+
+def cbc_per_call(data: bytes) -> tuple[bytes, bytes]:
+    padder = padding.PKCS7(128).padder()
+    padded = padder.update(data) + padder.finalize()
+    iv = os.urandom(16)
+    encryptor = Cipher(algorithms.AES(KEY), modes.CBC(iv)).encryptor()
+    return iv, encryptor.update(padded) + encryptor.finalize()
+
+
+def rate(func, data: bytes, seconds: float) -> float:
+    """Calls per second of func(data) over roughly `seconds` seconds."""
+    calls = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            func(data)
+        calls += 100
+    return calls / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=1.0, help="time per measurement")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16, 64, 256, 1024, 4096])
+    args = parser.parse_args()
+
+    runs = [
+        ("ECB", ecb_per_call, lambda data: aes.ecb_encrypt(KEY, data)),
+        ("CBC", cbc_per_call, lambda data: aes.cbc_encrypt(KEY, data)),
+    ]
+    print(f"{'mode':>4} {'bytes':>6} {'per call/s':>12} {'aes.py/s':>12} {'speedup':>8}")
+    for mode, per_call, reused in runs:
+        for size in args.sizes:
+            data = os.urandom(size)
+            before = rate(per_call, data, args.seconds)
+            after = rate(reused, data, args.seconds)
+            print(f"{mode:>4} {size:>6} {before:>12,.0f} {after:>12,.0f} {after / before:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark: request throughput of the ECB and Vernam labs with and without metrics.
+
+Each measurement runs in a fresh interpreter with METRICS=0 or METRICS=1
+(the setting is read at import), alternating between the two, and drives
+the apps in-process through ASGI as bench_negotiation.py does. The median
+of the rounds is compared.
+
+Usage: python bench_metrics.py --config path/to/config.yaml [--rounds 5] [--seconds 2]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+CODE_DIR = Path(__file__).resolve().parent.parent
+
+# (label, lab, method, path, JSON body)
+ENDPOINTS = [
+    ("ecb /", "ecb", "POST", "/", {"plaintext": "A" * 16}),
+    ("ecb /challenge", "ecb", "POST", "/challenge", {"index": 0, "length": 8}),
+    ("vernam /", "vernam", "POST", "/", {"plaintext": "41" * 16}),
+    ("vernam /challenge", "vernam", "GET", "/challenge", None),
+]
+
+
+async def measure(seconds: float) -> dict:
+    from common.bench_negotiation import load_app, rate
+
+    apps = {lab: load_app(lab) for lab in {lab for _, lab, *_ in ENDPOINTS}}
+    results = {}
+    for label, lab, method, path, body in ENDPOINTS:
+        request = {"method": method, "url": path}
+        if body is not None:
+            request["json"] = body
+        results[label], _ = await rate(apps[lab], request, None, seconds)
+    return results
+
+
+def run_round(config: Path, enabled: bool, seconds: float) -> dict:
+    env = {**os.environ, "METRICS": "1" if enabled else "0", "PYTHONPATH": str(CODE_DIR)}
+    result = subprocess.run(
+        [sys.executable, __file__, "--config", str(config), "--measure", str(seconds)],
+        cwd=config.parent, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--config", required=True, help="config.yaml the labs are started with")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--seconds", type=float, default=2.0, help="time per endpoint and round")
+    parser.add_argument("--measure", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    config = Path(args.config).resolve()
+
+    if args.measure is not None:
+        print(json.dumps(asyncio.run(measure(args.measure))))
+        return
+
+    rounds = {False: [], True: []}
+    for _ in range(args.rounds):
+        for enabled in (False, True):
+            rounds[enabled].append(run_round(config, enabled, args.seconds))
+
+    print(f"{'endpoint':>18} {'off req/s':>10} {'on req/s':>10} {'overhead':>9}")
+    for label, *_ in ENDPOINTS:
+        off = statistics.median(r[label] for r in rounds[False])
+        on = statistics.median(r[label] for r in rounds[True])
+        print(f"{label:>18} {off:>10.0f} {on:>10.0f} {(off - on) / off * 100:>8.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Benchmark: JSON vs. binary responses of the ECB and Vernam encryption endpoints.
+
+Each lab app is called in-process as an ASGI app, so the figures are the
+server-side cost of handling a request (no network or HTTP parsing).
+Bytes are the response body as sent on the wire.
+
+Usage: python bench_negotiation.py --config path/to/config.yaml [--seconds 2]
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+from common.negotiation import MSGPACK, OCTET_STREAM, msgpack
+
+CODE_DIR = Path(__file__).resolve().parent.parent
+
+
+def load_app(lab: str):
+    lab_dir = str(CODE_DIR / lab)
+    sys.path.insert(0, lab_dir)
+    spec = importlib.util.spec_from_file_location(f"bench_{lab}_server", os.path.join(lab_dir, "server.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.app
+
+
+async def call(app, method: str, url: str, body: bytes, headers: list) -> tuple[int, bytes]:
+    """One request straight through the ASGI interface: (status, response body)."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+        "scheme": "http", "path": url, "raw_path": url.encode(), "query_string": b"",
+        "root_path": "", "headers": headers, "client": ("127.0.0.1", 1), "server": ("127.0.0.1", 80),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    status, chunks = 0, []
+
+    async def receive():
+        return messages.pop() if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        else:
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
+
+
+async def rate(app, request: dict, accept, seconds: float) -> tuple[float, int]:
+    """Requests per second and response body size for one request shape."""
+    body = json.dumps(request["json"]).encode() if "json" in request else b""
+    headers = [(b"content-type", b"application/json")]
+    if accept:
+        headers.append((b"accept", accept.encode()))
+    args = (app, request["method"], request["url"], body, headers)
+
+    status, response = await call(*args)
+    assert status == 200, response
+    calls = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        await call(*args)
+        calls += 1
+    return calls / (time.perf_counter() - started), len(response)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--config", required=True, help="config.yaml the labs are started with")
+    parser.add_argument("--seconds", type=float, default=2.0, help="time per measurement")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16, 1024, 65536], help="plaintext sizes")
+    args = parser.parse_args()
+    os.chdir(Path(args.config).resolve().parent)
+
+    accepts = [("json", None), ("octet", OCTET_STREAM)] + ([("msgpack", MSGPACK)] if msgpack else [])
+    # The ECB lab takes UTF-8 text, the Vernam lab hex
+    endpoints = [
+        ("ecb", "ecb", lambda n: {"method": "POST", "url": "/", "json": {"plaintext": "A" * n}}),
+        ("ecb /challenge", "ecb", lambda n: {"method": "POST", "url": "/challenge",
+                                             "json": {"index": 0, "length": 8}}),
+        ("vernam", "vernam", lambda n: {"method": "POST", "url": "/", "json": {"plaintext": "41" * n}}),
+        ("vernam /challenge", "vernam", lambda n: {"method": "GET", "url": "/challenge"}),
+    ]
+    apps = {lab: load_app(lab) for lab in {lab for _, lab, _ in endpoints}}
+
+    print(f"{'endpoint':>18} {'size':>7} {'format':>8} {'bytes':>8} {'req/s':>9} {'speedup':>8}")
+    for name, lab, build in endpoints:
+        sizes = args.sizes if "challenge" not in name else [0]
+        for size in sizes:
+            baseline = None
+            for label, accept in accepts:
+                rps, body = asyncio.run(rate(apps[lab], build(size), accept, args.seconds))
+                baseline = baseline or rps
+                print(f"{name:>18} {size or '-':>7} {label:>8} {body:>8} {rps:>9.0f} {rps / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Benchmark: config loading and cold import time of each service.
+
+Config loading is timed in-process for the old path (PyYAML SafeLoader +
+glom), the C loader, and a repeated load_config() served from the
+in-process cache. Each service module is then imported in a fresh
+interpreter; services whose imports are unavailable here are reported as
+such.
+
+Usage: python bench_startup.py --config path/to/config.yaml [--runs 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+CODE_DIR = Path(__file__).resolve().parent.parent
+
+# (label, lab directory, module) for every service that reads config.yaml
+SERVICES = [
+    ("ecb", "ecb", "server"),
+    ("vernam", "vernam", "server"),
+    ("arp server", "arp", "server"),
+    ("arp client", "arp", "client"),
+    ("low_entropy server", "low_entropy", "server"),
+    ("low_entropy client", "low_entropy", "client"),
+    ("secure_channel", "secure_channel", "server"),
+]
+
+IMPORT_TIMER = "import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+
+
+def time_config_loading(config: Path, runs: int) -> None:
+    import yaml
+    from glom import glom
+
+    from common import config as shared
+
+    def old_path():
+        with open(config) as f:
+            settings = yaml.load(f, Loader=yaml.SafeLoader)
+        glom(settings, "lab")
+
+    def c_loader():
+        shared._parse_yaml(str(config))
+
+    def cached():
+        shared.load_config(str(config))
+
+    shared.load_config(str(config))
+    print(f"{'config loading':>22} {'ms':>8}")
+    for name, fn in (("SafeLoader + glom", old_path), ("CSafeLoader", c_loader), ("cached", cached)):
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+        print(f"{name:>22} {statistics.median(samples) * 1000:>8.3f}")
+
+
+def time_import(config: Path, lab: str, module: str, runs: int):
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([str(CODE_DIR / lab), str(CODE_DIR)])}
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", IMPORT_TIMER.format(module=module)],
+            cwd=config.parent, env=env, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            return None, result.stderr.strip().splitlines()[-1]
+        samples.append(float(result.stdout.strip().splitlines()[-1]))
+    return statistics.median(samples), None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--config", required=True, help="config.yaml the services are started with")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    config = Path(args.config).resolve()
+
+    time_config_loading(config, args.runs * 20)
+
+    print(f"\n{'service import':>22} {'cold ms':>9}")
+    for label, lab, module in SERVICES:
+        cold, error = time_import(config, lab, module, args.runs)
+        if cold is None:
+            print(f"{label:>22}  unavailable: {error[:60]}")
+            continue
+        print(f"{label:>22} {cold * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
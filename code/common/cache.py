@@ -0,0 +1,77 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+# Rough per-entry bookkeeping cost (digest key, OrderedDict node, bytes header)
+ENTRY_OVERHEAD = 128
+
+
+def plaintext_digest(plaintext: bytes) -> bytes:
+    """Cache key for a plaintext: a 128-bit BLAKE2b digest."""
+    return hashlib.blake2b(plaintext, digest_size=16).digest()
+
+
+class CiphertextCache:
+    """Bounded LRU cache of ciphertexts keyed by a plaintext digest.
+
+    Only valid for deterministic encryption under a key that is fixed for the
+    lifetime of the process. The budget counts ciphertext bytes plus a fixed
+    per-entry overhead; a budget of 0 disables the cache.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[bytes, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, plaintext: bytes) -> Optional[bytes]:
+        key = plaintext_digest(plaintext)
+        with self._lock:
+            ciphertext = self._entries.get(key)
+            if ciphertext is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return ciphertext
+
+    def put(self, plaintext: bytes, ciphertext: bytes) -> None:
+        size = len(ciphertext) + ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+
+        key = plaintext_digest(plaintext)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= len(previous) + ENTRY_OVERHEAD
+
+            self._entries[key] = ciphertext
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted) + ENTRY_OVERHEAD
+                self.evictions += 1
+
+    def get_or_compute(self, plaintext: bytes, encrypt: Callable[[bytes], bytes]) -> bytes:
+        ciphertext = self.get(plaintext)
+        if ciphertext is None:
+            ciphertext = bytes(encrypt(plaintext))
+            self.put(plaintext, ciphertext)
+        return ciphertext
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,146 @@
+import contextvars
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = "config.yaml"
+
+# Parsed configs already loaded by this process, keyed by path
+_loaded: dict = {}
+_lock = threading.Lock()
+
+_REQUIRED = object()
+
+# Environment overrides of the lab being set up in this context, when one
+# process hosts several labs (see lab_environment)
+_lab_env: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("lab_env", default=None)
+
+
+def _fingerprint(path: str) -> tuple:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _parse_yaml(path: str) -> dict:
+    # PyYAML is only imported when a file actually has to be parsed
+    import yaml
+
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with open(path) as f:
+        return yaml.load(f, Loader=loader)
+
+
+def load_config(path: str = CONFIG_PATH) -> dict:
+    """Parsed config file, reparsed only when the file has changed.
+
+    The file's (mtime, size) fingerprint is checked against this process's
+    copy; only a changed file is parsed again, with the C loader when
+    libyaml is available.
+    """
+    fingerprint = _fingerprint(path)
+    with _lock:
+        cached = _loaded.get(path)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+
+        settings = _parse_yaml(path)
+        _loaded[path] = (fingerprint, settings)
+        return settings
+
+
+def resolve(settings: dict, path: str):
+    """Look up a dotted path such as "lab.vernam.server.port"."""
+    value = settings
+    for key in path.split("."):
+        try:
+            value = value[int(key) if isinstance(value, list) else key]
+        except (KeyError, IndexError, TypeError, ValueError):
+            raise KeyError(f"Setting {path!r} not found (missing {key!r})") from None
+    return value
+
+
+@contextmanager
+def lab_environment(prefix: str):
+    """Give one lab its own environment overrides in a multi-lab process.
+
+    Within the block, getenv and get_setting see <PREFIX>__<VAR> (e.g.
+    ECB__FLAG) as <VAR>. The overrides live in a context variable, not in
+    os.environ, so labs running side by side never see each other's; a
+    ConfigWatcher created in the block keeps them for its reloads.
+    """
+    prefix = f"{prefix}__"
+    overrides = {key[len(prefix):]: value for key, value in os.environ.items() if key.startswith(prefix)}
+    token = _lab_env.set(overrides)
+    try:
+        yield
+    finally:
+        _lab_env.reset(token)
+
+
+def getenv(name: str, default=None):
+    """os.environ.get, honouring the overrides of lab_environment."""
+    overrides = _lab_env.get()
+    if overrides is not None and name in overrides:
+        return overrides[name]
+    return os.environ.get(name, default)
+
+
+def get_setting(settings, path, env_var, default=_REQUIRED):
+    """Get setting from environment variable or fall back to config file (or default)."""
+    value = getenv(env_var)
+    if value is not None:
+        return value
+    try:
+        return resolve(settings, path)
+    except KeyError:
+        if default is _REQUIRED:
+            raise
+        return default
+
+
+class ConfigWatcher:
+    """Poll a config file and call back with the new settings when it changes.
+
+    Runs in a daemon thread of the process it is started in, so each uvicorn
+    worker picks up edits on its own without a restart. An interval of 0
+    (the CONFIG_RELOAD_SECONDS default) disables watching. The callback runs
+    in the context the watcher was created in (see lab_environment).
+    """
+
+    def __init__(self, callback: Callable[[dict], None], path: str = CONFIG_PATH,
+                 interval: Optional[float] = None):
+        self.callback = callback
+        self.path = path
+        self.interval = float(getenv("CONFIG_RELOAD_SECONDS", 0)) if interval is None else interval
+        self._context = contextvars.copy_context()
+        self.reloads = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._fingerprint = _fingerprint(self.path)
+        self._thread = threading.Thread(target=self._watch, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                fingerprint = _fingerprint(self.path)
+                if fingerprint == self._fingerprint:
+                    continue
+                self._fingerprint = fingerprint
+                self._context.run(self.callback, load_config(self.path))
+                self.reloads += 1
+                logger.info(f"Reloaded {self.path}")
+            except Exception as e:
+                # Keep serving with the previous settings (e.g. a half-written file)
+                logger.error(f"Config reload failed: {e}")
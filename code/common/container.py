@@ -0,0 +1,191 @@
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+# File layout (all integers little-endian):
+#   magic "CTFC" | version u16 | reserved u16
+#   one (offset u64, length u64) entry per field, in FIELDS order
+#   field data, with the ciphertext always last
+# Absent fields have length 0. n/e/p are stored as big-endian unsigned bytes.
+MAGIC = b"CTFC"
+VERSION = 1
+FIELDS = ("n", "e", "p", "wrapped_key", "iv", "ciphertext")
+HEADER = struct.Struct("<4sHH" + "QQ" * len(FIELDS))
+INT_FIELDS = ("n", "e", "p")
+
+
+class ContainerError(Exception):
+    """Raised for files that are not valid challenge containers."""
+
+
+def _int_bytes(value: Optional[int]) -> bytes:
+    if value is None:
+        return b""
+    return value.to_bytes((value.bit_length() + 7) // 8 or 1, "big")
+
+
+class ContainerWriter:
+    """Write a challenge container, streaming the ciphertext in chunks.
+
+    The small fields are written up front; the header is patched with the
+    final ciphertext length on close. Used as a context manager, a block
+    that raises removes the partial file instead of finalizing it.
+    """
+
+    def __init__(self, path: Union[str, Path], *, n: Optional[int] = None, e: Optional[int] = None,
+                 p: Optional[int] = None, wrapped_key: bytes = b"", iv: bytes = b""):
+        self.path = Path(path)
+        self._file = open(self.path, "wb")
+        self._entries = []
+
+        offset = HEADER.size
+        self._file.seek(offset)
+        for value in (_int_bytes(n), _int_bytes(e), _int_bytes(p), bytes(wrapped_key), bytes(iv)):
+            self._file.write(value)
+            self._entries.append((offset, len(value)))
+            offset += len(value)
+        self._ciphertext_offset = offset
+        self._ciphertext_length = 0
+
+    def write(self, chunk: bytes) -> None:
+        self._file.write(chunk)
+        self._ciphertext_length += len(chunk)
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        entries = self._entries + [(self._ciphertext_offset, self._ciphertext_length)]
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, VERSION, 0, *(v for entry in entries for v in entry)))
+        self._file.close()
+
+    def abort(self) -> None:
+        """Discard the file being written."""
+        self._file.close()
+        self.path.unlink(missing_ok=True)
+
+    def __enter__(self) -> "ContainerWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if exc[0] is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_container(path: Union[str, Path], ciphertext: Union[bytes, Iterable[bytes]], **fields) -> None:
+    """Write a complete container; `ciphertext` may be bytes or an iterable of chunks."""
+    with ContainerWriter(path, **fields) as writer:
+        if isinstance(ciphertext, (bytes, bytearray, memoryview)):
+            writer.write(ciphertext)
+        else:
+            for chunk in ciphertext:
+                writer.write(chunk)
+
+
+class ChallengeContainer:
+    """Read-only view of a challenge container backed by mmap.
+
+    Opening a file only reads the fixed header. The file is mapped on the
+    first field access, and byte fields are zero-copy memoryview slices of
+    the mapping, so a corpus of large files can be opened without reading
+    the ciphertexts or holding a descriptor per file. close() unmaps the
+    file, or leaves that to the last field view still in use.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._mmap: Optional[mmap.mmap] = None
+        self._view: Optional[memoryview] = None
+        with open(self.path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            header = f.read(HEADER.size)
+
+        if size == 0:
+            raise ContainerError(f"{self.path}: empty file")
+        if len(header) < HEADER.size:
+            raise ContainerError(f"{self.path}: truncated header")
+        magic, version, _, *entries = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ContainerError(f"{self.path}: not a challenge container")
+        if version != VERSION:
+            raise ContainerError(f"{self.path}: unsupported version {version}")
+
+        self._fields = {}
+        for name, offset, length in zip(FIELDS, entries[::2], entries[1::2]):
+            if offset + length > size:
+                raise ContainerError(f"{self.path}: field {name} out of bounds")
+            self._fields[name] = (offset, length)
+
+    def _mapped(self) -> memoryview:
+        if self._view is None:
+            with open(self.path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._view = memoryview(self._mmap)
+        return self._view
+
+    def field(self, name: str) -> memoryview:
+        offset, length = self._fields[name]
+        return self._mapped()[offset:offset + length]
+
+    def int_field(self, name: str) -> Optional[int]:
+        value = self.field(name)
+        return int.from_bytes(value, "big") if len(value) else None
+
+    @property
+    def n(self) -> Optional[int]:
+        return self.int_field("n")
+
+    @property
+    def e(self) -> Optional[int]:
+        return self.int_field("e")
+
+    @property
+    def p(self) -> Optional[int]:
+        return self.int_field("p")
+
+    @property
+    def wrapped_key(self) -> memoryview:
+        return self.field("wrapped_key")
+
+    @property
+    def iv(self) -> memoryview:
+        return self.field("iv")
+
+    @property
+    def ciphertext(self) -> memoryview:
+        return self.field("ciphertext")
+
+    def close(self) -> None:
+        if self._view is None:
+            return
+        try:
+            self._view.release()
+            self._mmap.close()
+        except BufferError:
+            # Field views are still in use; the mapping is unmapped once the
+            # last of them is garbage collected
+            pass
+        self._view = self._mmap = None
+
+    def __enter__(self) -> "ChallengeContainer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def open_corpus(paths: Iterable[Union[str, Path]]) -> list[ChallengeContainer]:
+    """Open many containers at once; only their headers are read."""
+    containers = []
+    try:
+        for path in paths:
+            containers.append(ChallengeContainer(path))
+    except BaseException:
+        for container in containers:
+            container.close()
+        raise
+    return containers
@@ -0,0 +1,145 @@
+"""Run blocking crypto off the event loop of the async lab servers.
+
+C-backed primitives (hashlib, hmac, `cryptography` ciphers) release the GIL
+on large inputs, so they go to a bounded thread pool that records queue
+depth and wait time. A thread hop costs tens of microseconds, so
+`cipher_update` runs small inputs inline. CRYPTO_OFFLOAD=0 runs everything
+inline, which is what arp/bench_offload.py compares against.
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Optional
+
+# Inputs below this many bytes are encrypted inline
+INLINE_MAX_BYTES = 64 * 1024
+
+
+def _timed(fn: Callable, *args, **kwargs):
+    # Runs in the worker: report when it started so the caller can tell queue
+    # wait from run time
+    started = time.monotonic()
+    return started, fn(*args, **kwargs)
+
+
+class PoolStats:
+    """Counters for one pool; all times in seconds."""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.max_queue_depth = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.run_total = 0.0
+        self.run_max = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        return self.submitted - self.completed - self.failed
+
+    @property
+    def queue_depth(self) -> int:
+        """Tasks submitted but not yet picked up by a worker."""
+        return max(0, self.in_flight - self.workers)
+
+    def on_submit(self) -> None:
+        with self._lock:
+            self.submitted += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+
+    def on_done(self, submitted_at: float, started_at: Optional[float]) -> None:
+        finished = time.monotonic()
+        with self._lock:
+            if started_at is None:
+                self.failed += 1
+                return
+            self.completed += 1
+            wait, run = started_at - submitted_at, finished - started_at
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            self.run_total += run
+            self.run_max = max(self.run_max, run)
+
+    def as_dict(self) -> dict:
+        done = self.completed or 1
+        return {
+            "workers": self.workers,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "wait_mean_ms": self.wait_total / done * 1000,
+            "wait_max_ms": self.wait_max * 1000,
+            "run_mean_ms": self.run_total / done * 1000,
+            "run_max_ms": self.run_max * 1000,
+        }
+
+
+class CryptoExecutor:
+    """A bounded thread pool for crypto that releases the GIL."""
+
+    def __init__(self, threads: Optional[int] = None, offload: Optional[bool] = None):
+        self.threads = threads or int(os.environ.get("CRYPTO_THREADS", 0)) or min(32, (os.cpu_count() or 1) + 4)
+        self.offload = os.environ.get("CRYPTO_OFFLOAD", "1") != "0" if offload is None else offload
+        self.thread_pool = ThreadPoolExecutor(self.threads, thread_name_prefix="crypto")
+        self.thread_stats = PoolStats(self.threads)
+
+    async def _submit(self, pool: Executor, stats: PoolStats, fn: Callable, *args, **kwargs):
+        submitted_at = time.monotonic()
+        stats.on_submit()
+        started_at = None
+        try:
+            loop = asyncio.get_running_loop()
+            started_at, result = await loop.run_in_executor(pool, partial(_timed, fn, *args, **kwargs))
+            return result
+        finally:
+            stats.on_done(submitted_at, started_at)
+
+    async def run_thread(self, fn: Callable, *args, **kwargs):
+        """fn(*args, **kwargs) in the thread pool (inline when offloading is off)."""
+        if not self.offload:
+            return fn(*args, **kwargs)
+        return await self._submit(self.thread_pool, self.thread_stats, fn, *args, **kwargs)
+
+    async def cipher_update(self, context, data: bytes) -> bytes:
+        """`context.update(data)` for a `cryptography` encryptor/decryptor context."""
+        if len(data) < INLINE_MAX_BYTES:
+            return context.update(data)
+        return await self.run_thread(context.update, data)
+
+    def stats(self) -> dict:
+        return {"offload": self.offload, "threads": self.thread_stats.as_dict()}
+
+    def shutdown(self) -> None:
+        self.thread_pool.shutdown(wait=False, cancel_futures=True)
+
+
+_executor: Optional[CryptoExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def configure(**kwargs) -> CryptoExecutor:
+    """Create the shared executor with non-default settings; must precede first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            raise RuntimeError("The crypto executor is already in use")
+        _executor = CryptoExecutor(**kwargs)
+        return _executor
+
+
+def get_executor() -> CryptoExecutor:
+    """The process-wide executor shared by every lab (and by the gateway)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = CryptoExecutor()
+        return _executor
@@ -0,0 +1,246 @@
+"""Request and hot-path timing for the lab servers, exposed as Prometheus text.
+
+`install_metrics(app, lab)` adds a middleware timing every request by route
+and a `/metrics` endpoint. `span(name)` (a context manager) and
+`timed(name)` (a decorator) time the crypto hot paths inside a request;
+what a request spends outside its spans is FastAPI itself (validation,
+serialization). All of it lands in fixed-bucket histograms shared by every
+lab in the process. METRICS=0 turns recording off.
+
+Set PROFILE_OUTPUT to a file path to also run a sampling profiler: every
+thread's stack is sampled each PROFILE_INTERVAL_SECONDS (default 0.005)
+and written as folded stacks (flamegraph.pl / speedscope input) on shutdown.
+"""
+import functools
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from typing import Callable, Optional
+
+from fastapi import Response
+
+ENABLED = os.environ.get("METRICS", "1") != "0"
+
+# Upper bounds in seconds: 10 us doubling up to ~10 s; slower lands in +Inf
+BUCKETS = tuple(1e-5 * 2**i for i in range(21))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense."""
+
+    __slots__ = ("counts", "sum", "_lock")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        index = bisect_left(BUCKETS, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += seconds
+
+    def render(self, name: str, labels: str) -> list[str]:
+        with self._lock:
+            counts, total = list(self.counts), self.sum
+        lines, cumulative = [], 0
+        for bound, count in zip(BUCKETS, counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound:.6g}"}} {cumulative}')
+        cumulative += counts[-1]
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {total:.9f}")
+        lines.append(f"{name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Histograms keyed by metric name and label values."""
+
+    def __init__(self):
+        self._histograms: dict[tuple, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        key = (name, *sorted(labels.items()))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram())
+        return histogram
+
+    def render(self) -> str:
+        # Another thread may register a histogram while this one renders
+        with self._lock:
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+        lines, typed = [], set()
+        for (name, *labels), histogram in histograms:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} histogram")
+            label_text = ",".join(f'{key}="{_escape(value)}"' for key, value in labels)
+            lines += histogram.render(name, label_text)
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = Registry()
+
+
+_span_histograms: dict[str, Histogram] = {}
+
+
+def _span_histogram(name: str) -> Histogram:
+    histogram = _span_histograms.get(name)
+    if histogram is None:
+        histogram = _span_histograms[name] = registry.histogram("lab_span_duration_seconds", span=name)
+    return histogram
+
+
+class span:
+    """Time a block into lab_span_duration_seconds{span=name}.
+
+    Usable as `with span("hkdf"):` in sync and async code. It holds the
+    start time, so create one per use rather than sharing it.
+    """
+
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, name: str):
+        self.histogram = _span_histogram(name) if ENABLED else None
+
+    def __enter__(self) -> "span":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self.histogram is not None:
+            self.histogram.observe(time.perf_counter() - self.started)
+
+
+def timed(name: str) -> Callable:
+    """Decorator recording every call of a sync function as span `name`."""
+    def decorate(fn: Callable) -> Callable:
+        if not ENABLED:
+            return fn
+        histogram = _span_histogram(name)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+        return wrapper
+    return decorate
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing each HTTP request by lab, method, route and status."""
+
+    def __init__(self, app, lab: str):
+        self.app = app
+        self.lab = lab
+        self._histograms: dict[tuple, Histogram] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        # A route set by an enclosing router (e.g. the gateway's mount) is not ours
+        outer_route = scope.get("route")
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            # The router stores the matched route in the scope; unmatched
+            # paths share one label so they cannot blow up the cardinality
+            route = scope.get("route")
+            key = (scope["method"], route.path if route is not outer_route else "unmatched", status)
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = registry.histogram(
+                    "lab_request_duration_seconds", lab=self.lab, method=key[0], route=key[1], status=status,
+                )
+            histogram.observe(elapsed)
+
+
+class SamplingProfiler:
+    """Sample every thread's stack at a fixed interval; dump folded stacks."""
+
+    def __init__(self, output: str, interval: float = 0.005):
+        self.output = output
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._sample, name="sampling-profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.dump()
+
+    def _sample(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+
+    def dump(self) -> None:
+        with open(self.output, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+_profiler: Optional[SamplingProfiler] = None
+
+
+def install_metrics(app, lab: str) -> None:
+    """Add request timing and GET /metrics to a lab's FastAPI app."""
+    global _profiler
+
+    if ENABLED:
+        app.add_middleware(MetricsMiddleware, lab=lab)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return Response(registry.render(), media_type=CONTENT_TYPE)
+
+    output = os.environ.get("PROFILE_OUTPUT")
+    if output and _profiler is None:
+        # One profiler per process, however many labs share it
+        _profiler = SamplingProfiler(output, float(os.environ.get("PROFILE_INTERVAL_SECONDS", 0.005)))
+        app.on_event("startup")(_profiler.start)
+        app.on_event("shutdown")(_profiler.stop)
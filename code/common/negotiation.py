@@ -0,0 +1,79 @@
+"""Content negotiation for the encryption endpoints.
+
+JSON (hex or base64 inside a pydantic model) stays the default. A client
+that asks for `Accept: application/octet-stream` gets the raw ciphertext
+bytes, and `Accept: application/msgpack` (when msgpack is installed) a map
+of the same fields as raw binary values.
+"""
+from typing import Optional
+
+from fastapi import Response
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional; only octet-stream is offered then
+    msgpack = None
+
+JSON = "application/json"
+OCTET_STREAM = "application/octet-stream"
+MSGPACK = "application/msgpack"
+
+# Binary media types this process can answer with
+OFFERED = (OCTET_STREAM, MSGPACK) if msgpack is not None else (OCTET_STREAM,)
+
+# OpenAPI description of the extra 200 response bodies
+BINARY_RESPONSES = {200: {"content": {media_type: {} for media_type in OFFERED}}}
+
+
+def _parse_accept(accept: str) -> dict:
+    """Media type -> quality for an Accept header."""
+    qualities = {}
+    for item in accept.split(","):
+        media_type, *params = item.split(";")
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[media_type.strip().lower()] = quality
+    return qualities
+
+
+def binary_media_type(accept: Optional[str]) -> Optional[str]:
+    """The binary media type to answer with, or None for the JSON default.
+
+    A binary type is only chosen when the client names it explicitly, with
+    a higher quality than it gives application/json and at least the
+    quality of any wildcard.
+    """
+    # Most requests send no Accept header or */*; skip the parsing for them
+    if not accept or "application/" not in accept:
+        return None
+    qualities = _parse_accept(accept)
+    json_quality = qualities.get(JSON, 0.0)
+    wildcard_quality = max(qualities.get("*/*", 0.0), qualities.get("application/*", 0.0))
+
+    best, best_quality = None, 0.0
+    for media_type in OFFERED:
+        quality = qualities.get(media_type, 0.0)
+        if quality > best_quality:
+            best, best_quality = media_type, quality
+    if best is None or best_quality <= json_quality or best_quality < wildcard_quality:
+        return None
+    return best
+
+
+def binary_response(media_type: str, **fields) -> Response:
+    """A response built directly from the cipher output buffers.
+
+    For octet-stream the fields are sent back to back in the given order
+    (e.g. iv then ciphertext); a single field is sent without being copied.
+    """
+    if media_type == MSGPACK:
+        return Response(msgpack.packb(fields), media_type=MSGPACK)
+    values = list(fields.values())
+    content = memoryview(values[0]) if len(values) == 1 else b"".join(values)
+    return Response(content, media_type=OCTET_STREAM)
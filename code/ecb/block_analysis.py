@@ -0,0 +1,326 @@
+"""Find repeated 16-byte blocks in ciphertexts, the tell-tale sign of ECB mode.
+
+Usage: python block_analysis.py FILE [--top 10] [--method hash|sort] [--chunk-mb 256]
+"""
+import argparse
+import heapq
+import mmap
+import os
+import tempfile
+import time
+from collections import Counter
+from typing import Optional
+
+try:
+    import numpy as np
+except ImportError:  # fall back to a dict counter over bytes slices
+    np = None
+
+BLOCK_SIZE = 16
+
+# Files larger than this are hash-partitioned to disk and counted partition by
+# partition, so memory use stays around a few times this size.
+CHUNK_BYTES = 256 * 2**20
+
+# Partition ids are 16-bit, so at most 2**16 partition files
+MAX_PARTITION_BITS = 16
+
+# Odd 64-bit multipliers for mixing the two halves of a block into one key
+_K1 = 0x9E3779B97F4A7C15
+_K2 = 0xC2B2AE3D27D4EB4F
+
+
+class BlockStats:
+    """Duplicate statistics for the full 16-byte blocks of a ciphertext."""
+    __slots__ = ("total_blocks", "distinct_blocks", "histogram", "top", "trailing_bytes")
+
+    def __init__(self, total_blocks: int, distinct_blocks: int, histogram: dict,
+                 top: list, trailing_bytes: int = 0):
+        self.total_blocks = total_blocks
+        self.distinct_blocks = distinct_blocks
+        # {occurrences: number of distinct blocks seen that many times}
+        self.histogram = histogram
+        # [(block, occurrences)] for the most repeated blocks, most frequent first
+        self.top = top
+        self.trailing_bytes = trailing_bytes
+
+    @property
+    def duplicate_blocks(self) -> int:
+        """Blocks that repeat an earlier block."""
+        return self.total_blocks - self.distinct_blocks
+
+    @property
+    def repetition_ratio(self) -> float:
+        return self.duplicate_blocks / self.total_blocks if self.total_blocks else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "total_blocks": self.total_blocks,
+            "distinct_blocks": self.distinct_blocks,
+            "duplicate_blocks": self.duplicate_blocks,
+            "repetition_ratio": self.repetition_ratio,
+            "histogram": self.histogram,
+            "top": [(block.hex(), count) for block, count in self.top],
+            "trailing_bytes": self.trailing_bytes,
+        }
+
+
+def count_blocks_dict(data) -> Counter:
+    """Naive reference implementation: a Counter over 16-byte slices."""
+    data = memoryview(data).cast("B")
+    return Counter(bytes(data[i:i + BLOCK_SIZE]) for i in range(0, len(data) - BLOCK_SIZE + 1, BLOCK_SIZE))
+
+
+def _stats_from_counter(counter: Counter, top: int, trailing_bytes: int = 0) -> BlockStats:
+    histogram = Counter(counter.values())
+    return BlockStats(
+        sum(counter.values()), len(counter), dict(sorted(histogram.items())),
+        counter.most_common(top), trailing_bytes
+    )
+
+
+def as_blocks(data) -> "np.ndarray":
+    """View the full blocks of `data` as an (n, 2) uint64 array, without copying."""
+    n = len(memoryview(data).cast("B")) // BLOCK_SIZE
+    return np.frombuffer(data, dtype=np.uint64, count=n * 2).reshape(n, 2)
+
+
+def _mix(blocks: "np.ndarray") -> "np.ndarray":
+    """64-bit hash of each 128-bit block."""
+    h = blocks[:, 0] * np.uint64(_K1)
+    h ^= blocks[:, 1] * np.uint64(_K2)
+    h ^= h >> np.uint64(31)
+    return h
+
+
+def _group_sorted(sorted_blocks: "np.ndarray", boundaries: "np.ndarray"):
+    """Unique rows and counts of a sorted block array, given its group-start mask."""
+    starts = np.flatnonzero(boundaries)
+    counts = np.diff(np.append(starts, len(sorted_blocks)))
+    return sorted_blocks[starts], counts
+
+
+def _unique_sort(blocks: "np.ndarray"):
+    """Exact grouping by sorting on both 64-bit halves."""
+    order = np.lexsort((blocks[:, 1], blocks[:, 0]))
+    s = blocks[order]
+    boundaries = np.empty(len(s), dtype=bool)
+    boundaries[:1] = True
+    np.any(s[1:] != s[:-1], axis=1, out=boundaries[1:])
+    return _group_sorted(s, boundaries)
+
+
+def _unique_hash(blocks: "np.ndarray"):
+    """Group by a 64-bit hash, falling back to the exact sort if two blocks collide."""
+    h = _mix(blocks)
+    order = np.argsort(h)
+    h = h[order]
+    s = blocks[order]
+    boundaries = np.empty(len(s), dtype=bool)
+    boundaries[:1] = True
+    np.not_equal(h[1:], h[:-1], out=boundaries[1:])
+
+    # Within a hash group, neighbouring rows must be identical blocks
+    if not np.all(boundaries[1:] | np.all(s[1:] == s[:-1], axis=1)):
+        return _unique_sort(blocks)
+    return _group_sorted(s, boundaries)
+
+
+def _count_sort(blocks: "np.ndarray", top: int):
+    unique, counts = _unique_sort(blocks)
+    return unique, counts, 0
+
+
+def _count_hash(blocks: "np.ndarray", top: int):
+    """Count blocks using a hash index.
+
+    Only the hashes are sorted. A block whose hash occurs once is unique, so
+    only blocks with a repeated hash (usually a small share) are gathered and
+    grouped exactly. Returns (unique, counts, singles): `singles` more blocks
+    occur exactly once but are not listed, apart from up to `top` examples.
+    """
+    h = _mix(blocks)
+    hs = np.sort(h)
+    boundaries = np.empty(len(hs), dtype=bool)
+    boundaries[:1] = True
+    np.not_equal(hs[1:], hs[:-1], out=boundaries[1:])
+    starts = np.flatnonzero(boundaries)
+    counts = np.diff(np.append(starts, len(hs)))
+
+    repeated = hs[starts[counts > 1]]
+    if len(repeated):
+        slot = np.minimum(np.searchsorted(repeated, h), len(repeated) - 1)
+        in_repeated = repeated[slot] == h
+        unique, counts = _unique_hash(blocks[in_repeated])
+        singles = len(blocks) - int(in_repeated.sum())
+        examples = blocks[~in_repeated][:top]
+    else:
+        unique, counts = blocks[:0], np.zeros(0, dtype=np.int64)
+        singles = len(blocks)
+        examples = blocks[:top]
+
+    unique = np.concatenate([unique, examples])
+    counts = np.concatenate([counts, np.ones(len(examples), dtype=counts.dtype)])
+    return unique, counts, singles - len(examples)
+
+
+COUNTERS = {"hash": _count_hash, "sort": _count_sort}
+
+
+def _sum_counts(blocks: "np.ndarray", counts: "np.ndarray"):
+    """Unique rows of `blocks` with the counts of equal rows added up."""
+    # Group by hash as _unique_hash does, sorting on both halves only on a collision
+    h = _mix(blocks)
+    order = np.argsort(h)
+    h = h[order]
+    s = blocks[order]
+    boundaries = np.empty(len(s), dtype=bool)
+    boundaries[:1] = True
+    np.not_equal(h[1:], h[:-1], out=boundaries[1:])
+    if not np.all(boundaries[1:] | np.all(s[1:] == s[:-1], axis=1)):
+        order = np.lexsort((blocks[:, 1], blocks[:, 0]))
+        s = blocks[order]
+        np.any(s[1:] != s[:-1], axis=1, out=boundaries[1:])
+    starts = np.flatnonzero(boundaries)
+    return s[starts], np.add.reduceat(counts[order], starts).astype(np.int64)
+
+
+def _stats_from_unique(unique, counts, top: int, trailing_bytes: int = 0, singles: int = 0) -> BlockStats:
+    values, frequency = np.unique(counts, return_counts=True)
+    histogram = {int(v): int(f) for v, f in zip(values, frequency)}
+    if singles:
+        histogram[1] = histogram.get(1, 0) + singles
+
+    k = min(top, len(counts))
+    if k:
+        best = np.argpartition(-counts, k - 1)[:k]
+        best = best[np.argsort(-counts[best], kind="stable")]
+        top_blocks = [(unique[i].tobytes(), int(counts[i])) for i in best]
+    else:
+        top_blocks = []
+    return BlockStats(
+        int(counts.sum()) + singles, len(counts) + singles,
+        dict(sorted(histogram.items())), top_blocks, trailing_bytes
+    )
+
+
+def analyze(data, top: int = 10, method: str = "hash") -> BlockStats:
+    """Block statistics of an in-memory ciphertext (bytes, bytearray, memoryview, mmap)."""
+    length = len(memoryview(data).cast("B"))
+    trailing = length % BLOCK_SIZE
+    if np is None:
+        return _stats_from_counter(count_blocks_dict(data), top, trailing)
+
+    blocks = as_blocks(data)
+    if not len(blocks):
+        return BlockStats(0, 0, {}, [], trailing)
+    unique, counts, singles = COUNTERS[method](blocks, top)
+    return _stats_from_unique(unique, counts, top, trailing, singles)
+
+
+def _merge(parts: list, top: int, trailing_bytes: int) -> BlockStats:
+    """Combine stats of disjoint partitions (no block appears in two of them)."""
+    histogram = Counter()
+    for part in parts:
+        histogram.update(part.histogram)
+    top_blocks = heapq.nlargest(top, (entry for part in parts for entry in part.top), key=lambda e: e[1])
+    return BlockStats(
+        sum(p.total_blocks for p in parts), sum(p.distinct_blocks for p in parts),
+        dict(sorted(histogram.items())), top_blocks, trailing_bytes
+    )
+
+
+def _analyze_partitioned(f, size: int, top: int, method: str, chunk_bytes: int, tmp_dir: Optional[str]) -> BlockStats:
+    if chunk_bytes < BLOCK_SIZE:
+        raise ValueError(f"chunk_bytes must be at least {BLOCK_SIZE}")
+    # Enough partitions that each one comfortably fits in a chunk (larger
+    # partitions beyond the cap are still counted correctly, just slower)
+    bits = min(max(1, (2 * size // chunk_bytes).bit_length()), MAX_PARTITION_BITS)
+    partitions = 1 << bits
+    shift = np.uint64(64 - bits)
+    buffer = bytearray(chunk_bytes - chunk_bytes % BLOCK_SIZE)
+    remaining = size - size % BLOCK_SIZE
+
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as tmp:
+        paths = [os.path.join(tmp, f"{i}.blocks") for i in range(partitions)]
+        while remaining:
+            read = f.readinto(memoryview(buffer)[:min(len(buffer), remaining)])
+            if not read:
+                break
+            remaining -= read
+            blocks = as_blocks(memoryview(buffer)[:read - read % BLOCK_SIZE])
+
+            # Spill each distinct block of the chunk once, as (block, count):
+            # a block repeated all over the file adds one record per chunk to
+            # its partition instead of every occurrence
+            # (with top=len(blocks) the counters list every block, singles included)
+            unique, counts, _ = COUNTERS[method](blocks, len(blocks))
+            records = np.empty((len(unique), 3), dtype=np.uint64)
+            records[:, :2] = unique
+            records[:, 2] = counts
+
+            partition = (_mix(unique) >> shift).astype(np.intp)
+            order = np.argsort(partition, kind="stable")
+            bounds = np.searchsorted(partition[order], np.arange(partitions + 1))
+            grouped = records[order]
+            # Appending per chunk keeps a single partition file open at a time
+            for i in np.flatnonzero(np.diff(bounds)):
+                with open(paths[i], "ab") as out:
+                    grouped[bounds[i]:bounds[i + 1]].tofile(out)
+
+        parts = []
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            records = np.fromfile(path, dtype=np.uint64).reshape(-1, 3)
+            os.remove(path)
+            unique, counts = _sum_counts(records[:, :2], records[:, 2])
+            parts.append(_stats_from_unique(unique, counts, top))
+    return _merge(parts, top, size % BLOCK_SIZE)
+
+
+def analyze_file(path: str, top: int = 10, method: str = "hash", chunk_bytes: int = CHUNK_BYTES,
+                 tmp_dir: Optional[str] = None) -> BlockStats:
+    """Block statistics of a file of any size.
+
+    Files up to `chunk_bytes` are memory-mapped and analyzed in place; larger
+    ones are streamed once into hash partitions under `tmp_dir` (default: the
+    system temp directory), which are then counted one at a time.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        if size == 0:
+            return BlockStats(0, 0, {}, [])
+        if np is None:
+            return analyze(f.read(), top, method)
+        if size <= chunk_bytes:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return analyze(mapped, top, method)
+        return _analyze_partitioned(f, size, top, method, chunk_bytes, tmp_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("file")
+    parser.add_argument("--top", type=int, default=10, help="number of most repeated blocks to list")
+    parser.add_argument("--method", choices=("hash", "sort"), default="hash")
+    parser.add_argument("--chunk-mb", type=int, default=CHUNK_BYTES // 2**20,
+                        help="files larger than this are partitioned to disk")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stats = analyze_file(args.file, args.top, args.method, args.chunk_mb * 2**20)
+    elapsed = time.perf_counter() - start
+
+    print(f"blocks:      {stats.total_blocks} ({stats.trailing_bytes} trailing bytes ignored)")
+    print(f"distinct:    {stats.distinct_blocks}")
+    print(f"duplicates:  {stats.duplicate_blocks} ({stats.repetition_ratio:.2%})")
+    print(f"histogram:   {stats.histogram}")
+    for block, count in stats.top:
+        print(f"  {block.hex()}  x{count}")
+    size_mb = os.path.getsize(args.file) / 2**20
+    print(f"scanned {size_mb:.1f} MiB in {elapsed:.2f}s ({size_mb / elapsed * 60 / 1024:.1f} GiB/min)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,80 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.requests import ClientDisconnect
 from pydantic import BaseModel, Field, validator
+from typing import List, Optional, Tuple
 from pydantic_settings import BaseSettings
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.primitives import padding
+import asyncio
 import os
-import yaml
-from glom import glom
+from common import aes
+from common.aes import pkcs7_pad
+from common.cache import CiphertextCache
+from common.config import ConfigWatcher, get_setting, load_config
+from common.crypto_executor import get_executor
+from common.metrics import install_metrics, timed
+from common.negotiation import BINARY_RESPONSES, binary_media_type, binary_response
 
 app = FastAPI(title="ECB Deterministic Lab")
+install_metrics(app, "ecb")
 
-def get_setting(settings, path, env_var):
-    """Get setting from environment variable or fall back to config file."""
-    return os.environ.get(env_var, glom(settings, path))
+class ServerSettings(BaseSettings):
+    port: int
+    flag: str
+    cache_max_bytes: int
 
-# Load configuration
-with open("config.yaml", "r") as f:
-    settings = yaml.safe_load(f)
 
-class ServerSettings(BaseSettings):
-    port: int = get_setting(settings, "lab.ecb_deterministic.server.port", "SERVER_PORT")
-    flag: str = get_setting(settings, "lab.ecb_deterministic.flag", "FLAG")
+def load_settings(settings: dict) -> None:
+    """Build the settings; called at import and again by the config watcher.
+
+    Only the flag takes effect on reload: the port and cache size are fixed
+    once the server is up.
+    """
+    global server_settings, FLAG_BYTES
+
+    server_settings = ServerSettings(
+        port=get_setting(settings, "lab.ecb_deterministic.server.port", "SERVER_PORT"),
+        flag=get_setting(settings, "lab.ecb_deterministic.flag", "FLAG"),
+        cache_max_bytes=get_setting(
+            settings, "lab.ecb_deterministic.cache.max_bytes", "CACHE_MAX_BYTES", default=16 * 1024 * 1024
+        ),
+    )
+    FLAG_BYTES = server_settings.flag.encode('utf-8')
+
+
+# Load configuration (see common/config.py)
+settings = load_config()
+load_settings(settings)
+# Polls config.yaml every CONFIG_RELOAD_SECONDS (0 = never)
+config_watcher = ConfigWatcher(load_settings)
+
 
+@app.on_event("startup")
+def start_config_watcher():
+    config_watcher.start()
 
-server_settings = ServerSettings()
+
+@app.on_event("shutdown")
+def stop_config_watcher():
+    config_watcher.stop()
+
+
+# Upper bound on the number of items accepted by the batch endpoints
+MAX_BATCH_SIZE = 4096
+# Ciphertext /stream holds for a client that is not reading the response yet
+STREAM_BUFFER_BYTES = 16 * 1024 * 1024
 
 # Generate a random 128-bit key at startup
 KEY = os.urandom(16)
 cipher = Cipher(algorithms.AES(KEY), modes.ECB())
 
+# The key is fixed for the process lifetime, so encryption is deterministic
+# and ciphertexts of repeated plaintexts can be served from a cache
+cache = CiphertextCache(server_settings.cache_max_bytes)
+# Large stream chunks are encrypted off the event loop
+crypto = get_executor()
+
 class Plaintext(BaseModel):
     plaintext: str = Field(description="ASCII/UTF-8 encoded plaintext")
 
@@ -60,22 +107,167 @@ class ChallengeRequest(BaseModel):
 class Ciphertext(BaseModel):
     ciphertext: str = Field(description="Hex-encoded ciphertext")
 
+class BatchPlaintext(BaseModel):
+    plaintexts: List[str] = Field(
+        max_length=MAX_BATCH_SIZE,
+        description="List of ASCII/UTF-8 encoded plaintexts"
+    )
+
+class BatchChallengeRequest(BaseModel):
+    queries: List[Tuple[int, int]] = Field(
+        max_length=MAX_BATCH_SIZE,
+        description="List of (index, length) pairs into the flag"
+    )
+
+class BatchResult(BaseModel):
+    ciphertext: Optional[str] = Field(default=None, description="Hex-encoded ciphertext")
+    error: Optional[str] = Field(default=None, description="Why this item was not encrypted")
+
+class BatchCiphertext(BaseModel):
+    results: List[BatchResult] = Field(description="One result per item, in request order")
+
+@timed("encrypt_data")
 def encrypt_data(data: bytes) -> bytes:
     """Helper function to handle padding and encryption"""
-    padder = padding.PKCS7(128).padder()
-    padded_data = padder.update(data)
-    padded_data += padder.finalize()
+    # Reuses this thread's encryptor for KEY (see common/aes.py)
+    return aes.ecb_encrypt(KEY, data)
+
+@timed("encrypt_batch")
+def encrypt_batch(items: List[Optional[bytes]]) -> List[Optional[bytes]]:
+    """Encrypt many items with a single encryptor; None items are skipped"""
+    # ECB encrypts each block independently, so all padded items can go through
+    # one encryptor call and be split back apart at block boundaries
+    padded_items = [pkcs7_pad(item) if item is not None else None for item in items]
+    ciphertext = memoryview(aes.ecb_encrypt(KEY, b"".join(p for p in padded_items if p is not None), pad=False))
+
+    results = []
+    offset = 0
+    for padded in padded_items:
+        if padded is None:
+            results.append(None)
+            continue
+        results.append(bytes(ciphertext[offset:offset + len(padded)]))
+        offset += len(padded)
+    return results
+
+def encrypt_batch_cached(items: List[Optional[bytes]]) -> List[Optional[bytes]]:
+    """Like encrypt_batch, but serve repeated plaintexts from the cache"""
+    ciphertexts = [cache.get(item) if item is not None else None for item in items]
+    misses = [i for i, item in enumerate(items) if item is not None and ciphertexts[i] is None]
+
+    for i, ciphertext in zip(misses, encrypt_batch([items[i] for i in misses])):
+        cache.put(items[i], ciphertext)
+        ciphertexts[i] = ciphertext
+    return ciphertexts
+
+def get_flag_portion(index: int, length: int) -> bytes:
+    """Extract the requested portion of the flag"""
+    if index < 0:
+        raise ValueError("Index must be non-negative")
+    if length <= 0:
+        raise ValueError("Length must be positive")
+
+    # A config reload may replace FLAG_BYTES while this request runs
+    flag_bytes = FLAG_BYTES
+    if index >= len(flag_bytes):
+        raise ValueError("Index out of range")
+
+    flag_portion = flag_bytes[index:index + length]
+    if not flag_portion:
+        raise ValueError("No data to encrypt (index/length out of bounds)")
+    return flag_portion
+
+def get_flag_ciphertext(index: int, length: int) -> bytes:
+    """Encrypt a flag portion, serving repeated slices from the cache"""
+    return cache.get_or_compute(get_flag_portion(index, length), encrypt_data)
+
+def batch_response(ciphertexts: List[Optional[bytes]], errors: dict) -> BatchCiphertext:
+    """Report ciphertexts for the valid items and per-item errors for the rest"""
+    return BatchCiphertext(results=[
+        BatchResult(error=errors[i]) if ciphertext is None else BatchResult(ciphertext=ciphertext.hex())
+        for i, ciphertext in enumerate(ciphertexts)
+    ])
 
+class DuplexStreamingResponse(StreamingResponse):
+    """StreamingResponse whose body is produced while the request body is still read.
+
+    StreamingResponse listens for the client disconnecting by calling
+    receive() alongside the body iterator, which steals request body
+    messages from it; here a disconnect surfaces through request.stream()
+    (see body_chunks).
+    """
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
+
+async def body_chunks(request: Request):
+    """request.stream(), ending early instead of raising if the client disconnects"""
+    try:
+        async for chunk in request.stream():
+            yield chunk
+    except (ClientDisconnect, OSError):
+        return
+
+async def encrypt_chunks(first_chunk: bytes, chunks):
+    """Encrypt a stream of chunks, padding only the tail of the last one"""
+    # The padder holds back at most one partial block and only pads on finalize
+    padder = padding.PKCS7(128).padder()
     encryptor = cipher.encryptor()
-    ciphertext = encryptor.update(padded_data)
-    ciphertext += encryptor.finalize()
-    return ciphertext
 
-@app.post("/", response_model=Ciphertext)
-def encrypt_plaintext(plaintext: Plaintext):
+    yield await crypto.cipher_update(encryptor, padder.update(first_chunk))
+    async for chunk in chunks:
+        if chunk:
+            yield await crypto.cipher_update(encryptor, padder.update(chunk))
+    yield encryptor.update(padder.finalize()) + encryptor.finalize()
+
+async def read_ahead(chunks, max_bytes: int):
+    """Pull from `chunks` ahead of the consumer, holding up to max_bytes of output.
+
+    While the response send is stalled on a client that is not reading, the
+    request body keeps being read until the buffer is full.
+    """
+    queue = asyncio.Queue()
+    room = asyncio.Condition()
+    buffered = 0
+    done = object()
+
+    async def produce():
+        nonlocal buffered
+        try:
+            async for chunk in chunks:
+                async with room:
+                    await room.wait_for(lambda: buffered < max_bytes)
+                    buffered += len(chunk)
+                queue.put_nowait(chunk)
+            queue.put_nowait(done)
+        except Exception as e:
+            queue.put_nowait(e)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while (item := await queue.get()) is not done:
+            if isinstance(item, Exception):
+                raise item
+            async with room:
+                buffered -= len(item)
+                room.notify()
+            yield item
+    finally:
+        producer.cancel()
+
+@app.post("/", response_model=Ciphertext, responses=BINARY_RESPONSES)
+def encrypt_plaintext(plaintext: Plaintext, accept: Optional[str] = Header(default=None)):
     try:
         plaintext_bytes = plaintext.plaintext.encode('utf-8')
-        ciphertext = encrypt_data(plaintext_bytes)
+        ciphertext = cache.get_or_compute(plaintext_bytes, encrypt_data)
+        media_type = binary_media_type(accept)
+        if media_type:
+            return binary_response(media_type, ciphertext=ciphertext)
         return Ciphertext(ciphertext=ciphertext.hex())
     except Exception as e:
         raise HTTPException(
@@ -83,19 +275,13 @@ def encrypt_plaintext(plaintext: Plaintext):
             detail=str(e)
         )
 
-@app.post("/challenge", response_model=Ciphertext)
-def encrypt_flag_portion(request: ChallengeRequest):
+@app.post("/challenge", response_model=Ciphertext, responses=BINARY_RESPONSES)
+def encrypt_flag_portion(request: ChallengeRequest, accept: Optional[str] = Header(default=None)):
     try:
-        flag_bytes = server_settings.flag.encode('utf-8')
-        if request.index >= len(flag_bytes):
-            raise ValueError("Index out of range")
-            
-        # Extract the requested portion of the flag
-        flag_portion = flag_bytes[request.index:request.index + request.length]
-        if not flag_portion:
-            raise ValueError("No data to encrypt (index/length out of bounds)")
-            
-        ciphertext = encrypt_data(flag_portion)
+        ciphertext = get_flag_ciphertext(request.index, request.length)
+        media_type = binary_media_type(accept)
+        if media_type:
+            return binary_response(media_type, ciphertext=ciphertext)
         return Ciphertext(ciphertext=ciphertext.hex())
     except Exception as e:
         raise HTTPException(
@@ -103,6 +289,61 @@ def encrypt_flag_portion(request: ChallengeRequest):
             detail=str(e)
         )
 
+@app.post("/batch", response_model=BatchCiphertext)
+def encrypt_plaintext_batch(batch: BatchPlaintext):
+    items, errors = [], {}
+    for i, plaintext in enumerate(batch.plaintexts):
+        try:
+            if not plaintext:
+                raise ValueError("Plaintext cannot be empty")
+            items.append(plaintext.encode('utf-8'))
+        except Exception as e:
+            items.append(None)
+            errors[i] = str(e)
+    return batch_response(encrypt_batch_cached(items), errors)
+
+@app.post("/challenge/batch", response_model=BatchCiphertext)
+def encrypt_flag_portion_batch(batch: BatchChallengeRequest):
+    items, errors = [], {}
+    for i, (index, length) in enumerate(batch.queries):
+        try:
+            items.append(get_flag_portion(index, length))
+        except Exception as e:
+            items.append(None)
+            errors[i] = str(e)
+    return batch_response(encrypt_batch_cached(items), errors)
+
+@app.post("/stream", response_class=DuplexStreamingResponse)
+async def encrypt_plaintext_stream(request: Request):
+    """Encrypt a raw application/octet-stream body and stream back binary ciphertext
+
+    The response starts while the body is still being uploaded. A client that
+    only reads the response after sending the whole body (e.g. httpx or
+    requests) works for bodies up to about STREAM_BUFFER_BYTES; past that
+    the server stops reading the body until the client reads, and both
+    sides stall until a timeout. Larger bodies need a client that reads the
+    response while it uploads.
+    """
+    chunks = body_chunks(request)
+    first_chunk = b""
+    async for first_chunk in chunks:
+        if first_chunk:
+            break
+    if not first_chunk:
+        raise HTTPException(
+            status_code=400,
+            detail="Plaintext cannot be empty"
+        )
+
+    return DuplexStreamingResponse(
+        read_ahead(encrypt_chunks(first_chunk, chunks), STREAM_BUFFER_BYTES),
+        media_type="application/octet-stream"
+    )
+
+@app.get("/cache/stats")
+def get_cache_stats():
+    return cache.stats()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=server_settings.port)
\ No newline at end of file
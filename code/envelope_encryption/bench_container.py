@@ -0,0 +1,80 @@
+"""Benchmark: loading a challenge corpus from challenge.txt vs. challenge.bin.
+
+Writes --files synthetic challenges of --size ciphertext bytes in both
+formats, then times parsing every text file against opening every binary
+container (and touching its fields).
+
+Usage: python bench_container.py [--files 200] [--size 1000000]
+"""
+import argparse
+import base64
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from common.container import open_corpus, write_container
+
+
+def write_text(path: Path, n: int, e: int, p: int, wrapped_key: bytes, iv: bytes, ciphertext: bytes) -> None:
+    # Same layout as envelope_encryption.write_challenge_files
+    with open(path, "w") as f:
+        f.write(f"n = {hex(n)}\ne = {hex(e)}\np = {hex(p)}  # One prime factor provided\n\n")
+        f.write(f"encrypted_aes_key = {base64.b64encode(wrapped_key).decode()}\n\n")
+        f.write(f"iv = {base64.b64encode(iv).decode()}\n\n")
+        f.write(f"ciphertext = {base64.b64encode(ciphertext).decode()}")
+
+
+def read_text(path: Path) -> dict:
+    fields = {}
+    with open(path) as f:
+        for line in f:
+            if " = " not in line:
+                continue
+            name, value = line.split(" = ", 1)
+            value = value.split("#", 1)[0].strip()
+            fields[name] = int(value, 16) if name in ("n", "e", "p") else base64.b64decode(value)
+    return fields
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--size", type=int, default=1_000_000, help="ciphertext bytes per challenge")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        ciphertext = os.urandom(args.size)
+        for i in range(args.files):
+            fields = dict(
+                n=int.from_bytes(os.urandom(256), "big"), e=65537, p=int.from_bytes(os.urandom(128), "big"),
+                wrapped_key=os.urandom(256), iv=os.urandom(16)
+            )
+            write_text(tmp / f"{i}.txt", ciphertext=ciphertext, **fields)
+            write_container(tmp / f"{i}.bin", ciphertext, **fields)
+
+        start = time.perf_counter()
+        total = sum(len(read_text(tmp / f"{i}.txt")["ciphertext"]) for i in range(args.files))
+        text_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        corpus = open_corpus(tmp / f"{i}.bin" for i in range(args.files))
+        binary_total = 0
+        for container in corpus:
+            # Unmap as we go so the corpus never holds a descriptor per file
+            binary_total += len(container.ciphertext)
+            container.close()
+        assert binary_total == total
+        binary_seconds = time.perf_counter() - start
+
+        text_bytes = sum((tmp / f"{i}.txt").stat().st_size for i in range(args.files))
+        binary_bytes = sum((tmp / f"{i}.bin").stat().st_size for i in range(args.files))
+
+    print(f"{'format':>8} {'size MB':>9} {'load s':>9} {'files/s':>10}")
+    print(f"{'text':>8} {text_bytes / 1e6:>9.1f} {text_seconds:>9.3f} {args.files / text_seconds:>10.0f}")
+    print(f"{'binary':>8} {binary_bytes / 1e6:>9.1f} {binary_seconds:>9.3f} {args.files / binary_seconds:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import argparse
+import base64
+import io
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+
+import yaml
+from cryptography.hazmat.primitives import serialization, hashes
+from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+from common.container import ContainerWriter
+from envelope_encryption import create_realistic_document, generate_rsa_keypair, write_challenge_header
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Plaintext read per AES-CTR update
+CHUNK_SIZE = 3 * 2**18
+
+
+def encrypt_chunks(sources: list[BinaryIO], aes_key: bytes, iv: bytes,
+                   chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """AES-CTR encrypt `sources` back to back, yielding one ciphertext chunk per read."""
+    encryptor = Cipher(algorithms.AES(aes_key), modes.CTR(iv)).encryptor()
+    for source in sources:
+        while chunk := source.read(chunk_size):
+            yield encryptor.update(chunk)
+    yield encryptor.finalize()
+
+
+class Base64Writer:
+    """Base64-encode a byte stream into a text file, carrying leftover bytes between chunks."""
+
+    def __init__(self, destination):
+        self.destination = destination
+        self._pending = b""
+
+    def write(self, chunk: bytes) -> None:
+        data = self._pending + chunk
+        usable = len(data) - len(data) % 3
+        self.destination.write(base64.b64encode(data[:usable]).decode())
+        self._pending = data[usable:]
+
+    def close(self) -> None:
+        self.destination.write(base64.b64encode(self._pending).decode())
+        self._pending = b""
+
+
+def provision_user(user: dict, home_root: str, key_pem: Optional[bytes] = None,
+                   document_path: Optional[str] = None, challenge_format: str = "text",
+                   chunk_size: int = CHUNK_SIZE) -> int:
+    """Write one student's challenge files; runs inside a worker process.
+
+    The RSA keypair is generated here unless a shared `key_pem` is given.
+    With `document_path`, that file is encrypted in front of the flag
+    document. The ciphertext is produced once and streamed to challenge.bin
+    and/or challenge.txt. Returns the number of plaintext bytes encrypted.
+    """
+    if key_pem is not None:
+        private_key = serialization.load_pem_private_key(key_pem, password=None)
+    else:
+        private_key, _ = generate_rsa_keypair()
+
+    # Generate AES key and IV and wrap the key with RSA-OAEP
+    aes_key = os.urandom(32)  # AES-256
+    iv = os.urandom(16)
+    encrypted_aes_key = private_key.public_key().encrypt(
+        aes_key,
+        padding.OAEP(
+            mgf=padding.MGF1(algorithm=hashes.SHA256()),
+            algorithm=hashes.SHA256(),
+            label=None
+        )
+    )
+
+    challenge_dir = Path(home_root) / user["student_name"]
+    challenge_dir.mkdir(parents=True, exist_ok=True)
+    sources = [io.BytesIO(create_realistic_document(user["flag"]))]
+
+    with ExitStack() as stack:
+        if document_path:
+            sources.insert(0, stack.enter_context(open(document_path, "rb")))
+
+        sinks, text_file = [], None
+        if challenge_format in ("binary", "both"):
+            public_numbers = private_key.public_key().public_numbers()
+            sinks.append(stack.enter_context(ContainerWriter(
+                challenge_dir / "challenge.bin",
+                n=public_numbers.n, e=public_numbers.e, p=private_key.private_numbers().p,
+                wrapped_key=encrypted_aes_key, iv=iv
+            )))
+        if challenge_format in ("text", "both"):
+            # Written under a temporary name so a failure never leaves a
+            # truncated challenge.txt behind; the unlink runs after the close
+            partial_path = challenge_dir / "challenge.txt.partial"
+            stack.callback(partial_path.unlink, missing_ok=True)
+            text_file = stack.enter_context(open(partial_path, "w"))
+            write_challenge_header(text_file, private_key, encrypted_aes_key, iv)
+            sinks.append(Base64Writer(text_file))
+
+        total = 0
+        for chunk in encrypt_chunks(sources, aes_key, iv, chunk_size):
+            total += len(chunk)
+            for sink in sinks:
+                sink.write(chunk)
+        for sink in sinks:
+            sink.close()
+        if text_file is not None:
+            text_file.close()
+            os.replace(partial_path, challenge_dir / "challenge.txt")
+    return total
+
+
+def provision_all(users: list[dict], home_root: str, workers: Optional[int] = None,
+                  share_key: bool = False, document_path: Optional[str] = None,
+                  challenge_format: str = "text") -> dict:
+    """Provision every user across a process pool and return throughput figures."""
+    started = time.perf_counter()
+    key_pem = None
+    if share_key:
+        private_key, _ = generate_rsa_keypair()
+        key_pem = private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption()
+        )
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(provision_user, user, home_root, key_pem, document_path, challenge_format)
+            for user in users
+        ]
+        encrypted = 0
+        failed = 0
+        for user, future in zip(users, futures):
+            try:
+                encrypted += future.result()
+            except Exception as e:
+                failed += 1
+                logger.error(f"Failed to provision {user.get('student_name')}: {e}")
+
+    elapsed = time.perf_counter() - started
+    provisioned = len(users) - failed
+    return {
+        "users": provisioned,
+        "failed": failed,
+        "seconds": elapsed,
+        "users_per_second": provisioned / elapsed,
+        "mb_per_second": encrypted / 1e6 / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Provision envelope-encryption challenges for many students")
+    parser.add_argument("users", help="YAML list of {student_name, flag} entries")
+    parser.add_argument("--home-root", default="/home", help="directory containing the student homes")
+    parser.add_argument("--workers", type=int, default=None, help="defaults to one per core")
+    parser.add_argument("--document", default=None, help="large file to encrypt in front of the flag document")
+    parser.add_argument("--share-key", action="store_true",
+                        help="use one RSA keypair for everyone (load testing only: students could decrypt each other's files)")
+    parser.add_argument("--format", choices=("binary", "text", "both"), default="text",
+                        help="write challenge.bin, challenge.txt or both")
+    args = parser.parse_args()
+
+    with open(args.users) as f:
+        users = yaml.safe_load(f)
+
+    report = provision_all(users, args.home_root, args.workers, args.share_key, args.document, args.format)
+    logger.info(
+        f"Provisioned {report['users']} users ({report['failed']} failed) in {report['seconds']:.1f}s: "
+        f"{report['users_per_second']:.1f} users/s, {report['mb_per_second']:.1f} MB/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
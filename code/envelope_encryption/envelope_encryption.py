@@ -29,28 +29,48 @@ def encrypt_document(document: bytes, public_key: rsa.RSAPublicKey) -> Tuple[byt
 
     return encrypted_aes_key, iv, ciphertext
 
+def write_challenge_header(f, private_key: rsa.RSAPrivateKey, encrypted_aes_key: bytes, iv: bytes) -> None:
+    """Write everything in challenge.txt up to (and including) the "ciphertext = " label."""
+    # Extract RSA parameters
+    private_numbers = private_key.private_numbers()
+    public_numbers = private_key.public_key().public_numbers()
+
+    f.write(f"n = {hex(public_numbers.n)}\n")
+    f.write(f"e = {hex(public_numbers.e)}\n")
+    f.write(f"p = {hex(private_numbers.p)}  # One prime factor provided\n\n")
+    f.write("encrypted_aes_key = ")
+    f.write(base64.b64encode(encrypted_aes_key).decode())
+    f.write("\n\niv = ")
+    f.write(base64.b64encode(iv).decode())
+    f.write("\n\nciphertext = ")
+
 def write_challenge_files(private_key: rsa.RSAPrivateKey, encrypted_aes_key: bytes, 
                          iv: bytes, ciphertext: bytes, student_home: str) -> None:
     """Write challenge files."""
     challenge_dir = Path(student_home)
     challenge_dir.mkdir(exist_ok=True)
 
-    # Extract RSA parameters
-    private_numbers = private_key.private_numbers()
-    public_numbers = private_key.public_key().public_numbers()
-
     # Write challenge data
     with open(challenge_dir / "challenge.txt", "w") as f:
-        f.write(f"n = {hex(public_numbers.n)}\n")
-        f.write(f"e = {hex(public_numbers.e)}\n")
-        f.write(f"p = {hex(private_numbers.p)}  # One prime factor provided\n\n")
-        f.write("encrypted_aes_key = ")
-        f.write(base64.b64encode(encrypted_aes_key).decode())
-        f.write("\n\niv = ")
-        f.write(base64.b64encode(iv).decode())
-        f.write("\n\nciphertext = ")
+        write_challenge_header(f, private_key, encrypted_aes_key, iv)
         f.write(base64.b64encode(ciphertext).decode())
 
+def write_challenge_container(private_key: rsa.RSAPrivateKey, encrypted_aes_key: bytes,
+                              iv: bytes, ciphertext: bytes, student_home: str) -> None:
+    """Write the same challenge data as a binary container (challenge.bin)."""
+    # Only the binary format needs code/common, i.e. code/ on PYTHONPATH
+    from common.container import write_container
+
+    challenge_dir = Path(student_home)
+    challenge_dir.mkdir(exist_ok=True)
+
+    public_numbers = private_key.public_key().public_numbers()
+    write_container(
+        challenge_dir / "challenge.bin", ciphertext,
+        n=public_numbers.n, e=public_numbers.e, p=private_key.private_numbers().p,
+        wrapped_key=encrypted_aes_key, iv=iv
+    )
+
 ...
 
 def main():
@@ -64,8 +84,12 @@ def main():
         # Encrypt document
         encrypted_aes_key, iv, ciphertext = encrypt_document(document, public_key)
         
-        # Write challenge files
-        write_challenge_files(private_key, encrypted_aes_key, iv, ciphertext, student_home)
+        # Write challenge files: "text" (default), "binary" (challenge.bin) or "both"
+        challenge_format = config.get("challenge_format", "text")
+        if challenge_format in ("binary", "both"):
+            write_challenge_container(private_key, encrypted_aes_key, iv, ciphertext, student_home)
+        if challenge_format in ("text", "both"):
+            write_challenge_files(private_key, encrypted_aes_key, iv, ciphertext, student_home)
         
         
     except Exception as e:
@@ -0,0 +1,353 @@
+"""Serve every lab's FastAPI app from one process (or a few preforked ones).
+
+Each lab is mounted under /<lab>/ on the gateway port and, when its config
+section has a server.port, also answers at the root of that port, so
+existing clients keep working unchanged. A lab's server.py is imported on
+the first request that reaches it, so idle labs cost no memory.
+
+Labs share one process environment, so environment overrides are
+namespaced by lab: ECB__FLAG, VERNAM__SERVER_PORT, ARP__JWT_SECRET_KEY and
+so on. Through get_setting and getenv (common/config.py), a lab sees its own
+overrides under the bare name while it is imported and in its config
+reloads; os.environ itself is never changed. Bare per-lab variables such
+as FLAG would reach every lab and are refused.
+
+Usage:
+    python server.py --config path/to/config.yaml [--port 8080]
+    python server.py --config path/to/config.yaml --labs ecb vernam --no-lab-ports
+    python server.py --config path/to/config.yaml --labs arp vernam --workers 4
+"""
+import argparse
+import asyncio
+import importlib.util
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+import anyio.to_thread
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Mount, Route
+
+from common import crypto_executor
+from common.config import get_setting, lab_environment, load_config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CODE_DIR = Path(__file__).resolve().parent.parent
+
+# URL prefix / lab directory -> config section
+LABS = {
+    "arp": "arpspoofing",
+    "vernam": "vernam",
+    "ecb": "ecb_deterministic",
+    "low_entropy": "low_entropy",
+    "secure_channel": "secure_channel",
+}
+
+# Labs whose state is derived from config alone, so preforked workers answer
+# alike. The others keep per-process state (ecb: random key; low_entropy:
+# sessions and rate limits; secure_channel: handshake sessions).
+STATELESS_LABS = {"arp", "vernam"}
+
+# Settings several labs read under the same bare name; set <NAME>__<VAR> instead
+SHARED_LAB_VARS = ("FLAG", "SERVER_NAME", "SERVER_PORT", "CACHE_MAX_BYTES")
+
+
+def rss_kib() -> Optional[int]:
+    """Resident set size of this process (Linux only)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+class Lifespan:
+    """Drive an ASGI app's lifespan protocol by hand (mounted apps don't get one)."""
+
+    def __init__(self, app):
+        self.app = app
+        self.receive_queue: asyncio.Queue = asyncio.Queue()
+        self.send_queue: asyncio.Queue = asyncio.Queue()
+        self.task: Optional[asyncio.Task] = None
+
+    async def _call(self, event: str) -> None:
+        await self.receive_queue.put({"type": f"lifespan.{event}"})
+        message = await self.send_queue.get()
+        if message["type"] == f"lifespan.{event}.failed":
+            raise RuntimeError(message.get("message") or f"lifespan {event} failed")
+
+    async def startup(self) -> None:
+        scope = {"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}
+        self.task = asyncio.create_task(self.app(scope, self.receive_queue.get, self.send_queue.put))
+        await self._call("startup")
+
+    async def shutdown(self) -> None:
+        await self._call("shutdown")
+        await self.task
+
+
+class LazyLab:
+    """ASGI app that imports a lab's server.py and starts it on first use."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.app = None
+        self.lifespan: Optional[Lifespan] = None
+        self.load_seconds: Optional[float] = None
+        self.rss_added_kib: Optional[int] = None
+        self.error: Optional[str] = None
+        self._lock = asyncio.Lock()
+
+    # sys.path and sys.modules are process-wide; labs are imported one at a time
+    _import_lock = threading.Lock()
+
+    def _import(self):
+        lab_dir = CODE_DIR / self.name
+        # Labs import their sibling modules by bare name (sessions, tokens, ...).
+        # Their directory is on sys.path only while the lab is imported, and the
+        # siblings are then renamed lab_<name>_<module>, so two labs (or the
+        # gateway itself) never share a module that merely has the same name.
+        siblings = {path.stem for path in lab_dir.glob("*.py")}
+        module_name = f"lab_{self.name}_server"
+        with self._import_lock:
+            hidden = {name: sys.modules.pop(name) for name in siblings if name in sys.modules}
+            sys.path.insert(0, str(lab_dir))
+            try:
+                spec = importlib.util.spec_from_file_location(module_name, lab_dir / "server.py")
+                module = importlib.util.module_from_spec(spec)
+                sys.modules[module_name] = module
+                try:
+                    # get_setting and getenv see <NAME>__<VAR> as <VAR>
+                    with lab_environment(self.name.upper()):
+                        spec.loader.exec_module(module)
+                except BaseException:
+                    del sys.modules[module_name]
+                    raise
+            finally:
+                sys.path.remove(str(lab_dir))
+                for name in siblings:
+                    if name in sys.modules:
+                        sys.modules[f"lab_{self.name}_{name}"] = sys.modules.pop(name)
+                sys.modules.update(hidden)
+        return module.app
+
+    async def load(self):
+        async with self._lock:
+            if self.app is not None:
+                return self.app
+            started = time.perf_counter()
+            rss_before = rss_kib()
+            try:
+                # Module-level setup (keys, tables) can take a while; keep the loop serving
+                app = await asyncio.to_thread(self._import)
+                lifespan = Lifespan(app)
+                await lifespan.startup()
+            except Exception as e:
+                self.error = f"{type(e).__name__}: {e}"
+                logger.error(f"Could not load lab {self.name}: {self.error}")
+                return None
+            self.app, self.lifespan, self.error = app, lifespan, None
+            self.load_seconds = time.perf_counter() - started
+            if rss_before is not None:
+                self.rss_added_kib = rss_kib() - rss_before
+            logger.info(f"Loaded lab {self.name} in {self.load_seconds:.2f}s")
+            return app
+
+    async def shutdown(self) -> None:
+        if self.lifespan is not None:
+            await self.lifespan.shutdown()
+
+    async def __call__(self, scope, receive, send):
+        app = self.app or await self.load()
+        if app is None:
+            response = PlainTextResponse(f"Lab {self.name} is unavailable", status_code=503)
+            await response(scope, receive, send)
+            return
+        await app(scope, receive, send)
+
+
+class Gateway:
+    """Route requests to labs by URL prefix, or by the port they arrived on."""
+
+    def __init__(self, labs: list[str], lab_ports: dict[int, str], threads: int):
+        self.labs = {name: LazyLab(name) for name in labs}
+        self.lab_ports = lab_ports
+        self.threads = threads
+        self.started = time.time()
+        self.prefixed = Starlette(
+            routes=[Route("/_gateway", self.status)]
+            + [Mount(f"/{name}", app=lab) for name, lab in self.labs.items()]
+        )
+
+    async def status(self, request):
+        return JSONResponse({
+            "pid": os.getpid(),
+            "uptime": time.time() - self.started,
+            "rss_kib": rss_kib(),
+            "crypto": crypto_executor.get_executor().stats(),
+            "lab_ports": {str(port): name for port, name in self.lab_ports.items()},
+            "labs": {
+                name: {
+                    "loaded": lab.app is not None,
+                    "load_seconds": lab.load_seconds,
+                    "rss_added_kib": lab.rss_added_kib,
+                    "error": lab.error,
+                }
+                for name, lab in self.labs.items()
+            },
+        })
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                # One pool for every lab's sync endpoints, to_thread offloads and
+                # crypto executor calls (created here, after any fork)
+                anyio.to_thread.current_default_thread_limiter().total_tokens = self.threads
+                crypto = crypto_executor.configure(threads=self.threads)
+                asyncio.get_running_loop().set_default_executor(crypto.thread_pool)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                for lab in self.labs.values():
+                    try:
+                        await lab.shutdown()
+                    except Exception as e:
+                        logger.error(f"Shutting down lab {lab.name} failed: {e}")
+                crypto_executor.get_executor().shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        server = scope.get("server")
+        name = self.lab_ports.get(server[1]) if server else None
+        if name is not None:
+            await self.labs[name](scope, receive, send)
+        else:
+            await self.prefixed(scope, receive, send)
+
+
+def lab_ports_from_config(settings: dict, labs: list[str]) -> dict[int, str]:
+    ports = {}
+    for name in labs:
+        with lab_environment(name.upper()):
+            port = get_setting(settings, f"lab.{LABS[name]}.server.port", "SERVER_PORT", default=None)
+        if port is not None:
+            ports[int(port)] = name
+    return ports
+
+
+def bind(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def serve(app: Gateway, sockets: list[socket.socket]) -> None:
+    config = uvicorn.Config(app, lifespan="on", log_level="info")
+    asyncio.run(uvicorn.Server(config).serve(sockets=sockets))
+
+
+def prefork(app: Gateway, sockets: list[socket.socket], workers: int) -> None:
+    """Fork workers that all accept on the sockets bound here; labs load per worker.
+
+    Labs are not preloaded before forking: some start threads at import time
+    (e.g. key pools), and threads do not survive fork(). Each worker has its
+    own copy of every lab, so only STATELESS_LABS may be served this way.
+    """
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                serve(app, sockets)
+            finally:
+                os._exit(0)
+        children.append(pid)
+
+    def forward(signum, frame):
+        for child in children:
+            try:
+                os.kill(child, signum)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    for child in children:
+        while True:
+            try:
+                os.waitpid(child, 0)
+                break
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--config", default="config.yaml", help="the labs read config.yaml from its directory")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080, help="gateway port, labs under /<lab>/")
+    parser.add_argument("--labs", nargs="+", choices=sorted(LABS), default=list(LABS))
+    parser.add_argument("--no-lab-ports", action="store_true", help="only serve the prefixed gateway port")
+    parser.add_argument("--workers", type=int, default=1,
+                        help=f"preforked processes sharing the sockets (only for {', '.join(sorted(STATELESS_LABS))})")
+    parser.add_argument("--threads", type=int, default=min(32, (os.cpu_count() or 1) + 4),
+                        help="size of the shared pool for blocking crypto")
+    args = parser.parse_args()
+
+    stateful = sorted(set(args.labs) - STATELESS_LABS)
+    if args.workers > 1 and stateful:
+        # A client's requests would land on workers with different keys and sessions
+        parser.error(
+            f"--workers > 1 needs labs without per-process state; {', '.join(stateful)} keep "
+            f"keys or sessions in memory (serve them from a single-worker gateway with --labs)"
+        )
+
+    shared = [name for name in SHARED_LAB_VARS if name in os.environ]
+    if shared and len(args.labs) > 1:
+        parser.error(
+            f"{', '.join(shared)} would apply to every lab; set it per lab instead, "
+            f"e.g. {args.labs[0].upper()}__{shared[0]}"
+        )
+
+    config = Path(args.config).resolve()
+    os.chdir(config.parent)
+    settings = load_config(config.name)
+
+    lab_ports = {} if args.no_lab_ports else lab_ports_from_config(settings, args.labs)
+    lab_ports.pop(args.port, None)
+    sockets = [bind(args.host, port) for port in [args.port, *lab_ports]]
+    for port, name in lab_ports.items():
+        logger.info(f"Lab {name} on port {port}")
+    logger.info(f"Labs {', '.join(args.labs)} under http://{args.host}:{args.port}/<lab>/")
+
+    app = Gateway(args.labs, lab_ports, args.threads)
+    if args.workers > 1:
+        prefork(app, sockets, args.workers)
+    else:
+        serve(app, sockets)
+
+
+if __name__ == "__main__":
+    main()
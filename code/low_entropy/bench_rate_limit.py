@@ -0,0 +1,43 @@
+"""Microbenchmark the in-memory rate limiters for different numbers of client keys.
+
+Usage: python bench_rate_limit.py [--requests 1000000]
+"""
+import argparse
+import random
+import time
+
+from rate_limit import ALGORITHMS, MemoryRateLimiter
+
+KEY_COUNTS = [1, 10_000, 1_000_000]
+
+
+def run(algorithm_name: str, key_count: int, requests: int) -> tuple[float, dict]:
+    limiter = MemoryRateLimiter(ALGORITHMS[algorithm_name](limit=10, window=60))
+    keys = [f"10.0.{i >> 8 & 255}.{i & 255}:{i}" for i in range(key_count)]
+    sequence = [random.choice(keys) for _ in range(min(requests, 1_000_000))]
+
+    check = limiter.is_rate_limited
+    started = time.perf_counter()
+    done = 0
+    while done < requests:
+        for key in sequence[:requests - done]:
+            check(key)
+        done += min(len(sequence), requests - done)
+    elapsed = time.perf_counter() - started
+    return requests / elapsed, limiter.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"{'algorithm':>15} {'keys':>10} {'checks/s':>12} {'tracked keys':>13}")
+    for algorithm_name in ALGORITHMS:
+        for key_count in KEY_COUNTS:
+            rate, stats = run(algorithm_name, key_count, args.requests)
+            print(f"{algorithm_name:>15} {key_count:>10} {rate:>12,.0f} {stats['keys']:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Benchmark: naive session-ID brute force vs. batched raw-digest enumeration.
+
+The naive loop builds and base64-encodes every session ID and compares
+strings; the batched paths compare raw digests, in one process and then
+across the SessionIDEnumerator process pool. The target is the last value
+of the space, so every path scans all of it.
+
+Usage: python bench_session_enum.py [--entropy-bits 20] [--workers N]
+"""
+import argparse
+import time
+
+from session_enum import SessionIDEnumerator, hash_range
+from session_table import decode_session_id, encode_session_id, session_digest
+
+
+def naive(target: str, entropy_bits: int, salt: bytes):
+    for value in range(2**entropy_bits):
+        if encode_session_id(session_digest(value, entropy_bits, salt)) == target:
+            return value
+    return None
+
+
+def batched(target: str, entropy_bits: int, salt: bytes, batch_size: int = 1 << 16):
+    digest = decode_session_id(target)
+    for start in range(0, 2**entropy_bits, batch_size):
+        digests = hash_range(start, min(start + batch_size, 2**entropy_bits), entropy_bits, salt)
+        if digest in digests:
+            return start + digests.index(digest)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entropy-bits", type=int, default=20)
+    parser.add_argument("--student-name", default="student")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    salt = args.student_name.encode()
+    expected = 2**args.entropy_bits - 1
+    target = encode_session_id(session_digest(expected, args.entropy_bits, salt))
+    size = 2**args.entropy_bits
+
+    with SessionIDEnumerator(args.student_name, args.entropy_bits, args.workers) as enumerator:
+        enumerator.find([target])  # start the worker processes before timing
+        runs = [
+            ("naive", lambda: naive(target, args.entropy_bits, salt)),
+            ("batched (1 process)", lambda: batched(target, args.entropy_bits, salt)),
+            (f"pool ({enumerator.workers} workers)", lambda: enumerator.find([target]).get(target)),
+        ]
+
+        print(f"{'method':>22} {'seconds':>9} {'hashes/s':>12}")
+        for name, fn in runs:
+            start = time.perf_counter()
+            value = fn()
+            elapsed = time.perf_counter() - start
+            assert value == expected, (name, value)
+            print(f"{name:>22} {elapsed:>9.3f} {size / elapsed:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+import argparse
+import base64
+import json
+import logging
+import multiprocessing as mp
+import os
+import queue
+import time
+from pathlib import Path
+from typing import Optional
+
+from cryptography.hazmat.primitives import padding
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+
+from common.container import MAGIC, ChallengeContainer
+from x import KEY_LENGTH, SCRYPT_N, SCRYPT_P, SCRYPT_R
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BLOCK_SIZE = 16
+
+# How many candidates a worker tests between progress/checkpoint reports
+REPORT_EVERY = 16
+
+# How long the coordinator waits for a report before checking on the workers
+POLL_SECONDS = 5.0
+
+
+def read_challenge_file(path: str) -> tuple[bytes, bytes]:
+    """Read the (iv, ciphertext) pair from challenge.bin or the text export."""
+    with open(path, "rb") as f:
+        is_container = f.read(len(MAGIC)) == MAGIC
+    if is_container:
+        with ChallengeContainer(path) as container:
+            return bytes(container.iv), bytes(container.ciphertext)
+
+    with open(path) as f:
+        iv, ciphertext = (base64.b64decode(line) for line in f.read().split())
+    return iv, ciphertext
+
+
+def candidate_secret(value: int, entropy_bits: int) -> bytes:
+    """Encode a candidate the same way x.derive_key encodes the random value."""
+    return value.to_bytes((entropy_bits + 7) // 8, "big")
+
+
+def shard_ranges(entropy_bits: int, workers: int) -> list[tuple[int, int]]:
+    """Split [0, 2**entropy_bits) into `workers` contiguous ranges."""
+    space = 2**entropy_bits
+    step = -(-space // workers)
+    return [(start, min(start + step, space)) for start in range(0, space, step)]
+
+
+class Checkpoint:
+    """Per-shard resume positions, persisted as JSON and replaced atomically."""
+
+    def __init__(self, path: Optional[str], shards: list[tuple[int, int]]):
+        self.path = Path(path) if path else None
+        self.positions = [start for start, _ in shards]
+
+        if self.path and self.path.exists():
+            saved = json.loads(self.path.read_text())
+            if saved["shards"] != [list(shard) for shard in shards]:
+                raise ValueError("Checkpoint was written for a different key space or worker count")
+            self.positions = saved["positions"]
+            logger.info(f"Resuming from checkpoint {self.path}")
+
+        self.shards = shards
+
+    def update(self, shard: int, position: int) -> None:
+        self.positions[shard] = max(self.positions[shard], position)
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({
+            "shards": [list(shard) for shard in self.shards],
+            "positions": self.positions,
+        }))
+        os.replace(tmp, self.path)
+
+
+def search_shard(shard: int, start: int, end: int, args: dict, found, results) -> None:
+    """Worker: test candidates in [start, end) until the range is done or a hit is found."""
+    salt = args["student_name"].encode()
+    entropy_bits = args["entropy_bits"]
+    iv, first_block = args["iv"], args["first_block"]
+    prefix = args["known_prefix"]
+    mode = modes.CTR if args["algorithm"] == "aes-128-ctr" else modes.CBC
+
+    # Buffers reused for every candidate
+    plaintext = bytearray(BLOCK_SIZE + BLOCK_SIZE - 1)
+    view = memoryview(plaintext)
+
+    tested = 0
+    started = time.perf_counter()
+    for value in range(start, end):
+        if found.is_set():
+            break
+
+        key = Scrypt(
+            salt=salt, length=KEY_LENGTH, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P
+        ).derive(candidate_secret(value, entropy_bits))
+
+        # Decrypting the first block is enough to check the known prefix in
+        # both CTR and CBC mode
+        decryptor = Cipher(algorithms.AES(key), mode(iv)).decryptor()
+        written = decryptor.update_into(first_block, plaintext)
+        tested += 1
+
+        if view[:written].tobytes().startswith(prefix):
+            found.set()
+            results.put(("hit", shard, value, key))
+            break
+
+        if tested % REPORT_EVERY == 0:
+            results.put(("progress", shard, value + 1, tested, time.perf_counter() - started))
+    else:
+        value = end
+
+    results.put(("done", shard, value, tested, time.perf_counter() - started))
+
+
+def decrypt(key: bytes, iv: bytes, ciphertext: bytes, algorithm: str) -> bytes:
+    """Fully decrypt the challenge with a recovered key."""
+    if algorithm == "aes-128-ctr":
+        decryptor = Cipher(algorithms.AES(key), modes.CTR(iv)).decryptor()
+        return decryptor.update(ciphertext) + decryptor.finalize()
+
+    decryptor = Cipher(algorithms.AES(key), modes.CBC(iv)).decryptor()
+    padded = decryptor.update(ciphertext) + decryptor.finalize()
+    unpadder = padding.PKCS7(128).unpadder()
+    return unpadder.update(padded) + unpadder.finalize()
+
+
+def brute_force(iv: bytes, ciphertext: bytes, student_name: str, entropy_bits: int,
+                algorithm: str = "aes-128-cbc", known_prefix: bytes = b"crypto{",
+                workers: Optional[int] = None, checkpoint_path: Optional[str] = None) -> Optional[dict]:
+    """Search the whole key space with one process per core.
+
+    Returns a dict with the secret value, key and plaintext on success, or
+    None if the space is exhausted. Throughput per core is logged as the
+    search runs.
+    """
+    if len(known_prefix) > BLOCK_SIZE:
+        known_prefix = known_prefix[:BLOCK_SIZE]
+
+    workers = workers or os.cpu_count() or 1
+    shards = shard_ranges(entropy_bits, workers)
+    checkpoint = Checkpoint(checkpoint_path, shards)
+
+    args = {
+        "student_name": student_name,
+        "entropy_bits": entropy_bits,
+        "iv": iv,
+        "first_block": ciphertext[:BLOCK_SIZE],
+        "known_prefix": known_prefix,
+        "algorithm": algorithm,
+    }
+
+    ctx = mp.get_context("spawn")
+    found = ctx.Event()
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(target=search_shard, args=(i, checkpoint.positions[i], end, args, found, results))
+        for i, (_, end) in enumerate(shards)
+    ]
+    for process in processes:
+        process.start()
+
+    hit = None
+    rates = {}
+    pending = len(processes)
+    started = time.perf_counter()
+    last_report = started
+    done = set()
+    try:
+        while pending:
+            try:
+                message = results.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                # A worker killed mid-search (OOM, signal, exception) never
+                # reports "done"; a clean exit always has, so only failures count
+                for i, process in enumerate(processes):
+                    if i not in done and process.exitcode not in (None, 0):
+                        raise RuntimeError(f"Worker for shard {i} exited with code {process.exitcode}")
+                continue
+            kind, shard = message[0], message[1]
+
+            if kind == "hit":
+                hit = message
+                continue
+
+            _, _, position, tested, elapsed = message
+            checkpoint.update(shard, position)
+            if elapsed > 0:
+                rates[shard] = tested / elapsed
+            if kind == "done":
+                done.add(shard)
+                pending -= 1
+
+            now = time.perf_counter()
+            if now - last_report >= 10 or not pending:
+                checkpoint.save()
+                last_report = now
+                if rates:
+                    per_core = sum(rates.values()) / len(rates)
+                    logger.info(
+                        f"{sum(rates.values()):.1f} candidates/s total, "
+                        f"{per_core:.2f} candidates/s per core ({len(rates)} cores)"
+                    )
+    finally:
+        found.set()
+        for process in processes:
+            process.join()
+        checkpoint.save()
+
+    if hit is None:
+        logger.info(f"Key space exhausted after {time.perf_counter() - started:.1f}s")
+        return None
+
+    _, _, value, key = hit
+    logger.info(f"Found secret {value} after {time.perf_counter() - started:.1f}s")
+    return {
+        "value": value,
+        "key": key,
+        "plaintext": decrypt(key, iv, ciphertext, algorithm),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recover the low-entropy scrypt key of a challenge file")
+    parser.add_argument("--challenge", default="challenge", help="challenge.bin or the text challenge file written by x.py")
+    parser.add_argument("--student-name", required=True, help="scrypt salt")
+    parser.add_argument("--entropy-bits", type=int, required=True, help="key_entropy_bits used by x.py")
+    parser.add_argument("--algorithm", default="aes-128-cbc", choices=["aes-128-cbc", "aes-128-ctr"])
+    parser.add_argument("--known-prefix", default="crypto{", help="expected start of the plaintext")
+    parser.add_argument("--workers", type=int, default=None, help="defaults to one per core")
+    parser.add_argument("--checkpoint", default=None, help="JSON file to save/resume progress")
+    args = parser.parse_args()
+
+    iv, ciphertext = read_challenge_file(args.challenge)
+    result = brute_force(
+        iv, ciphertext, args.student_name, args.entropy_bits,
+        algorithm=args.algorithm,
+        known_prefix=args.known_prefix.encode(),
+        workers=args.workers,
+        checkpoint_path=args.checkpoint,
+    )
+    if result:
+        logger.info(f"Key: {result['key'].hex()}")
+        logger.info(f"Plaintext: {result['plaintext']!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,18 @@
 import logging
-import os
 import time
 from base64 import b64encode
 
 import requests
 from requests.exceptions import ConnectionError
-import yaml
-from glom import glom
+
+from common.config import get_setting, load_config
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def get_setting(settings, path, env_var):
-    """Get setting from environment variable or fall back to config file."""
-    return os.environ.get(env_var, glom(settings, path))
-
-# Load YAML configuration
-with open("config.yaml") as f:
-    settings = yaml.safe_load(f)
+# Load configuration (see common/config.py)
+settings = load_config()
 
 # Get settings with environment variable override
 SERVER_NAME = get_setting(settings, "lab.low_entropy.server.name", "SERVER_NAME")
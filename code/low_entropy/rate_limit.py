@@ -0,0 +1,274 @@
+import os
+import threading
+import time
+from array import array
+from typing import Optional
+
+# Defaults for the in-memory limiter
+SHARDS = 64
+COMPACT_EVERY = 10_000  # calls per shard between idle-key compactions
+
+
+class _Log:
+    """Ring buffer of the last `limit` request times of one key."""
+    __slots__ = ("times", "head")
+
+    def __init__(self, limit: int):
+        self.times = array("d", [float("-inf")]) * limit
+        self.head = 0
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class SlidingWindowLog:
+    """Allow at most `limit` requests in any `window`-second interval.
+
+    Only the last `limit` timestamps are kept per key: a request is allowed if
+    the oldest of them is at least `window` seconds old, which makes each
+    check O(1).
+    """
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+
+    def new_state(self, now: float) -> _Log:
+        return _Log(self.limit)
+
+    def is_limited(self, state: _Log, now: float) -> bool:
+        if now - state.times[state.head] < self.window:
+            return True
+        state.times[state.head] = now
+        state.head = (state.head + 1) % self.limit
+        return False
+
+    def is_idle(self, state: _Log, now: float) -> bool:
+        newest = state.times[state.head - 1]
+        return now - newest >= self.window
+
+
+class TokenBucket:
+    """Allow bursts of `limit` requests, refilled at `limit / window` per second."""
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self.rate = limit / window
+
+    def new_state(self, now: float) -> _Bucket:
+        return _Bucket(float(self.limit), now)
+
+    def is_limited(self, state: _Bucket, now: float) -> bool:
+        tokens = min(self.limit, state.tokens + (now - state.updated) * self.rate)
+        state.updated = now
+        if tokens < 1:
+            state.tokens = tokens
+            return True
+        state.tokens = tokens - 1
+        return False
+
+    def is_idle(self, state: _Bucket, now: float) -> bool:
+        # A full bucket carries no information and can be recreated on demand
+        return state.tokens + (now - state.updated) * self.rate >= self.limit
+
+
+ALGORITHMS = {
+    "sliding-window": SlidingWindowLog,
+    "token-bucket": TokenBucket,
+}
+
+
+class _Shard:
+    __slots__ = ("lock", "states", "calls")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.states = {}
+        self.calls = 0
+
+
+class MemoryRateLimiter:
+    """Per-process rate limiter with per-key state split across shards.
+
+    Each shard has its own lock, so threads checking different keys rarely
+    contend, and each shard periodically drops keys that have been idle for a
+    full window so memory tracks active clients only.
+    """
+
+    # Checks never leave the process, so async callers may run them inline
+    blocking = False
+
+    def __init__(self, algorithm, shards: int = SHARDS, compact_every: int = COMPACT_EVERY,
+                 clock=time.monotonic):
+        self.algorithm = algorithm
+        self.compact_every = compact_every
+        self.clock = clock
+        self._shards = [_Shard() for _ in range(shards)]
+        self.limited = 0
+        self.allowed = 0
+        self.compacted = 0
+
+    def is_rate_limited(self, key: str) -> bool:
+        now = self.clock()
+        shard = self._shards[hash(key) % len(self._shards)]
+        with shard.lock:
+            state = shard.states.get(key)
+            if state is None:
+                state = shard.states[key] = self.algorithm.new_state(now)
+            limited = self.algorithm.is_limited(state, now)
+
+            shard.calls += 1
+            if shard.calls >= self.compact_every:
+                shard.calls = 0
+                self._compact(shard, now)
+
+        if limited:
+            self.limited += 1
+        else:
+            self.allowed += 1
+        return limited
+
+    def _compact(self, shard: _Shard, now: float) -> None:
+        idle = [key for key, state in shard.states.items() if self.algorithm.is_idle(state, now)]
+        for key in idle:
+            del shard.states[key]
+        self.compacted += len(idle)
+
+    def compact(self) -> None:
+        """Drop idle keys from every shard."""
+        now = self.clock()
+        for shard in self._shards:
+            with shard.lock:
+                self._compact(shard, now)
+
+    def stats(self) -> dict:
+        return {
+            "keys": sum(len(shard.states) for shard in self._shards),
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "compacted": self.compacted,
+        }
+
+
+# Trim, count and conditionally add in one step, so concurrent workers cannot
+# all see room under the limit and all add an entry
+_REDIS_SLIDING_WINDOW = """
+redis.call("ZREMRANGEBYSCORE", KEYS[1], 0, ARGV[1] - ARGV[2])
+if redis.call("ZCARD", KEYS[1]) >= tonumber(ARGV[3]) then
+    return 1
+end
+redis.call("ZADD", KEYS[1], ARGV[1], ARGV[4])
+redis.call("EXPIRE", KEYS[1], ARGV[5])
+return 0
+"""
+
+
+class RedisRateLimiter:
+    """Sliding-window log shared by all uvicorn workers through Redis.
+
+    Requires the optional `redis` package. Each key is a sorted set of
+    request timestamps that expires after one idle window; a Lua script
+    makes each check atomic across workers. Every check is a network round
+    trip, so async callers should run it off the event loop.
+    """
+
+    blocking = True
+
+    def __init__(self, url: str, limit: int, window: float, prefix: str = "rate-limit:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self._check = self.client.register_script(_REDIS_SLIDING_WINDOW)
+        self.limit = limit
+        self.window = window
+        self.prefix = prefix
+        self.limited = 0
+        self.allowed = 0
+
+    def is_rate_limited(self, key: str) -> bool:
+        now = time.time()
+        limited = self._check(
+            keys=[self.prefix + key],
+            args=[now, self.window, self.limit, f"{now}:{os.urandom(4).hex()}", max(1, int(self.window) + 1)],
+        )
+        if limited:
+            self.limited += 1
+            return True
+        self.allowed += 1
+        return False
+
+    def stats(self) -> dict:
+        return {"allowed": self.allowed, "limited": self.limited}
+
+
+class BanningRateLimiter:
+    """Reject every request of a key for `ban_seconds` once it hits the limit.
+
+    Bans are kept in this process, next to whichever limiter they wrap.
+    """
+
+    def __init__(self, limiter, ban_seconds: float, clock=time.monotonic):
+        self.limiter = limiter
+        self.ban_seconds = ban_seconds
+        self.clock = clock
+        self._banned: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.bans = 0
+        self.rejected_while_banned = 0
+
+    @property
+    def blocking(self) -> bool:
+        return self.limiter.blocking
+
+    def is_rate_limited(self, key: str) -> bool:
+        now = self.clock()
+        with self._lock:
+            banned_until = self._banned.get(key)
+            if banned_until is not None:
+                if now < banned_until:
+                    self.rejected_while_banned += 1
+                    return True
+                del self._banned[key]
+
+        if not self.limiter.is_rate_limited(key):
+            return False
+        with self._lock:
+            self._banned[key] = now + self.ban_seconds
+            self.bans += 1
+            # Drop lapsed bans so the table tracks banned clients only
+            if len(self._banned) > 1024 and self.bans % 1024 == 0:
+                self._banned = {k: until for k, until in self._banned.items() if until > now}
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            banned = sum(1 for until in self._banned.values() if until > self.clock())
+        return {**self.limiter.stats(), "banned": banned, "bans": self.bans,
+                "rejected_while_banned": self.rejected_while_banned}
+
+
+def create_rate_limiter(limit: int, window: float, algorithm: str = "sliding-window",
+                        redis_url: Optional[str] = None, ban_seconds: float = 0):
+    """Build a rate limiter exposing `is_rate_limited(key) -> bool`.
+
+    `blocking` on the result tells whether a check does network I/O.
+
+    With `redis_url` the state is shared across worker processes (sliding
+    window only); otherwise it is kept in this process. A positive
+    `ban_seconds` keeps rejecting a key for that long after it hits the limit.
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown rate limit algorithm: {algorithm}")
+    if redis_url:
+        if algorithm != "sliding-window":
+            raise ValueError("The Redis backend only supports the sliding-window algorithm")
+        limiter = RedisRateLimiter(redis_url, limit, window)
+    else:
+        limiter = MemoryRateLimiter(ALGORITHMS[algorithm](limit, window))
+    return BanningRateLimiter(limiter, ban_seconds) if ban_seconds > 0 else limiter
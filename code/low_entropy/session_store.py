@@ -0,0 +1,187 @@
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Defaults for the in-memory index and the expiry sweeper
+MAX_SESSIONS = 100_000
+SWEEP_INTERVAL_SECONDS = 5.0
+SWEEP_BATCH_SIZE = 1_000
+PURGE_INTERVAL_SECONDS = 60.0
+
+
+class SessionStore:
+    """In-memory session index with an expiry sweeper in front of a SessionDB.
+
+    Sessions are dicts with an `expires_at` datetime. Lookups hit a dict, so
+    they are O(1) and only fall through to the persistent backend for IDs the
+    index does not hold (e.g. after a restart). A min-heap keyed on
+    `expires_at` lets the background sweeper evict expired sessions in
+    batches without scanning the whole index, and `max_sessions` caps memory
+    by dropping the sessions closest to expiry from the index first (they
+    stay in the backend, and the store keeps nothing about them).
+
+    `backend` is optional; when given it must provide the async
+    `create_session`, `get_session` and `delete_session` methods of SessionDB.
+    Sessions outside the index (evicted for capacity, or left by a previous
+    run) expire in the backend alone: if it provides
+    `delete_expired_sessions(before)`, the sweeper calls it every
+    `purge_interval` seconds to delete them. Without it they are only
+    deleted when looked up after expiring.
+    """
+
+    def __init__(self, backend=None, max_sessions: int = MAX_SESSIONS,
+                 sweep_interval: float = SWEEP_INTERVAL_SECONDS,
+                 sweep_batch_size: int = SWEEP_BATCH_SIZE,
+                 purge_interval: float = PURGE_INTERVAL_SECONDS):
+        self.backend = backend
+        self.max_sessions = max_sessions
+        self.sweep_interval = sweep_interval
+        self.sweep_batch_size = sweep_batch_size
+        self.purge_interval = purge_interval
+        self._purge = getattr(backend, "delete_expired_sessions", None)
+        self._last_purge: Optional[float] = None
+
+        self._sessions: dict[str, dict] = {}
+        # (expires_at timestamp, session_id); entries for deleted or replaced
+        # sessions are skipped lazily when they reach the top
+        self._expiry_heap: list[tuple[float, str]] = []
+        self._sweeper: Optional[asyncio.Task] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.expired_evictions = 0
+        self.capacity_evictions = 0
+        self.purges = 0
+
+    async def create_session(self, session_id: str, session: dict) -> None:
+        if self.backend is not None:
+            await self.backend.create_session(session_id, session)
+
+        self._index(session_id, session)
+
+    async def get_session(self, session_id: str) -> Optional[dict]:
+        session = self._sessions.get(session_id)
+        if session is not None:
+            self.hits += 1
+            return session
+
+        self.misses += 1
+        if self.backend is None:
+            return None
+
+        session = await self.backend.get_session(session_id)
+        if session is not None and session["expires_at"] >= datetime.now(timezone.utc):
+            self._index(session_id, session)
+        return session
+
+    async def delete_session(self, session_id: str) -> None:
+        # The heap entry is left behind and dropped when it surfaces
+        self._sessions.pop(session_id, None)
+        await self._delete_from_backend([session_id])
+
+    def _index(self, session_id: str, session: dict) -> None:
+        # Capacity evictions only drop sessions from the index: they are still
+        # valid and are read back from the backend on their next lookup
+        while session_id not in self._sessions and len(self._sessions) >= self.max_sessions:
+            if self._pop_next_expiring() is None:
+                break
+            self.capacity_evictions += 1
+
+        self._sessions[session_id] = session
+        heapq.heappush(self._expiry_heap, (session["expires_at"].timestamp(), session_id))
+
+        # Keep the heap from growing unboundedly with stale entries
+        if len(self._expiry_heap) > 2 * len(self._sessions) + self.sweep_batch_size:
+            self._expiry_heap = [
+                (s["expires_at"].timestamp(), sid) for sid, s in self._sessions.items()
+            ]
+            heapq.heapify(self._expiry_heap)
+
+    def _is_current(self, expires_at: float, session_id: str) -> bool:
+        session = self._sessions.get(session_id)
+        return session is not None and session["expires_at"].timestamp() == expires_at
+
+    def _pop_next_expiring(self) -> Optional[str]:
+        while self._expiry_heap:
+            expires_at, session_id = heapq.heappop(self._expiry_heap)
+            if self._is_current(expires_at, session_id):
+                del self._sessions[session_id]
+                return session_id
+        return None
+
+    async def _delete_from_backend(self, session_ids: list[str]) -> None:
+        if self.backend is not None and session_ids:
+            await asyncio.gather(*(self.backend.delete_session(sid) for sid in session_ids))
+
+    async def sweep(self) -> int:
+        """Evict every session that has expired, one batch at a time.
+
+        Returns the number evicted from the index; the backend purge, when
+        due, removes expired sessions the index does not hold.
+        """
+        now = datetime.now(timezone.utc)
+        if self._purge is not None and (
+            self._last_purge is None or time.monotonic() - self._last_purge >= self.purge_interval
+        ):
+            self._last_purge = time.monotonic()
+            await self._purge(now)
+            self.purges += 1
+
+        cutoff = now.timestamp()
+        evicted_total = 0
+
+        while self._expiry_heap and self._expiry_heap[0][0] < cutoff:
+            batch = []
+            while (self._expiry_heap and self._expiry_heap[0][0] < cutoff
+                   and len(batch) < self.sweep_batch_size):
+                expires_at, session_id = heapq.heappop(self._expiry_heap)
+                if self._is_current(expires_at, session_id):
+                    del self._sessions[session_id]
+                    batch.append(session_id)
+
+            await self._delete_from_backend(batch)
+            self.expired_evictions += len(batch)
+            evicted_total += len(batch)
+            # Let request handlers run between batches
+            await asyncio.sleep(0)
+
+        return evicted_total
+
+    async def _sweep_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"Session sweep failed: {e}")
+
+    def start(self) -> None:
+        """Start the background sweeper on the running event loop."""
+        if self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep_forever())
+
+    async def stop(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._sessions),
+            "heap_size": len(self._expiry_heap),
+            "purges": self.purges,
+            "max_sessions": self.max_sessions,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired_evictions": self.expired_evictions,
+            "capacity_evictions": self.capacity_evictions,
+        }
@@ -0,0 +1,153 @@
+import argparse
+import base64
+import hashlib
+import logging
+import time
+from typing import Iterator, Optional
+
+try:
+    import numpy as np
+except ImportError:  # fall back to a Python dict keyed by digest prefix
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Session IDs are indexed by the first 8 bytes of their SHA-256 digest; a
+# matching prefix is then confirmed by recomputing the full digest
+PREFIX_BYTES = 8
+
+
+def session_digest(value: int, entropy_bits: int, salt: bytes) -> bytes:
+    """The SHA-256 digest generate_session_id computes for a random value."""
+    return hashlib.sha256(value.to_bytes((entropy_bits + 7) // 8, "big") + salt).digest()
+
+
+def encode_session_id(digest: bytes) -> str:
+    return base64.urlsafe_b64encode(digest).decode('ascii').rstrip('=')
+
+
+def decode_session_id(session_id: str) -> Optional[bytes]:
+    """Raw digest of a session ID, or None if it cannot be one."""
+    if len(session_id) != 43:
+        return None
+    try:
+        digest = base64.urlsafe_b64decode(session_id + "=")
+    except ValueError:
+        return None
+    return digest if len(digest) == 32 else None
+
+
+class SessionIDTable:
+    """Every session ID the server can issue, for O(1) membership checks.
+
+    With NumPy the digest prefixes are kept as a sorted uint64 array with a
+    direct-addressed bucket index over their top bits (about one entry per
+    bucket), plus the secret value behind each prefix; without NumPy a dict
+    is used instead.
+    """
+
+    def __init__(self, student_name: str, entropy_bits: int):
+        self.student_name = student_name
+        self.entropy_bits = entropy_bits
+        self.salt = student_name.encode()
+
+        started = time.perf_counter()
+        if np is not None:
+            self._build_numpy()
+        else:
+            self._build_dict()
+        self.build_seconds = time.perf_counter() - started
+
+    def _prefixes(self) -> Iterator[int]:
+        for value in range(2**self.entropy_bits):
+            digest = session_digest(value, self.entropy_bits, self.salt)
+            yield int.from_bytes(digest[:PREFIX_BYTES], "big")
+
+    def _build_numpy(self) -> None:
+        size = 2**self.entropy_bits
+        prefixes = np.fromiter(self._prefixes(), dtype=np.uint64, count=size)
+        order = np.argsort(prefixes, kind="stable")
+
+        self.prefixes = prefixes[order]
+        self.values = order.astype(np.uint32 if self.entropy_bits <= 32 else np.uint64)
+
+        self.bucket_bits = max(1, self.entropy_bits)
+        self._shift = 64 - self.bucket_bits
+        bucket_starts = np.arange(2**self.bucket_bits, dtype=np.uint64) << np.uint64(self._shift)
+        self.offsets = np.append(np.searchsorted(self.prefixes, bucket_starts), size)
+        self.nbytes = self.prefixes.nbytes + self.values.nbytes + self.offsets.nbytes
+
+    def _build_dict(self) -> None:
+        self._by_prefix = {prefix: value for value, prefix in enumerate(self._prefixes())}
+        # Rough CPython cost of a dict entry plus two small ints
+        self.nbytes = len(self._by_prefix) * (8 * 3 + 2 * 36)
+
+    def lookup(self, session_id: str) -> Optional[int]:
+        """Secret value that produces `session_id`, or None if no value does."""
+        digest = decode_session_id(session_id)
+        if digest is None:
+            return None
+        prefix = int.from_bytes(digest[:PREFIX_BYTES], "big")
+
+        if np is not None:
+            bucket = prefix >> self._shift
+            lo, hi = int(self.offsets[bucket]), int(self.offsets[bucket + 1])
+            candidates = [int(self.values[i]) for i in range(lo, hi) if int(self.prefixes[i]) == prefix]
+        else:
+            value = self._by_prefix.get(prefix)
+            candidates = [] if value is None else [value]
+
+        for value in candidates:
+            if session_digest(value, self.entropy_bits, self.salt) == digest:
+                return value
+        return None
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.lookup(session_id) is not None
+
+    def __len__(self) -> int:
+        return 2**self.entropy_bits
+
+    def session_ids(self) -> Iterator[tuple[int, str]]:
+        """All (secret value, session ID) pairs, for offline enumeration tools."""
+        for value in range(2**self.entropy_bits):
+            yield value, encode_session_id(session_digest(value, self.entropy_bits, self.salt))
+
+    def report(self) -> dict:
+        return {
+            "entropy_bits": self.entropy_bits,
+            "entries": len(self),
+            "build_seconds": self.build_seconds,
+            "bytes": self.nbytes,
+            "bytes_per_entry": self.nbytes / len(self),
+        }
+
+
+def build_session_table(student_name: str, entropy_bits: int) -> SessionIDTable:
+    table = SessionIDTable(student_name, entropy_bits)
+    report = table.report()
+    logger.info(
+        f"Session ID table: {report['entries']} IDs ({entropy_bits} bits) built in "
+        f"{report['build_seconds']:.2f}s, {report['bytes'] / 2**20:.1f} MiB"
+    )
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report session ID table build time and memory per entropy bit")
+    parser.add_argument("--student-name", default="student")
+    parser.add_argument("--min-bits", type=int, default=8)
+    parser.add_argument("--max-bits", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'bits':>4} {'entries':>10} {'build s':>9} {'MiB':>8} {'bytes/entry':>12}")
+    for bits in range(args.min_bits, args.max_bits + 1):
+        report = SessionIDTable(args.student_name, bits).report()
+        print(
+            f"{bits:>4} {report['entries']:>10} {report['build_seconds']:>9.3f} "
+            f"{report['bytes'] / 2**20:>8.2f} {report['bytes_per_entry']:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
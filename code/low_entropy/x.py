@@ -1,13 +1,13 @@
-import os
 import logging
 from pathlib import Path
 import secrets
 import base64
 ...
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-from cryptography.hazmat.primitives import padding
 from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
 
+from common import aes
+from common.container import write_container
+
 ...
 
 SCRYPT_N = 2**16
@@ -29,17 +29,10 @@ def derive_key(student_name: str, entropy_bits: int) -> bytes:
 
 def encrypt_flag(flag: str, key: bytes, algorithm: str) -> tuple[bytes, bytes]:
     """Encrypt the flag using the specified algorithm."""
-    iv = os.urandom(16)
     if algorithm == "aes-128-ctr":
-        cipher = Cipher(algorithms.AES(key), modes.CTR(iv))
-        encryptor = cipher.encryptor()
-        ct = encryptor.update(flag.encode()) + encryptor.finalize()
+        iv, ct = aes.ctr_encrypt(key, flag.encode())
     else:  # Default to aes-128-cbc
-        padder = padding.PKCS7(128).padder()
-        padded_data = padder.update(flag.encode()) + padder.finalize()
-        cipher = Cipher(algorithms.AES(key), modes.CBC(iv))
-        encryptor = cipher.encryptor()
-        ct = encryptor.update(padded_data) + encryptor.finalize()
+        iv, ct = aes.cbc_encrypt(key, flag.encode())
     return ct, iv
 
 def write_challenge_file(ciphertext: bytes, iv: bytes) -> None:    
@@ -47,13 +40,21 @@ def write_challenge_file(ciphertext: bytes, iv: bytes) -> None:
         f.write(base64.b64encode(iv).decode("ascii") + "\n")
         f.write(base64.b64encode(ciphertext).decode("ascii") + "\n")
 
+def write_challenge_container(ciphertext: bytes, iv: bytes) -> None:
+    write_container("challenge.bin", ciphertext, iv=iv)
+
 def main():
     try:
         ...
         
         key = derive_key(config["student_name"], config["key_entropy_bits"])
         ciphertext, iv = encrypt_flag(config["flag"], key, config["encryption_algorithm"])
-        write_challenge_file(ciphertext, iv)
+        # "text" (default), "binary" (challenge.bin) or "both"
+        challenge_format = config.get("challenge_format", "text")
+        if challenge_format in ("binary", "both"):
+            write_challenge_container(ciphertext, iv)
+        if challenge_format in ("text", "both"):
+            write_challenge_file(ciphertext, iv)
 
     except Exception as e:
         logger.error(f"Failed to setup challenge: {e}")
@@ -0,0 +1,186 @@
+import logging
+import os
+import queue
+import threading
+from pathlib import Path
+from typing import Optional
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import dh, rsa
+
+logger = logging.getLogger(__name__)
+
+# RFC 3526 MODP groups (generator 2), keyed by prime size in bits
+RFC3526_PRIMES = {
+    2048: int(
+        "FFFFFFFFFFFFFFFFC90FDAA22168C234C4C6628B80DC1CD1"
+        "29024E088A67CC74020BBEA63B139B22514A08798E3404DD"
+        "EF9519B3CD3A431B302B0A6DF25F14374FE1356D6D51C245"
+        "E485B576625E7EC6F44C42E9A637ED6B0BFF5CB6F406B7ED"
+        "EE386BFB5A899FA5AE9F24117C4B1FE649286651ECE45B3D"
+        "C2007CB8A163BF0598DA48361C55D39A69163FA8FD24CF5F"
+        "83655D23DCA3AD961C62F356208552BB9ED529077096966D"
+        "670C354E4ABC9804F1746C08CA18217C32905E462E36CE3B"
+        "E39E772C180E86039B2783A2EC07A28FB5C55DF06F4C52C9"
+        "DE2BCBF6955817183995497CEA956AE515D2261898FA0510"
+        "15728E5A8AACAA68FFFFFFFFFFFFFFFF",
+        16,
+    ),
+}
+
+# Defaults for the ephemeral DH private key pool
+DH_POOL_SIZE = 32
+
+
+def _generate_dh_pem(key_size: int) -> bytes:
+    params = dh.generate_parameters(generator=2, key_size=key_size)
+    return params.parameter_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.ParameterFormat.PKCS3
+    )
+
+
+class DHKeyPool:
+    """Pre-generated ephemeral DH private keys, refilled by a background thread."""
+
+    def __init__(self, params: dh.DHParameters, size: int = DH_POOL_SIZE):
+        self.params = params
+        self._keys: "queue.Queue[dh.DHPrivateKey]" = queue.Queue(maxsize=size)
+        self._closed = threading.Event()
+        self._refill = threading.Thread(target=self._fill, daemon=True)
+        self._refill.start()
+        self.misses = 0
+
+    def _fill(self) -> None:
+        while not self._closed.is_set():
+            key = self.params.generate_private_key()
+            while not self._closed.is_set():
+                try:
+                    self._keys.put(key, timeout=1)
+                    break
+                except queue.Full:
+                    continue
+
+    def close(self) -> None:
+        """Stop refilling; keys already in the pool can still be taken."""
+        self._closed.set()
+
+    def take(self) -> dh.DHPrivateKey:
+        try:
+            return self._keys.get_nowait()
+        except queue.Empty:
+            self.misses += 1
+            return self.params.generate_private_key()
+
+
+class KeyMaterial:
+    """One consistent set of server RSA key, DH parameters and DH key pool."""
+    __slots__ = ("rsa_private", "dh_params", "dh_pool")
+
+    def __init__(self, rsa_private: rsa.RSAPrivateKey, dh_params: dh.DHParameters, pool_size: int):
+        self.rsa_private = rsa_private
+        self.dh_params = dh_params
+        self.dh_pool = DHKeyPool(dh_params, pool_size)
+
+
+class KeyMaterialManager:
+    """Load long-lived key material quickly and refresh it in the background.
+
+    DH parameters are public: they come from `cache_dir` when present, else
+    from the RFC 3526 group of the requested size, and only then from (slow)
+    generation. The RSA private key lives in memory; it is only cached on
+    disk when a `passphrase` is given, and then encrypted with it in a
+    0600 file. With a positive `refresh_seconds`, a background thread
+    generates fresh material and swaps it in atomically; handshakes already
+    in progress keep the KeyMaterial they started with.
+    """
+
+    def __init__(self, rsa_key_size: int, dh_key_size: int, cache_dir: str = "keycache",
+                 refresh_seconds: float = 0, pool_size: int = DH_POOL_SIZE,
+                 passphrase: Optional[bytes] = None):
+        self.rsa_key_size = rsa_key_size
+        self.dh_key_size = dh_key_size
+        self.cache_dir = Path(cache_dir)
+        self.pool_size = pool_size
+        self.passphrase = passphrase
+
+        self.current = KeyMaterial(self._load_rsa(), self._load_dh(), pool_size)
+
+        self._stop = threading.Event()
+        if refresh_seconds > 0:
+            threading.Thread(target=self._refresh_forever, args=(refresh_seconds,), daemon=True).start()
+
+    @property
+    def _rsa_path(self) -> Path:
+        return self.cache_dir / f"rsa-{self.rsa_key_size}.pem"
+
+    @property
+    def _dh_path(self) -> Path:
+        return self.cache_dir / f"dh-{self.dh_key_size}.pem"
+
+    def _write_cache(self, path: Path, pem: bytes) -> None:
+        try:
+            self.cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            # Created 0600 rather than chmod-ed afterwards, so it is never readable by others
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(pem)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"Could not write key cache {path}: {e}")
+
+    def _save_rsa(self, key: rsa.RSAPrivateKey) -> None:
+        if self.passphrase:
+            self._write_cache(self._rsa_path, key.private_bytes(
+                encoding=serialization.Encoding.PEM,
+                format=serialization.PrivateFormat.PKCS8,
+                encryption_algorithm=serialization.BestAvailableEncryption(self.passphrase)
+            ))
+
+    def _load_rsa(self) -> rsa.RSAPrivateKey:
+        if self.passphrase and self._rsa_path.exists():
+            try:
+                return serialization.load_pem_private_key(self._rsa_path.read_bytes(), password=self.passphrase)
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Ignoring key cache {self._rsa_path}: {e}")
+
+        key = rsa.generate_private_key(public_exponent=65537, key_size=self.rsa_key_size)
+        self._save_rsa(key)
+        return key
+
+    def _load_dh(self) -> dh.DHParameters:
+        if self._dh_path.exists():
+            return serialization.load_pem_parameters(self._dh_path.read_bytes())
+
+        prime = RFC3526_PRIMES.get(self.dh_key_size)
+        if prime is not None:
+            return dh.DHParameterNumbers(prime, 2).parameters()
+
+        logger.info(f"Generating {self.dh_key_size}-bit DH parameters, this may take a while...")
+        pem = _generate_dh_pem(self.dh_key_size)
+        self._write_cache(self._dh_path, pem)
+        return serialization.load_pem_parameters(pem)
+
+    def refresh(self) -> None:
+        """Generate new material (on the calling thread) and swap it in."""
+        rsa_private = rsa.generate_private_key(public_exponent=65537, key_size=self.rsa_key_size)
+        dh_pem = _generate_dh_pem(self.dh_key_size)
+
+        self._save_rsa(rsa_private)
+        self._write_cache(self._dh_path, dh_pem)
+        material = KeyMaterial(rsa_private, serialization.load_pem_parameters(dh_pem), self.pool_size)
+        # A single reference assignment, so readers see either the old or the new set
+        previous, self.current = self.current, material
+        previous.dh_pool.close()
+        logger.info("Swapped in fresh RSA key and DH parameters")
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _refresh_forever(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Key material refresh failed: {e}")
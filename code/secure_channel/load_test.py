@@ -0,0 +1,112 @@
+"""Load test: completed secure-channel handshakes per second vs. concurrent clients.
+
+Each simulated client runs the full protocol against the server
+(/exchange/rsa-dh-params -> /exchange/dh -> /challenge), carrying its own
+X-Session-Token, and checks that the challenge decrypts.
+
+Usage: python load_test.py --url http://localhost:80 [--clients 1,4,16,64] [--duration 10]
+"""
+import argparse
+import threading
+import time
+from base64 import b64decode, b64encode
+
+import requests
+from cryptography.hazmat.primitives import hashes, serialization, padding as crypto_padding
+from cryptography.hazmat.primitives.asymmetric import rsa, padding
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+PSS = padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH)
+
+
+class Client:
+    def __init__(self, url: str, rsa_private: rsa.RSAPrivateKey):
+        self.url = url
+        self.http = requests.Session()
+        self.rsa_private = rsa_private
+        self.rsa_public_pem = rsa_private.public_key().public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo
+        ).decode()
+
+    def handshake(self) -> bytes:
+        """Run the whole protocol once and return the decrypted challenge."""
+        response = self.http.post(f"{self.url}/exchange/rsa-dh-params", json={"key": self.rsa_public_pem})
+        response.raise_for_status()
+        headers = {"X-Session-Token": response.headers["X-Session-Token"]}
+        server_rsa_public = serialization.load_pem_public_key(response.json()["key"].encode())
+        dh_params_pem = response.json()["dh_params"].encode()
+        dh_params = serialization.load_pem_parameters(dh_params_pem)
+
+        dh_private = dh_params.generate_private_key()
+        dh_public_pem = dh_private.public_key().public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        signature = self.rsa_private.sign(dh_public_pem, PSS, hashes.SHA256())
+        response = self.http.post(
+            f"{self.url}/exchange/dh",
+            json={"key": dh_public_pem.decode(), "signature": b64encode(signature).decode()},
+            headers=headers,
+        )
+        response.raise_for_status()
+        server_dh_public_pem = response.json()["key"].encode()
+        server_rsa_public.verify(
+            b64decode(response.json()["signature"]),
+            dh_params_pem + server_dh_public_pem + dh_public_pem,
+            PSS,
+            hashes.SHA256(),
+        )
+
+        shared_secret = dh_private.exchange(serialization.load_pem_public_key(server_dh_public_pem))
+        key = HKDF(algorithm=hashes.SHA256(), length=32, salt=b"ServerClient", info=None).derive(shared_secret)
+
+        response = self.http.get(f"{self.url}/challenge", headers=headers)
+        response.raise_for_status()
+        decryptor = Cipher(algorithms.AES(key), modes.CBC(b64decode(response.json()["iv"]))).decryptor()
+        padded = decryptor.update(b64decode(response.json()["ciphertext"])) + decryptor.finalize()
+        unpadder = crypto_padding.PKCS7(128).unpadder()
+        return unpadder.update(padded) + unpadder.finalize()
+
+
+def run_level(url: str, rsa_private: rsa.RSAPrivateKey, clients: int, duration: float) -> tuple[int, int]:
+    completed = [0] * clients
+    failed = [0] * clients
+    deadline = time.perf_counter() + duration
+
+    def worker(i: int) -> None:
+        client = Client(url, rsa_private)
+        while time.perf_counter() < deadline:
+            try:
+                client.handshake()
+                completed[i] += 1
+            except Exception:
+                failed[i] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(completed), sum(failed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:80")
+    parser.add_argument("--clients", default="1,4,16,64", help="comma-separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=10, help="seconds per concurrency level")
+    args = parser.parse_args()
+
+    # One client RSA key is enough; sessions are keyed by token, not by key
+    rsa_private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+    print(f"{'clients':>8} {'completed':>10} {'failed':>7} {'handshakes/s':>13}")
+    for clients in (int(c) for c in args.clients.split(",")):
+        completed, failed = run_level(args.url, rsa_private, clients, args.duration)
+        print(f"{clients:>8} {completed:>10} {failed:>7} {completed / args.duration:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
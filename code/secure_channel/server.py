@@ -1,44 +1,67 @@
 ...
-from cryptography.hazmat.primitives.asymmetric import rsa, dh, padding
+from cryptography.hazmat.primitives.asymmetric import padding
 from cryptography.hazmat.primitives import hashes, serialization, padding as crypto_padding
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from base64 import b64encode, b64decode
+from typing import Optional
+from fastapi import Cookie, Header, Response
+from sessions import SessionManager, SessionError
+from keymaterial import KeyMaterialManager
+from common import aes
+from common.config import getenv
+from common.metrics import install_metrics, span, timed
+from common.negotiation import BINARY_RESPONSES, binary_media_type, binary_response
 
 ...
 
 CHALLENGE_TEXT = f"{challenge_settings.text} - {challenge_settings.flag}"
 
-# Server state
-server_state = {
-    "rsa_private": None,
-    "dh_params": None,
-    "dh_private": None,
-    "client_rsa_public": None,
-    "client_dh_public": None
-}
-
-# Initialize RSA keys and DH parameters on startup
-server_state["rsa_private"] = rsa.generate_private_key(
-    public_exponent=65537,
-    key_size=server_settings.rsa_key_size
-)
+# The challenge never changes, so pad it once for AES-CBC
+_padder = crypto_padding.PKCS7(128).padder()
+PADDED_CHALLENGE = _padder.update(CHALLENGE_TEXT.encode()) + _padder.finalize()
+
+# Per-client handshake state (client keys, server DH private key), keyed by the
+# token issued from /exchange/rsa-dh-params and sent back as the
+# X-Session-Token header or session_token cookie
+sessions = SessionManager()
 
-server_state["dh_params"] = dh.generate_parameters(
-    generator=2,
-    key_size=server_settings.dh_key_size
+def get_session(header_token, cookie_token):
+    try:
+        return sessions.get(header_token or cookie_token)
+    except SessionError as error:
+        raise HTTPException(status_code=401, detail=str(error))
+
+# Server RSA key and DH parameters shared by all clients: DH parameters from
+# the on-disk cache (or the RFC 3526 group), the RSA key generated in memory
+# unless KEY_CACHE_PASSPHRASE allows an encrypted cache; optionally
+# regenerated in the background, with a pool of pre-generated ephemeral DH
+# private keys
+key_material = KeyMaterialManager(
+    rsa_key_size=server_settings.rsa_key_size,
+    dh_key_size=server_settings.dh_key_size,
+    cache_dir=getenv("KEY_CACHE_DIR", "keycache"),
+    refresh_seconds=float(getenv("KEY_REFRESH_SECONDS", 0)),
+    passphrase=getenv("KEY_CACHE_PASSPHRASE", "").encode() or None,
 )
 
+install_metrics(app, "secure_channel")
+
 @app.post("/exchange/rsa-dh-params", response_model=RSAandDHParams)
-def exchange_rsa_keys(client_key: PublicKey):
+def exchange_rsa_keys(client_key: PublicKey, response: Response):
     try:
-        # Store client's RSA public key
-        server_state["client_rsa_public"] = serialization.load_pem_public_key(
+        # Store client's RSA public key in a new handshake session
+        client_rsa_public = serialization.load_pem_public_key(
             client_key.key.encode()
         )
+        session = sessions.create()
+        session.client_rsa_public = client_rsa_public
+        # Pin the key material for the rest of this handshake
+        session.material = key_material.current
+        response.headers["X-Session-Token"] = session.token
+        response.set_cookie("session_token", session.token, max_age=int(sessions.ttl_seconds))
         
         # Return server's RSA public key and DH parameters
-        server_rsa_public = server_state["rsa_private"].public_key()
+        server_rsa_public = session.material.rsa_private.public_key()
 
         return RSAandDHParams(
             key=server_rsa_public.public_bytes(
@@ -46,7 +69,7 @@ def exchange_rsa_keys(client_key: PublicKey):
                 format=serialization.PublicFormat.SubjectPublicKeyInfo
             ).decode(),
 
-            dh_params=server_state["dh_params"].parameter_bytes(
+            dh_params=session.material.dh_params.parameter_bytes(
                 encoding=serialization.Encoding.PEM,
                 format=serialization.ParameterFormat.PKCS3
             ).decode()
@@ -55,16 +78,22 @@ def exchange_rsa_keys(client_key: PublicKey):
         raise HTTPException(status_code=400, detail=str(error))
 
 @app.post("/exchange/dh", response_model=SignedPublicKey)
-def exchange_signed_dh_keys(client_key: SignedPublicKey):
+def exchange_signed_dh_keys(
+    client_key: SignedPublicKey,
+    x_session_token: Optional[str] = Header(default=None),
+    session_token: Optional[str] = Cookie(default=None),
+):
+    session = get_session(x_session_token, session_token)
     try:
-        # 1. Verify client's signature over their DH public key
+        # 1. Verify client's signature over their DH public key (session.client_rsa_public)
         ...
 
-        # 2. Store client's DH public key
+        # 2. Store client's DH public key in session.client_dh_public
         ...
 
-        # 3. Generate server's DH key pair
-        server_state["dh_private"] = ...
+        # 3. Take server's DH key pair from the pool (a new handshake invalidates the channel key)
+        session.channel_key = None
+        session.dh_private = session.material.dh_pool.take()
         server_dh_public = ...
 
         # 4. Prepare server's DH public key in PEM format
@@ -74,17 +103,18 @@ def exchange_signed_dh_keys(client_key: SignedPublicKey):
         )
 
         # 5. Sign (DH params || server DH public || client DH public)
-        signature = server_state["rsa_private"].sign(
-            server_state["dh_params"].parameter_bytes(
-                encoding=serialization.Encoding.PEM,
-                format=serialization.ParameterFormat.PKCS3
-            ) + server_dh_public_pem + client_key.key.encode(),
-            padding=padding.PSS(
-                mgf=padding.MGF1(hashes.SHA256()),
-                salt_length=padding.PSS.MAX_LENGTH
-            ),
-            algorithm=hashes.SHA256()
-        )
+        with span("rsa_sign"):
+            signature = session.material.rsa_private.sign(
+                session.material.dh_params.parameter_bytes(
+                    encoding=serialization.Encoding.PEM,
+                    format=serialization.ParameterFormat.PKCS3
+                ) + server_dh_public_pem + client_key.key.encode(),
+                padding=padding.PSS(
+                    mgf=padding.MGF1(hashes.SHA256()),
+                    salt_length=padding.PSS.MAX_LENGTH
+                ),
+                algorithm=hashes.SHA256()
+            )
 
         return SignedPublicKey(
             key=server_dh_public_pem.decode(),
@@ -94,33 +124,41 @@ def exchange_signed_dh_keys(client_key: SignedPublicKey):
     except Exception as error:
         raise HTTPException(status_code=400, detail=str(error))
 
-@app.get("/challenge", response_model=Challenge)
-def get_challenge():
+@timed("derive_channel_key")
+def derive_channel_key(session) -> bytes:
+    """Derive the session's AES-256 key from the DH shared secret"""
+    # 1. Calculate shared DH secret from the session's DH keys
+    shared_secret = ...
+
+    # 2. Derive AES key using HKDF
+    return HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=b"ServerClient",
+        info=None
+    ).derive(shared_secret)
+
+@app.get("/challenge", response_model=Challenge, responses=BINARY_RESPONSES)
+def get_challenge(
+    x_session_token: Optional[str] = Header(default=None),
+    session_token: Optional[str] = Cookie(default=None),
+    accept: Optional[str] = Header(default=None),
+):
+    session = get_session(x_session_token, session_token)
     try:
-        # 1. Calculate shared DH secret
-        shared_secret = ...
-
-        # 2. Derive AES key using HKDF
-        key = HKDF(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=b"ServerClient",
-            info=None
-        ).derive(shared_secret)
-
-        # 3. Encrypt challenge with AES-256-CBC using proper padding
-        padder = crypto_padding.PKCS7(128).padder()
-        padded_data = padder.update(CHALLENGE_TEXT.encode())
-        padded_data += padder.finalize()
-
-        iv = os.urandom(16)
-        cipher = Cipher(
-            algorithms.AES(key),
-            modes.CBC(iv)
-        )
-        encryptor = cipher.encryptor()
-        ciphertext = encryptor.update(padded_data) + encryptor.finalize()
-
+        # 1.-2. The shared DH secret and HKDF key are computed once per handshake
+        if session.channel_key is None:
+            session.channel_key = derive_channel_key(session)
+
+        # 3. Encrypt the pre-padded challenge with AES-256-CBC under a fresh IV,
+        # reusing the key schedule of earlier calls with this key (common/aes.py)
+        with span("challenge_encrypt"):
+            iv, ciphertext = aes.cbc_encrypt(session.channel_key, PADDED_CHALLENGE, pad=False)
+
+        # Binary: the 16-byte IV followed by the ciphertext
+        media_type = binary_media_type(accept)
+        if media_type:
+            return binary_response(media_type, iv=iv, ciphertext=ciphertext)
         return Challenge(
             iv=b64encode(iv).decode(),
             ciphertext=b64encode(ciphertext).decode()
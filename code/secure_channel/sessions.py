@@ -0,0 +1,89 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+# Defaults for the handshake session manager
+SESSION_TTL_SECONDS = 600
+MAX_SESSIONS = 10_000
+
+
+class SessionError(Exception):
+    """Raised for unknown or expired handshake sessions."""
+
+
+class HandshakeSession:
+    """Per-client handshake state, from /exchange/rsa-dh-params to /challenge."""
+    __slots__ = (
+        "token", "expires_at", "material",
+        "client_rsa_public", "client_dh_public", "dh_private", "channel_key"
+    )
+
+    def __init__(self, token: str, expires_at: float):
+        self.token = token
+        self.expires_at = expires_at
+        # Server RSA key / DH parameters the handshake started with
+        self.material = None
+        self.client_rsa_public = None
+        self.client_dh_public = None
+        self.dh_private = None
+        # AES key derived from the DH shared secret, cached after first use
+        self.channel_key = None
+
+
+class SessionManager:
+    """Thread-safe store of handshake sessions keyed by an opaque token.
+
+    Every session gets the same TTL, so insertion order is also expiry order:
+    expired sessions are always at the front of the OrderedDict and can be
+    evicted without scanning. When `max_sessions` is reached the oldest
+    session is dropped.
+    """
+
+    def __init__(self, ttl_seconds: float = SESSION_TTL_SECONDS, max_sessions: int = MAX_SESSIONS):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, HandshakeSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evicted = 0
+
+    def _evict(self, now: float, room: int = 0) -> None:
+        """Drop expired sessions, and old ones until `room` new sessions fit."""
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.expires_at > now and len(self._sessions) + room <= self.max_sessions:
+                break
+            self._sessions.popitem(last=False)
+            self.evicted += 1
+
+    def create(self) -> HandshakeSession:
+        now = time.monotonic()
+        session = HandshakeSession(secrets.token_urlsafe(16), now + self.ttl_seconds)
+        with self._lock:
+            self._evict(now, room=1)
+            self._sessions[session.token] = session
+            self.created += 1
+        return session
+
+    def get(self, token: Optional[str]) -> HandshakeSession:
+        """Look up a live session by the token issued when it was created.
+
+        Only /exchange/rsa-dh-params starts a session; every later step must
+        present its token, so one client can never pick up another's session.
+        """
+        if token is None:
+            raise SessionError("No session token, start with /exchange/rsa-dh-params")
+
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            session = self._sessions.get(token)
+            if session is None:
+                raise SessionError("Unknown or expired session")
+            return session
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"active": len(self._sessions), "created": self.created, "evicted": self.evicted}
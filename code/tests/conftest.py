@@ -0,0 +1,12 @@
+"""Put `code/` and the lab directories on sys.path, as running the scripts does.
+
+The lab servers are not imported here: they share the module name `server`.
+"""
+import sys
+from pathlib import Path
+
+CODE = Path(__file__).resolve().parent.parent
+
+for path in (CODE, *(CODE / lab for lab in ("arp", "ecb", "low_entropy", "vernam", "envelope_encryption"))):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
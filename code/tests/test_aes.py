@@ -0,0 +1,92 @@
+import os
+import threading
+
+import pytest
+
+pytest.importorskip("cryptography")
+
+from cryptography.hazmat.primitives import padding
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+from common import aes
+
+KEY = bytes(range(32))
+# Empty, sub-block, block-aligned, and past the buffered limit
+SIZES = [0, 5, 16, 1000, aes.MAX_BUFFERED + 7]
+
+
+def reference_pad(data: bytes) -> bytes:
+    padder = padding.PKCS7(128).padder()
+    return padder.update(data) + padder.finalize()
+
+
+def decrypt(mode, data: bytes) -> bytes:
+    decryptor = Cipher(algorithms.AES(KEY), mode).decryptor()
+    return decryptor.update(data) + decryptor.finalize()
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_pkcs7_matches_cryptography(size):
+    data = os.urandom(size)
+    assert aes.pkcs7_pad(data) == reference_pad(data)
+    buffer = bytearray(size + 32)
+    length = aes.pkcs7_pad_into(buffer, data)
+    assert bytes(buffer[:length]) == reference_pad(data)
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_ecb_matches_fresh_encryptor(size):
+    data = os.urandom(size)
+    encryptor = Cipher(algorithms.AES(KEY), modes.ECB()).encryptor()
+    expected = encryptor.update(reference_pad(data)) + encryptor.finalize()
+    # Twice, so the second call runs on the cached context and buffers
+    assert aes.ecb_encrypt(KEY, data) == expected
+    assert aes.ecb_encrypt(KEY, data) == expected
+
+
+def test_ecb_unpadded_requires_whole_blocks():
+    data = os.urandom(32)
+    assert aes.ecb_encrypt(KEY, data, pad=False) == aes.ecb_encrypt(KEY, data)[:32]
+    with pytest.raises(ValueError):
+        aes.ecb_encrypt(KEY, b"not a block", pad=False)
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_cbc_round_trips_under_fresh_ivs(size):
+    data = os.urandom(size)
+    iv1, ciphertext1 = aes.cbc_encrypt(KEY, data)
+    iv2, ciphertext2 = aes.cbc_encrypt(KEY, data)
+    assert iv1 != iv2
+    assert decrypt(modes.CBC(iv1), ciphertext1) == reference_pad(data)
+    assert decrypt(modes.CBC(iv2), ciphertext2) == reference_pad(data)
+
+
+def test_ctr_round_trips():
+    data = os.urandom(1000)
+    nonce, ciphertext = aes.ctr_encrypt(KEY, data)
+    assert decrypt(modes.CTR(nonce), ciphertext) == data
+
+
+def test_contexts_are_per_thread_and_bounded(monkeypatch):
+    monkeypatch.setattr(aes, "MAX_KEYS", 4)
+    keys = [os.urandom(16) for _ in range(10)]
+    data = os.urandom(100)
+    errors = []
+
+    def work():
+        try:
+            for _ in range(20):
+                for key in keys:
+                    iv, ciphertext = aes.cbc_encrypt(key, data)
+                    plaintext = Cipher(algorithms.AES(key), modes.CBC(iv)).decryptor().update(ciphertext)
+                    assert plaintext[:100] == data
+            assert len(aes._local.contexts) == 4
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
@@ -0,0 +1,66 @@
+import os
+import random
+
+import pytest
+
+import block_analysis
+from block_analysis import BLOCK_SIZE, analyze, analyze_file, count_blocks_dict
+
+
+def make_corpus(blocks: int, seed: int = 0) -> bytes:
+    """ECB-like data: a few blocks repeated with varying frequency among random ones."""
+    rng = random.Random(seed)
+    pool = [rng.randbytes(BLOCK_SIZE) for _ in range(8)]
+    return b"".join(
+        pool[min(int(rng.expovariate(0.7)), 7)] if rng.random() < 0.4 else rng.randbytes(BLOCK_SIZE)
+        for _ in range(blocks)
+    ) + b"tail"
+
+
+def expected(data: bytes, top: int):
+    counter = count_blocks_dict(data)
+    histogram = {}
+    for count in counter.values():
+        histogram[count] = histogram.get(count, 0) + 1
+    return counter, dict(sorted(histogram.items())), sorted(counter.values(), reverse=True)[:top]
+
+
+def check(stats, data: bytes, top: int):
+    counter, histogram, top_counts = expected(data, top)
+    assert stats.total_blocks == len(data) // BLOCK_SIZE
+    assert stats.distinct_blocks == len(counter)
+    assert stats.histogram == histogram
+    assert stats.trailing_bytes == len(data) % BLOCK_SIZE
+    assert [count for _, count in stats.top] == top_counts
+    assert all(counter[block] == count for block, count in stats.top)
+
+
+@pytest.fixture(params=["hash", "sort", "no-numpy"])
+def method(request, monkeypatch):
+    if request.param == "no-numpy":
+        monkeypatch.setattr(block_analysis, "np", None)
+        return "hash"
+    if block_analysis.np is None:
+        pytest.skip("numpy is not installed")
+    return request.param
+
+
+def test_analyze_matches_counter(method):
+    data = make_corpus(5000)
+    check(analyze(data, top=5, method=method), data, 5)
+
+
+def test_analyze_without_full_blocks(method):
+    stats = analyze(b"short", method=method)
+    assert (stats.total_blocks, stats.top, stats.trailing_bytes) == (0, [], 5)
+
+
+def test_analyze_file_partitioned_matches_in_memory(tmp_path, method):
+    data = make_corpus(20000, seed=1)
+    path = tmp_path / "corpus.bin"
+    path.write_bytes(data)
+
+    # A chunk far smaller than the file forces the partitioned path
+    stats = analyze_file(str(path), top=5, method=method, chunk_bytes=4096, tmp_dir=str(tmp_path))
+    check(stats, data, 5)
+    assert os.listdir(tmp_path) == ["corpus.bin"]
@@ -0,0 +1,61 @@
+import os
+import threading
+
+from common.config import ConfigWatcher, get_setting, getenv, lab_environment
+
+
+def test_lab_environment_overrides_only_within_block(monkeypatch):
+    monkeypatch.setenv("FLAG", "shared")
+    monkeypatch.setenv("ECB__FLAG", "ecb")
+    settings = {"lab": {"ecb": {"flag": "from-config"}}}
+
+    with lab_environment("ECB"):
+        assert getenv("FLAG") == "ecb"
+        assert get_setting(settings, "lab.ecb.flag", "FLAG") == "ecb"
+        assert os.environ["FLAG"] == "shared"
+    with lab_environment("VERNAM"):
+        assert getenv("FLAG") == "shared"
+    assert getenv("FLAG") == "shared"
+    monkeypatch.delenv("FLAG")
+    assert get_setting(settings, "lab.ecb.flag", "FLAG") == "from-config"
+
+
+def test_lab_environment_is_not_seen_by_other_threads(monkeypatch):
+    monkeypatch.setenv("ECB__FLAG", "ecb")
+    entered, checked = threading.Event(), threading.Event()
+    seen = []
+
+    def import_lab():
+        with lab_environment("ECB"):
+            entered.set()
+            checked.wait(5)
+
+    importer = threading.Thread(target=import_lab)
+    importer.start()
+    entered.wait(5)
+    seen.append(getenv("FLAG"))
+    checked.set()
+    importer.join()
+    assert seen == [None]
+
+
+def test_watcher_reloads_with_overrides_of_its_lab(monkeypatch, tmp_path):
+    monkeypatch.setenv("ECB__FLAG", "ecb")
+    path = tmp_path / "config.yaml"
+    path.write_text("lab: {}\n")
+    reloaded = threading.Event()
+    seen = []
+
+    def reload(settings):
+        seen.append(get_setting(settings, "lab.ecb.flag", "FLAG", default=None))
+        reloaded.set()
+
+    with lab_environment("ECB"):
+        watcher = ConfigWatcher(reload, path=str(path), interval=0.01)
+    watcher.start()
+    try:
+        path.write_text("lab: {ecb: {flag: new}}\n")
+        assert reloaded.wait(5)
+    finally:
+        watcher.stop()
+    assert seen == ["ecb"]
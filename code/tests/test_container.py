@@ -0,0 +1,102 @@
+import os
+
+import pytest
+
+from common.container import HEADER, ChallengeContainer, ContainerError, ContainerWriter, open_corpus, write_container
+
+
+def test_round_trip_of_all_fields(tmp_path):
+    path = tmp_path / "challenge.bin"
+    n, e, p = 2**2047 + 12345, 65537, 2**1023 + 7
+    wrapped_key, iv, ciphertext = os.urandom(256), os.urandom(16), os.urandom(100_000)
+    write_container(path, ciphertext, n=n, e=e, p=p, wrapped_key=wrapped_key, iv=iv)
+
+    with ChallengeContainer(path) as container:
+        assert (container.n, container.e, container.p) == (n, e, p)
+        assert container.wrapped_key == wrapped_key
+        assert container.iv == iv
+        assert container.ciphertext == ciphertext
+
+
+def test_chunked_ciphertext_and_absent_fields(tmp_path):
+    path = tmp_path / "challenge.bin"
+    chunks = [os.urandom(size) for size in (1, 4096, 0, 77)]
+    write_container(path, iter(chunks), iv=b"x" * 16)
+
+    [container] = open_corpus([path])
+    try:
+        assert container.ciphertext == b"".join(chunks)
+        assert (container.n, container.e, container.p) == (None, None, None)
+        assert len(container.wrapped_key) == 0
+    finally:
+        container.close()
+
+
+def test_writer_removes_file_when_block_raises(tmp_path):
+    path = tmp_path / "challenge.bin"
+    with pytest.raises(RuntimeError):
+        with ContainerWriter(path, iv=b"x" * 16) as writer:
+            writer.write(b"partial")
+            raise RuntimeError("encryption failed")
+    assert not path.exists()
+
+
+@pytest.mark.parametrize("content, message", [
+    (b"", "empty file"),
+    (b"CTFC", "truncated header"),
+    (b"JUNK" + bytes(HEADER.size), "not a challenge container"),
+])
+def test_rejects_invalid_files(tmp_path, content, message):
+    path = tmp_path / "challenge.bin"
+    path.write_bytes(content)
+    with pytest.raises(ContainerError, match=message):
+        ChallengeContainer(path)
+
+
+def test_rejects_out_of_bounds_fields(tmp_path):
+    path = tmp_path / "challenge.bin"
+    write_container(path, b"ciphertext")
+    path.write_bytes(path.read_bytes()[:-4])
+    with pytest.raises(ContainerError, match="ciphertext out of bounds"):
+        ChallengeContainer(path)
+
+
+def test_views_outlive_close(tmp_path):
+    path = tmp_path / "challenge.bin"
+    write_container(path, b"ciphertext", iv=b"x" * 16)
+
+    with ChallengeContainer(path) as container:
+        ciphertext = container.ciphertext
+    assert ciphertext == b"ciphertext"
+    container.close()
+    del ciphertext
+
+
+def test_corpus_does_not_hold_a_descriptor_per_file(tmp_path):
+    resource = pytest.importorskip("resource")
+    paths = [tmp_path / f"{i}.bin" for i in range(400)]
+    for i, path in enumerate(paths):
+        write_container(path, bytes([i % 256]) * 32)
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(256, hard), hard))
+    try:
+        corpus = open_corpus(paths)
+        for i, container in enumerate(corpus):
+            assert container.ciphertext[0] == i % 256
+            container.close()
+    finally:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+
+
+def test_corpus_closes_opened_containers_when_one_fails(tmp_path, monkeypatch):
+    good = tmp_path / "good.bin"
+    write_container(good, b"ciphertext")
+    bad = tmp_path / "bad.bin"
+    bad.write_bytes(b"junk")
+
+    closed = []
+    monkeypatch.setattr(ChallengeContainer, "close", lambda self: closed.append(self.path))
+    with pytest.raises(ContainerError):
+        open_corpus([good, bad])
+    assert closed == [good]
@@ -0,0 +1,92 @@
+import asyncio
+import importlib.util
+
+import pytest
+
+pytest.importorskip("cryptography")
+pytest.importorskip("pydantic_settings")
+from cryptography.hazmat.primitives import padding
+from starlette.background import BackgroundTask
+from starlette.testclient import TestClient
+
+from conftest import CODE
+
+CONFIG = """\
+lab:
+  ecb_deterministic:
+    server: {port: 8002}
+    flag: test-flag
+"""
+
+
+@pytest.fixture
+def ecb(tmp_path, monkeypatch):
+    (tmp_path / "config.yaml").write_text(CONFIG)
+    monkeypatch.chdir(tmp_path)
+    spec = importlib.util.spec_from_file_location("ecb_stream_server", CODE / "ecb" / "server.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def decrypt(ecb, ciphertext: bytes) -> bytes:
+    decryptor = ecb.cipher.decryptor()
+    unpadder = padding.PKCS7(128).unpadder()
+    return unpadder.update(decryptor.update(ciphertext) + decryptor.finalize()) + unpadder.finalize()
+
+
+def test_stream_encrypts_multi_chunk_body(ecb):
+    chunks = [b"a" * 1000, b"", b"b" * 77, b"c" * 70000]
+
+    with TestClient(ecb.app) as client:
+        response = client.post("/stream", content=iter(chunks))
+
+    assert response.status_code == 200
+    assert decrypt(ecb, response.content) == b"".join(chunks)
+
+
+def test_stream_ends_cleanly_when_client_disconnects(ecb):
+    messages = [
+        {"type": "http.request", "body": b"x" * 100, "more_body": True},
+        {"type": "http.request", "body": b"y" * 100, "more_body": True},
+        {"type": "http.disconnect"},
+    ]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.Event().wait()
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/stream", "raw_path": b"/stream", "root_path": "",
+        "query_string": b"", "headers": [(b"content-type", b"application/octet-stream")],
+        "client": ("test", 1), "server": ("test", 80),
+    }
+    asyncio.run(ecb.app(scope, receive, send))
+
+    assert sent[0]["status"] == 200
+    assert sent[-1] == {"type": "http.response.body", "body": b"", "more_body": False}
+    body = b"".join(message.get("body", b"") for message in sent[1:])
+    assert decrypt(ecb, body) == b"x" * 100 + b"y" * 100
+
+
+def test_stream_response_runs_background(ecb):
+    ran = []
+
+    async def body():
+        yield b"data"
+
+    response = ecb.DuplexStreamingResponse(body(), background=BackgroundTask(ran.append, True))
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(response({"type": "http"}, None, send))
+    assert ran == [True]
+    assert sent[1]["body"] == b"data"
@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+import keystream
+from keystream import SMALL_MESSAGE_BYTES, TILE_BYTES, xor_keystream
+
+
+def reference(key: bytes, message: bytes) -> bytes:
+    return bytes(b ^ key[i % len(key)] for i, b in enumerate(message))
+
+
+LENGTHS = [0, 1, 7, SMALL_MESSAGE_BYTES - 1, SMALL_MESSAGE_BYTES, 3 * TILE_BYTES + 13]
+
+
+@pytest.fixture(params=["numpy", "words"])
+def backend(request, monkeypatch):
+    if request.param == "numpy":
+        if keystream.np is None:
+            pytest.skip("numpy is not installed")
+    else:
+        monkeypatch.setattr(keystream, "np", None)
+    return request.param
+
+
+@pytest.mark.parametrize("length", LENGTHS)
+@pytest.mark.parametrize("key_size", [1, 3, 32])
+def test_matches_repeated_key_xor(backend, length, key_size):
+    key, message = os.urandom(key_size), os.urandom(length)
+    assert bytes(xor_keystream(key, message)) == reference(key, message)
+
+
+def test_writes_into_out_buffer(backend):
+    key, message = b"key", os.urandom(1000)
+    out = bytearray(1010)
+    assert xor_keystream(key, memoryview(message), out) is out
+    assert bytes(out[:1000]) == reference(key, message)
+    assert bytes(out[1000:]) == bytes(10)
+
+
+def test_rejects_empty_key_and_short_out():
+    with pytest.raises(ValueError):
+        xor_keystream(b"", b"abc")
+    with pytest.raises(ValueError):
+        xor_keystream(b"k", b"abc", bytearray(2))
@@ -0,0 +1,33 @@
+import importlib
+import sys
+
+import pytest
+
+from common import negotiation
+
+
+@pytest.fixture
+def without_msgpack(monkeypatch):
+    monkeypatch.setitem(sys.modules, "msgpack", None)
+    yield importlib.reload(negotiation)
+    monkeypatch.undo()
+    importlib.reload(negotiation)
+
+
+def test_binary_only_when_preferred_over_json():
+    assert negotiation.binary_media_type(None) is None
+    assert negotiation.binary_media_type("*/*") is None
+    assert negotiation.binary_media_type("application/octet-stream") == negotiation.OCTET_STREAM
+    assert negotiation.binary_media_type("application/octet-stream;q=0.5, application/json") is None
+
+
+def test_msgpack_not_advertised_without_msgpack(without_msgpack):
+    assert without_msgpack.OFFERED == (without_msgpack.OCTET_STREAM,)
+    assert list(without_msgpack.BINARY_RESPONSES[200]["content"]) == [without_msgpack.OCTET_STREAM]
+    assert without_msgpack.binary_media_type("application/msgpack") is None
+
+
+def test_msgpack_advertised_when_installed():
+    pytest.importorskip("msgpack")
+    assert negotiation.MSGPACK in negotiation.BINARY_RESPONSES[200]["content"]
+    assert negotiation.binary_media_type("application/msgpack") == negotiation.MSGPACK
@@ -0,0 +1,73 @@
+import pytest
+
+from rate_limit import (
+    BanningRateLimiter, MemoryRateLimiter, SlidingWindowLog, TokenBucket, create_rate_limiter,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_sliding_window_allows_limit_per_window():
+    clock = FakeClock()
+    limiter = MemoryRateLimiter(SlidingWindowLog(3, 1.0), clock=clock)
+
+    assert [limiter.is_rate_limited("a") for _ in range(4)] == [False, False, False, True]
+    assert not limiter.is_rate_limited("b")
+
+    clock.now = 0.5
+    assert limiter.is_rate_limited("a")
+    clock.now = 1.0
+    assert not limiter.is_rate_limited("a")
+    assert limiter.stats()["allowed"] == 5
+
+
+def test_token_bucket_refills_at_rate():
+    clock = FakeClock()
+    limiter = MemoryRateLimiter(TokenBucket(2, 1.0), clock=clock)
+
+    assert [limiter.is_rate_limited("a") for _ in range(3)] == [False, False, True]
+    clock.now = 0.5  # one token back
+    assert [limiter.is_rate_limited("a") for _ in range(2)] == [False, True]
+
+
+def test_compaction_drops_idle_keys_only():
+    clock = FakeClock()
+    limiter = MemoryRateLimiter(SlidingWindowLog(2, 1.0), shards=4, clock=clock)
+    for key in "abcd":
+        limiter.is_rate_limited(key)
+
+    clock.now = 0.5
+    limiter.is_rate_limited("a")
+    clock.now = 1.2
+    limiter.compact()
+    assert limiter.stats()["keys"] == 1
+    assert limiter.stats()["compacted"] == 3
+
+
+def test_ban_outlasts_the_window():
+    clock = FakeClock()
+    limiter = BanningRateLimiter(
+        MemoryRateLimiter(SlidingWindowLog(1, 1.0), clock=clock), ban_seconds=10, clock=clock,
+    )
+
+    assert not limiter.is_rate_limited("a")
+    assert limiter.is_rate_limited("a")
+    clock.now = 5.0
+    assert limiter.is_rate_limited("a")
+    clock.now = 10.0
+    assert not limiter.is_rate_limited("a")
+    assert limiter.stats()["bans"] == 1
+    assert not limiter.blocking
+
+
+def test_create_rate_limiter_rejects_unknown_algorithm():
+    with pytest.raises(ValueError):
+        create_rate_limiter(10, 1.0, algorithm="leaky-bucket")
+    with pytest.raises(ValueError):
+        create_rate_limiter(10, 1.0, algorithm="token-bucket", redis_url="redis://localhost")
@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from keystream import xor_keystream
+from recover import (
+    apply_crib, crib_drag, decrypt, guess_key_size, recover_key_frequency, recover_key_known_plaintext,
+)
+
+WORDS = (
+    "the quick brown fox jumps over a lazy dog while students learn that a one time pad "
+    "must never be reused because reused keys leak the xor of two plaintexts to anyone"
+).split()
+
+
+def sentences(count: int, seed: int = 0) -> list[bytes]:
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize().encode() + b"."
+            for _ in range(count)]
+
+
+def test_frequency_recovers_key_from_many_ciphertexts():
+    key = random.Random(1).randbytes(16)
+    plaintexts = sentences(300)
+    ciphertexts = [bytes(xor_keystream(key, p)) for p in plaintexts]
+
+    recovered, scores = recover_key_frequency(ciphertexts, len(key))
+    assert scores.shape == (16, 256)
+    assert recovered == key
+    assert guess_key_size(ciphertexts, max_key_size=40) == len(key)
+
+
+def test_known_plaintext_recovers_key_and_checks_consistency():
+    key = b"0123456789abcdef"
+    plaintext = b"A" * 40
+    ciphertext = bytes(xor_keystream(key, plaintext))
+
+    assert recover_key_known_plaintext(plaintext, ciphertext, 16) == key
+    with pytest.raises(ValueError):
+        recover_key_known_plaintext(plaintext, ciphertext, 15)
+    with pytest.raises(ValueError):
+        recover_key_known_plaintext(plaintext[:8], ciphertext, 16)
+
+
+def test_crib_fixes_key_bytes():
+    key = random.Random(2).randbytes(16)
+    plaintexts = sentences(300, seed=3)
+    ciphertexts = [bytes(xor_keystream(key, p)) for p in plaintexts]
+    _, scores = recover_key_frequency(ciphertexts, len(key))
+
+    crib = plaintexts[0][4:14]
+    offsets = [offset for offset, _, _ in crib_drag(ciphertexts[0], crib, len(key), scores, top=3)]
+    assert 4 in offsets
+
+    damaged = bytes(16)
+    _, _, key_bytes = next(r for r in crib_drag(ciphertexts[0], crib, len(key), scores) if r[0] == 4)
+    repaired = apply_crib(damaged, 4, key_bytes)
+    assert repaired[4:14] == key[4:14]
+    assert decrypt(key, ciphertexts[0]) == plaintexts[0]
@@ -0,0 +1,115 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import session_store
+from session_store import SessionStore
+
+
+class FakeBackend:
+    def __init__(self):
+        self.sessions = {}
+
+    async def create_session(self, session_id, session):
+        self.sessions[session_id] = session
+
+    async def get_session(self, session_id):
+        return self.sessions.get(session_id)
+
+    async def delete_session(self, session_id):
+        self.sessions.pop(session_id, None)
+
+
+class PurgingBackend(FakeBackend):
+    async def delete_expired_sessions(self, before):
+        self.sessions = {sid: s for sid, s in self.sessions.items() if s["expires_at"] >= before}
+
+
+class FakeClock:
+    now_value = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.now_value
+
+
+def session(expires_in: float) -> dict:
+    return {"expires_at": FakeClock.now_value + timedelta(seconds=expires_in)}
+
+
+def advance(monkeypatch, seconds: float) -> None:
+    monkeypatch.setattr(FakeClock, "now_value", FakeClock.now_value + timedelta(seconds=seconds))
+
+
+def test_footprint_stays_at_max_sessions_and_backend_is_purged(monkeypatch):
+    monkeypatch.setattr(session_store, "datetime", FakeClock)
+    backend = PurgingBackend()
+    store = SessionStore(backend, max_sessions=10, sweep_batch_size=7)
+
+    async def run():
+        for i in range(5000):
+            await store.create_session(f"s{i}", session(60 + i % 100))
+        assert len(backend.sessions) == 5000
+        assert len(store._sessions) == 10
+        assert len(store._expiry_heap) <= 2 * 10 + store.sweep_batch_size
+        assert store.stats()["capacity_evictions"] == 4990
+
+        # Evicted sessions are still valid and come back from the backend
+        assert await store.get_session("s0") is not None
+
+        advance(monkeypatch, 3600)
+        return await store.sweep()
+
+    assert asyncio.run(run()) == 10
+    assert backend.sessions == {}
+    assert store.stats()["size"] == 0
+    assert store.stats()["purges"] == 1
+
+
+def test_sweep_keeps_unexpired_sessions(monkeypatch):
+    monkeypatch.setattr(session_store, "datetime", FakeClock)
+    backend = PurgingBackend()
+    store = SessionStore(backend, max_sessions=2)
+
+    async def run():
+        await store.create_session("a", session(10))
+        await store.create_session("b", session(20))
+        await store.create_session("c", session(1000))  # evicts "a"
+        advance(monkeypatch, 100)
+        return await store.sweep()
+
+    assert asyncio.run(run()) == 1
+    assert set(backend.sessions) == {"c"}
+
+
+def test_purge_runs_once_per_interval(monkeypatch):
+    purged = []
+
+    class CountingBackend(FakeBackend):
+        async def delete_expired_sessions(self, before):
+            purged.append(before)
+
+    store = SessionStore(CountingBackend(), purge_interval=60)
+
+    async def run():
+        await store.sweep()
+        await store.sweep()
+        store._last_purge -= 60
+        await store.sweep()
+
+    asyncio.run(run())
+    assert len(purged) == 2
+
+
+def test_backend_without_purge_is_only_swept_through_the_index(monkeypatch):
+    monkeypatch.setattr(session_store, "datetime", FakeClock)
+    backend = FakeBackend()
+    store = SessionStore(backend, max_sessions=1)
+
+    async def run():
+        await store.create_session("a", session(10))
+        await store.create_session("b", session(20))
+        advance(monkeypatch, 100)
+        return await store.sweep()
+
+    assert asyncio.run(run()) == 1
+    assert set(backend.sessions) == {"a"}
@@ -0,0 +1,76 @@
+import time
+
+import pytest
+
+pytest.importorskip("jose")
+
+from jose import JWTError, jwt
+
+from tokens import TokenSigner, VerifiedTokenCache
+
+SECRET = "test-secret"
+
+
+@pytest.mark.parametrize("algorithm", ["HS256", "HS512"])
+def test_signed_tokens_verify_with_python_jose(algorithm):
+    signer = TokenSigner(SECRET, algorithm, static_claims={"flag": "ZmxhZw==", "hint": "h"}, expire_minutes=5)
+    token = signer.sign({"sub": "alice"})
+
+    claims = jwt.decode(token, SECRET, algorithms=[algorithm])
+    assert claims["sub"] == "alice"
+    assert claims["flag"] == "ZmxhZw=="
+    assert claims["hint"] == "h"
+    assert 295 <= claims["exp"] - time.time() <= 300
+    assert jwt.get_unverified_header(token) == {"alg": algorithm, "typ": "JWT"}
+
+
+def test_signer_without_static_claims_and_unknown_algorithm():
+    token = TokenSigner(SECRET, "HS256", static_claims={}, expire_minutes=1).sign({"sub": "bob"})
+    assert set(jwt.decode(token, SECRET, algorithms=["HS256"])) == {"sub", "exp"}
+    with pytest.raises(ValueError):
+        TokenSigner(SECRET, "RS256", static_claims={}, expire_minutes=1)
+
+
+def test_cache_hits_after_first_verification():
+    token = TokenSigner(SECRET, "HS256", static_claims={}, expire_minutes=1).sign({"sub": "alice"})
+    cache = VerifiedTokenCache(SECRET, "HS256")
+
+    assert cache.decode(token)["sub"] == "alice"
+    assert cache.decode(token)["sub"] == "alice"
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1}
+
+
+def test_cache_rejects_bad_and_expired_tokens():
+    cache = VerifiedTokenCache(SECRET, "HS256")
+    forged = TokenSigner("other-secret", "HS256", static_claims={}, expire_minutes=1).sign({"sub": "eve"})
+    with pytest.raises(JWTError):
+        cache.decode(forged)
+
+    expired = jwt.encode({"sub": "alice", "exp": int(time.time()) - 10}, SECRET, algorithm="HS256")
+    with pytest.raises(JWTError):
+        cache.decode(expired)
+    assert cache.stats()["entries"] == 0
+
+
+def test_cache_drops_entries_once_expired_and_when_full(monkeypatch):
+    cache = VerifiedTokenCache(SECRET, "HS256", max_entries=2)
+    tokens = [jwt.encode({"sub": str(i), "exp": int(time.time()) + 60}, SECRET, algorithm="HS256")
+              for i in range(3)]
+    for token in tokens:
+        cache.decode(token)
+    assert cache.stats()["entries"] == 2
+
+    # Past its exp a cached token is no longer a hit and goes back to python-jose
+    misses = cache.stats()["misses"]
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    cache.decode(tokens[2])
+    assert cache.stats()["misses"] == misses + 1
+
+
+def test_tokens_without_exp_are_not_cached():
+    cache = VerifiedTokenCache(SECRET, "HS256")
+    token = jwt.encode({"sub": "alice"}, SECRET, algorithm="HS256")
+    cache.decode(token)
+    cache.decode(token)
+    assert cache.stats() == {"entries": 0, "hits": 0, "misses": 2}
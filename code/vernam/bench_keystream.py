@@ -0,0 +1,67 @@
+"""Benchmark the bulk XOR engine against the original per-byte generator.
+
+Usage: python bench_keystream.py [--max-size 64M] [--key-size 32]
+"""
+import argparse
+import os
+import time
+
+from keystream import xor_keystream
+
+SIZES = [16, 256, 4 * 1024, 64 * 1024, 1024 * 1024, 16 * 1024 * 1024, 64 * 1024 * 1024]
+
+
+def xor_generator(key: bytes, message: bytes) -> bytes:
+    """The original xor_cipher implementation from server.py."""
+    complete_blocks = len(message) // len(key)
+    remainder_size = len(message) % len(key)
+    keystream = key * complete_blocks
+    if remainder_size > 0:
+        keystream += key[:remainder_size]
+    return bytes(k ^ m for k, m in zip(keystream, message))
+
+
+def timeit(func, min_time: float = 0.2) -> float:
+    """Return the best per-call time in seconds over at least `min_time` seconds."""
+    best = float("inf")
+    deadline = time.perf_counter() + min_time
+    runs = 0
+    while runs < 3 or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+        runs += 1
+    return best
+
+
+def parse_size(value: str) -> int:
+    units = {"K": 1024, "M": 1024 * 1024}
+    if value[-1].upper() in units:
+        return int(value[:-1]) * units[value[-1].upper()]
+    return int(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-size", type=parse_size, default=64 * 1024 * 1024)
+    parser.add_argument("--key-size", type=int, default=32)
+    args = parser.parse_args()
+
+    key = os.urandom(args.key_size)
+    print(f"{'size':>10} {'generator MB/s':>15} {'engine MB/s':>12} {'engine+out MB/s':>16} {'speedup':>8}")
+
+    for size in (s for s in SIZES if s <= args.max_size):
+        message = os.urandom(size)
+        out = bytearray(size)
+        assert xor_keystream(key, message) == xor_generator(key, message)
+
+        t_gen = timeit(lambda: xor_generator(key, message))
+        t_eng = timeit(lambda: xor_keystream(key, message))
+        t_out = timeit(lambda: xor_keystream(key, message, out))
+
+        mb = size / 1e6
+        print(f"{size:>10} {mb / t_gen:>15.1f} {mb / t_eng:>12.1f} {mb / t_out:>16.1f} {t_gen / t_out:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
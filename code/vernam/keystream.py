@@ -0,0 +1,88 @@
+from functools import lru_cache
+from typing import Optional
+
+try:
+    import numpy as np
+except ImportError:  # fall back to word-wise XOR on Python ints
+    np = None
+
+# Width (in bytes) of the repeated-key tile the message is XORed against.
+# The tile is a whole number of keys and of 64-bit words, so the message can be
+# processed as a 2-D array of machine words without materializing a keystream
+# as long as the message itself.
+TILE_BYTES = 64 * 1024
+
+# Below this size the NumPy call overhead dominates; XOR as Python ints instead.
+SMALL_MESSAGE_BYTES = 512
+
+
+@lru_cache(maxsize=8)
+def _key_tile(key: bytes) -> bytes:
+    """Repeat the key into a tile of roughly TILE_BYTES bytes (multiple of 8 and of len(key))."""
+    unit = len(key) * 8
+    repeats = max(1, TILE_BYTES // unit) * 8
+    return key * repeats
+
+
+@lru_cache(maxsize=8)
+def _tile_int(key: bytes) -> int:
+    return int.from_bytes(_key_tile(key), "little")
+
+
+def _xor_numpy(key: bytes, message, out, length: int) -> None:
+    tile = _key_tile(key)
+    width = len(tile)
+    full = length - length % width
+
+    src = np.frombuffer(message, dtype=np.uint8, count=length)
+    dst = np.frombuffer(out, dtype=np.uint8, count=length)
+
+    if full:
+        tile_words = np.frombuffer(tile, dtype=np.uint64)
+        np.bitwise_xor(
+            src[:full].view(np.uint64).reshape(-1, tile_words.size),
+            tile_words,
+            out=dst[:full].view(np.uint64).reshape(-1, tile_words.size),
+        )
+
+    if length > full:
+        tail = length - full
+        np.bitwise_xor(src[full:], np.frombuffer(tile, dtype=np.uint8, count=tail), out=dst[full:])
+
+
+def _xor_words(key: bytes, message, out, length: int) -> None:
+    tile = _key_tile(key)
+    width = len(tile)
+    src = memoryview(message)
+    dst = memoryview(out)
+
+    for start in range(0, length, width):
+        end = min(start + width, length)
+        size = end - start
+        mask = _tile_int(key) if size == width else int.from_bytes(tile[:size], "little")
+        chunk = int.from_bytes(src[start:end], "little") ^ mask
+        dst[start:end] = chunk.to_bytes(size, "little")
+
+
+def xor_keystream(key: bytes, message, out: Optional[bytearray] = None):
+    """XOR `message` with `key` repeated to the message length.
+
+    If `out` is given it must be a writable buffer of at least len(message)
+    bytes; the result is written into it and `out` is returned. Otherwise a
+    new `bytearray` is allocated and returned.
+    """
+    if not key:
+        raise ValueError("Key cannot be empty")
+
+    length = memoryview(message).nbytes
+    target = bytearray(length) if out is None else out
+    if memoryview(target).nbytes < length:
+        raise ValueError("Output buffer is smaller than the message")
+
+    if length:
+        if np is not None and length >= SMALL_MESSAGE_BYTES:
+            _xor_numpy(key, message, target, length)
+        else:
+            _xor_words(key, message, target, length)
+
+    return target
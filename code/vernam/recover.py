@@ -0,0 +1,194 @@
+"""Recover a reused Vernam key from many ciphertexts or one known plaintext.
+
+Usage:
+    python recover.py --url http://localhost:80                 # known plaintext via POST /
+    python recover.py --ciphertexts FILE --key-size 32         # one hex ciphertext per line
+"""
+import argparse
+import math
+from typing import Iterable, Optional
+
+import numpy as np
+
+from keystream import xor_keystream
+
+# Approximate byte frequencies of English prose (percent, space included).
+# Uppercase letters get a tenth of their lowercase weight; every other byte
+# gets FLOOR, so binary garbage scores far below text.
+LETTER_FREQUENCIES = {
+    " ": 18.0, "e": 10.2, "t": 7.5, "a": 6.5, "o": 6.2, "i": 5.7, "n": 5.7, "s": 5.3,
+    "r": 5.0, "h": 4.9, "l": 3.3, "d": 3.3, "u": 2.3, "c": 2.2, "m": 2.0, "f": 1.8,
+    "w": 1.7, "g": 1.6, "y": 1.6, "p": 1.5, "b": 1.2, "v": 0.8, "k": 0.6, "x": 0.15,
+    "j": 0.1, "q": 0.1, "z": 0.07,
+}
+PUNCTUATION_FREQUENCIES = {
+    ".": 1.0, ",": 1.0, "'": 0.3, '"': 0.3, "-": 0.3, "\n": 0.3, "?": 0.1, "!": 0.1,
+    ":": 0.1, ";": 0.1, "(": 0.05, ")": 0.05, "{": 0.02, "}": 0.02, "_": 0.02,
+}
+DIGIT_FREQUENCY = 0.1
+FLOOR = 1e-4
+
+
+def english_log_frequencies() -> np.ndarray:
+    """Log-probability of each byte value in English text."""
+    freq = np.full(256, FLOOR)
+    for ch, f in LETTER_FREQUENCIES.items():
+        freq[ord(ch)] = f
+        if ch.isalpha():
+            freq[ord(ch.upper())] = f / 10
+    for ch, f in PUNCTUATION_FREQUENCIES.items():
+        freq[ord(ch)] = f
+    for digit in b"0123456789":
+        freq[digit] = DIGIT_FREQUENCY
+    return np.log(freq / freq.sum())
+
+
+ENGLISH_LOG_FREQ = english_log_frequencies()
+
+# SCORE_TABLE[b, k] = log-frequency of b ^ k: column histograms times this
+# table score all 256 candidate key bytes at once
+SCORE_TABLE = ENGLISH_LOG_FREQ[np.arange(256)[:, None] ^ np.arange(256)[None, :]]
+
+
+def load_matrix(ciphertexts: Iterable[bytes]) -> tuple[np.ndarray, np.ndarray]:
+    """Stack ciphertexts into an (N, max_len) uint8 matrix plus a validity mask."""
+    ciphertexts = list(ciphertexts)
+    lengths = np.fromiter((len(c) for c in ciphertexts), dtype=np.int64, count=len(ciphertexts))
+    width = int(lengths.max()) if len(lengths) else 0
+    matrix = np.zeros((len(ciphertexts), width), dtype=np.uint8)
+    for row, ciphertext in zip(matrix, ciphertexts):
+        row[:len(ciphertext)] = np.frombuffer(ciphertext, dtype=np.uint8)
+    mask = np.arange(width)[None, :] < lengths[:, None]
+    return matrix, mask
+
+
+def column_histograms(matrix: np.ndarray, mask: np.ndarray, key_size: int) -> np.ndarray:
+    """(key_size, 256) counts of each ciphertext byte value per key position."""
+    columns = np.broadcast_to(np.arange(matrix.shape[1]) % key_size, matrix.shape)
+    index = columns[mask].astype(np.int64) * 256 + matrix[mask]
+    return np.bincount(index, minlength=key_size * 256).reshape(key_size, 256)
+
+
+def score_columns(matrix: np.ndarray, mask: np.ndarray, key_size: int) -> np.ndarray:
+    """(key_size, 256) English log-likelihood of decrypting each column with each key byte."""
+    return column_histograms(matrix, mask, key_size) @ SCORE_TABLE
+
+
+def recover_key_frequency(ciphertexts: Iterable[bytes], key_size: int) -> tuple[bytes, np.ndarray]:
+    """Best key by per-column frequency scoring; also returns the score matrix."""
+    matrix, mask = load_matrix(ciphertexts)
+    scores = score_columns(matrix, mask, key_size)
+    return scores.argmax(axis=1).astype(np.uint8).tobytes(), scores
+
+
+def recover_key_known_plaintext(plaintext: bytes, ciphertext: bytes, key_size: int) -> bytes:
+    """Direct recovery from one aligned pair: key = plaintext ^ ciphertext.
+
+    Needs at least key_size bytes; a longer pair only adds redundancy, which
+    is checked for consistency.
+    """
+    length = min(len(plaintext), len(ciphertext))
+    if length < key_size:
+        raise ValueError(f"Need at least {key_size} known bytes, got {length}")
+    stream = np.frombuffer(plaintext[:length], dtype=np.uint8) ^ np.frombuffer(ciphertext[:length], dtype=np.uint8)
+    if not np.array_equal(stream, np.resize(stream[:key_size], length)):
+        raise ValueError(f"Pair is not consistent with a repeating {key_size}-byte key")
+    return stream[:key_size].tobytes()
+
+
+def guess_key_size(ciphertexts: Iterable[bytes], max_key_size: int = 64) -> int:
+    """Key size whose best frequency decryption looks most like English (per byte)."""
+    matrix, mask = load_matrix(ciphertexts)
+    total = mask.sum()
+    best_size, best_score = 1, -math.inf
+    for key_size in range(1, min(max_key_size, matrix.shape[1]) + 1):
+        score = score_columns(matrix, mask, key_size).max(axis=1).sum() / total
+        # Larger sizes fit the noise slightly better; require a clear improvement
+        if score > best_score + 0.05:
+            best_size, best_score = key_size, score
+    return best_size
+
+
+def crib_drag(ciphertext: bytes, crib: bytes, key_size: int, scores: np.ndarray, top: int = 5) -> list[tuple[int, float, bytes]]:
+    """Slide `crib` over `ciphertext` and rank offsets.
+
+    Each offset implies len(crib) key bytes; their per-column scores (from
+    score_columns over the whole corpus) measure how English every other
+    ciphertext becomes under them. Scores are relative to the best byte of
+    each column, so 0 means the crib agrees with frequency analysis. Returns
+    (offset, score, implied key bytes at key positions offset % key_size ...).
+    """
+    c = np.frombuffer(ciphertext, dtype=np.uint8)
+    k = np.frombuffer(crib, dtype=np.uint8)
+    if len(k) > len(c):
+        return []
+    windows = np.lib.stride_tricks.sliding_window_view(c, len(k)) ^ k
+    positions = (np.arange(len(windows))[:, None] + np.arange(len(k))[None, :]) % key_size
+    relative = scores - scores.max(axis=1, keepdims=True)
+    total = relative[positions, windows].sum(axis=1)
+    best = np.argsort(-total)[:top]
+    return [(int(o), float(total[o]), windows[o].tobytes()) for o in best]
+
+
+def apply_crib(key: bytes, offset: int, key_bytes: bytes) -> bytes:
+    """Overwrite the key positions implied by a crib placed at `offset`."""
+    key = bytearray(key)
+    for i, b in enumerate(key_bytes):
+        key[(offset + i) % len(key)] = b
+    return bytes(key)
+
+
+def decrypt(key: bytes, ciphertext: bytes) -> bytes:
+    return bytes(xor_keystream(key, ciphertext))
+
+
+def recover_from_server(url: str, key_size: Optional[int] = None) -> tuple[bytes, bytes]:
+    """Recover the key via one chosen plaintext on POST / and decrypt /challenge."""
+    import requests
+
+    http = requests.Session()
+    challenge = bytes.fromhex(http.get(f"{url}/challenge").json()["ciphertext"])
+    known = b"A" * max(key_size or 0, len(challenge))
+    response = http.post(f"{url}/", json={"plaintext": known.hex()})
+    response.raise_for_status()
+    ciphertext = bytes.fromhex(response.json()["ciphertext"])
+
+    # The keystream is the key repeated, so any length up to the pair works
+    key = recover_key_known_plaintext(known, ciphertext, key_size or len(known))
+    if key_size is None:
+        key = key[:len(challenge)]
+    return key, decrypt(key, challenge)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="lab server, for known-plaintext recovery")
+    parser.add_argument("--ciphertexts", help="file with one hex ciphertext per line")
+    parser.add_argument("--key-size", type=int, help="guessed from the ciphertexts when omitted")
+    parser.add_argument("--crib", help="known plaintext fragment to drag over the first ciphertext")
+    args = parser.parse_args()
+
+    if args.url:
+        key, plaintext = recover_from_server(args.url, args.key_size)
+        print(f"key:       {key.hex()}")
+        print(f"challenge: {plaintext.decode('ascii', errors='replace')}")
+        return
+
+    if not args.ciphertexts:
+        parser.error("either --url or --ciphertexts is required")
+    with open(args.ciphertexts) as f:
+        ciphertexts = [bytes.fromhex(line.strip()) for line in f if line.strip()]
+
+    key_size = args.key_size or guess_key_size(ciphertexts)
+    key, scores = recover_key_frequency(ciphertexts, key_size)
+    if args.crib:
+        offset, _, key_bytes = crib_drag(ciphertexts[0], args.crib.encode(), key_size, scores, top=1)[0]
+        key = apply_crib(key, offset, key_bytes)
+
+    print(f"key ({key_size} bytes): {key.hex()}")
+    for ciphertext in ciphertexts[:5]:
+        print(decrypt(key, ciphertext).decode("ascii", errors="replace"))
+
+
+if __name__ == "__main__":
+    main()
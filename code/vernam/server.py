@@ -1,34 +1,27 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException
 from pydantic import BaseModel, Field, validator
 from pydantic_settings import BaseSettings
-import yaml
 import hmac
 import hashlib
-import os
-from glom import glom
+from typing import Optional
+from keystream import xor_keystream
+from common.cache import CiphertextCache
+from common.config import ConfigWatcher, get_setting, load_config
+from common.metrics import install_metrics, timed
+from common.negotiation import BINARY_RESPONSES, binary_media_type, binary_response
 
 app = FastAPI(title="Vernam Cipher Lab")
-
-def get_setting(settings, path, env_var):
-    """Get setting from environment variable or fall back to config file."""
-    return os.environ.get(env_var, glom(settings, path))
-
-# Load configuration
-with open("config.yaml", "r") as f:
-    settings = yaml.safe_load(f)
+install_metrics(app, "vernam")
 
 class ServerSettings(BaseSettings):
-    port: int = get_setting(settings, "lab.vernam.server.port", "SERVER_PORT")
+    port: int
+    cache_max_bytes: int
 
 class VernamSettings(BaseSettings):
-    key_seed: str = get_setting(settings, "lab.vernam.key_seed", "VERNAM_KEY_SEED")
-    key_size: int = get_setting(settings, "lab.vernam.key_size", "VERNAM_KEY_SIZE")
-    challenge_text: str = get_setting(settings, "lab.vernam.challenge_text", "VERNAM_CHALLENGE_TEXT")
-    flag: str = get_setting(settings, "lab.vernam.flag", "VERNAM_FLAG")
-
-# Initialize settings
-server_settings = ServerSettings()
-vernam_settings = VernamSettings()
+    key_seed: str
+    key_size: int
+    challenge_text: str
+    flag: str
 
 class Plaintext(BaseModel):
     plaintext: str = Field(description="Hex-encoded plaintext (e.g. '414141' for 'AAA')")
@@ -53,33 +46,78 @@ def derive_key(key_seed: str, key_length: int) -> bytes:
         hashlib.sha256
     ).digest()[:key_length]
 
-def xor_cipher(key: bytes, message: bytes) -> bytes:
-    # Calculate how many complete key blocks we need
-    complete_blocks = len(message) // len(key)
-    remainder_size = len(message) % len(key)
-    
-    # Generate keystream for complete blocks
-    keystream = key * complete_blocks
-    
-    # Add remaining bytes from the beginning of the key if needed
-    if remainder_size > 0:
-        keystream += key[:remainder_size]
-        
-    return bytes(k ^ m for k, m in zip(keystream, message))
-
-# Derive the key once at startup
-KEY = derive_key(key_seed=vernam_settings.key_seed, key_length=vernam_settings.key_size)
-
-# Create challenge ciphertext ensuring ASCII encoding
-challenge_text = f"{vernam_settings.challenge_text} - {vernam_settings.flag}"
-CHALLENGE = challenge_text.encode('ascii')
-CHALLENGE_CIPHERTEXT = xor_cipher(KEY, CHALLENGE)
-
-@app.post("/", response_model=Ciphertext)
-def encrypt_plaintext(plaintext: Plaintext):
+@timed("xor_cipher")
+def xor_cipher(key: bytes, message: bytes, out: Optional[bytearray] = None) -> bytearray:
+    # Repeat the key over the whole message and XOR them together; the key is
+    # tiled on the fly (see keystream.py), so no full-length keystream is built
+    return xor_keystream(key, message, out)
+
+class KeyedCache(CiphertextCache):
+    """Ciphertext cache bound to the key its entries were encrypted under."""
+
+    def __init__(self, key: bytes, max_bytes: int):
+        super().__init__(max_bytes)
+        self.key = key
+
+    def encrypt(self, plaintext: bytes) -> bytearray:
+        return xor_cipher(self.key, plaintext)
+
+def load_settings(settings: dict) -> None:
+    """Derive the key and challenge from the vernam settings.
+
+    Called at import and again by the config watcher. A new key comes with
+    an empty cache, swapped in as one object so a request never caches a
+    ciphertext under the wrong key.
+    """
+    global vernam_settings, KEY, CHALLENGE, CHALLENGE_CIPHERTEXT, cache
+
+    vernam_settings = VernamSettings(
+        key_seed=get_setting(settings, "lab.vernam.key_seed", "VERNAM_KEY_SEED"),
+        key_size=get_setting(settings, "lab.vernam.key_size", "VERNAM_KEY_SIZE"),
+        challenge_text=get_setting(settings, "lab.vernam.challenge_text", "VERNAM_CHALLENGE_TEXT"),
+        flag=get_setting(settings, "lab.vernam.flag", "VERNAM_FLAG"),
+    )
+    KEY = derive_key(key_seed=vernam_settings.key_seed, key_length=vernam_settings.key_size)
+
+    # Create challenge ciphertext ensuring ASCII encoding
+    challenge_text = f"{vernam_settings.challenge_text} - {vernam_settings.flag}"
+    CHALLENGE = challenge_text.encode('ascii')
+    CHALLENGE_CIPHERTEXT = bytes(xor_cipher(KEY, CHALLENGE))
+
+    # KEY only changes on reload, so ciphertexts of repeated plaintexts can
+    # be served from a cache
+    cache = KeyedCache(KEY, server_settings.cache_max_bytes)
+
+# Load configuration (see common/config.py)
+settings = load_config()
+# The listening port and cache size cannot change without a restart
+server_settings = ServerSettings(
+    port=get_setting(settings, "lab.vernam.server.port", "SERVER_PORT"),
+    cache_max_bytes=get_setting(
+        settings, "lab.vernam.cache.max_bytes", "CACHE_MAX_BYTES", default=16 * 1024 * 1024
+    ),
+)
+load_settings(settings)
+# Polls config.yaml every CONFIG_RELOAD_SECONDS (0 = never)
+config_watcher = ConfigWatcher(load_settings)
+
+@app.on_event("startup")
+def start_config_watcher():
+    config_watcher.start()
+
+@app.on_event("shutdown")
+def stop_config_watcher():
+    config_watcher.stop()
+
+@app.post("/", response_model=Ciphertext, responses=BINARY_RESPONSES)
+def encrypt_plaintext(plaintext: Plaintext, accept: Optional[str] = Header(default=None)):
     try:
         plaintext_bytes = bytes.fromhex(plaintext.plaintext)
-        ciphertext = xor_cipher(KEY, plaintext_bytes)
+        keyed_cache = cache
+        ciphertext = keyed_cache.get_or_compute(plaintext_bytes, keyed_cache.encrypt)
+        media_type = binary_media_type(accept)
+        if media_type:
+            return binary_response(media_type, ciphertext=ciphertext)
         return Ciphertext(ciphertext=ciphertext.hex())
     except Exception as e:
         raise HTTPException(
@@ -87,10 +125,17 @@ def encrypt_plaintext(plaintext: Plaintext):
             detail=str(e)
         )
 
-@app.get("/challenge", response_model=Ciphertext)
-def get_challenge():
+@app.get("/challenge", response_model=Ciphertext, responses=BINARY_RESPONSES)
+def get_challenge(accept: Optional[str] = Header(default=None)):
+    media_type = binary_media_type(accept)
+    if media_type:
+        return binary_response(media_type, ciphertext=CHALLENGE_CIPHERTEXT)
     return Ciphertext(ciphertext=CHALLENGE_CIPHERTEXT.hex())
 
+@app.get("/cache/stats")
+def get_cache_stats():
+    return cache.stats()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=server_settings.port)
\ No newline at end of file